@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Local mock of every provider API the research runner talks to.
+
+One HTTP server speaks each provider's wire format under its own path prefix:
+- /openai, /xai, /moonshot, /deepseek, /aimlapi: OpenAI-style /v1/chat/completions,
+  streaming or not. Moonshot reports usage on the final choice. DeepSeek's reasoner
+  streams reasoning_content and keep-alive comments first.
+- /anthropic: /v1/messages, including streaming events, prompt-cache usage and
+  extended thinking.
+- /google: /v1beta/models/{model}:generateContent and :streamGenerateContent,
+  honouring the thinking budget.
+- /openai/v1/files + /batches and /anthropic/v1/messages/batches: the batch APIs.
+
+Each provider gets a profile with a latency distribution (lognormal around a
+median), an RPM limit that answers 429 with Retry-After and x-ratelimit headers, and
+injection rates for 429s, 5xx errors and malformed (non-JSON or truncated) content.
+`MockServer.env()` returns the API keys and base URLs that point the runner at
+the mock, so no real keys are needed:
+
+    python benchmarks/mockserver.py                        # serve, print the environment
+    python benchmarks/mockserver.py --profile flaky.json -- python run_status_research.py --async
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+import subprocess
+from collections import Counter, deque
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+PROVIDERS = ("openai", "anthropic", "google", "xai", "moonshot", "deepseek", "aimlapi")
+
+# Names the mock rates; responses draw from this pool so items overlap across models
+ITEM_POOL = [
+    ("Owning a private jet", "object"), ("Attending Harvard", "activity"), ("Yacht", "object"),
+    ("Playing polo", "activity"), ("Patek Philippe watch", "object"), ("Michelin-star dining", "activity"),
+    ("Art collecting", "activity"), ("Hermès Birkin bag", "object"), ("Private island", "object"),
+    ("Sailing", "activity"), ("Skiing in Gstaad", "activity"), ("Vintage wine cellar", "object"),
+    ("Running a marathon", "activity"), ("Tesla Model S", "object"), ("Speaking three languages", "activity"),
+    ("Penthouse apartment", "object"), ("Angel investing", "activity"), ("Leica camera", "object"),
+    ("Opera season tickets", "activity"), ("Rolex Daytona", "object"), ("Publishing a book", "activity"),
+    ("Thoroughbred racehorse", "object"), ("TED talk", "activity"), ("Bespoke tailoring", "object"),
+    ("Climbing Everest", "activity"), ("Country club membership", "object"), ("Philanthropy", "activity"),
+    ("Vineyard", "object"), ("Meditation retreat", "activity"), ("First-class travel", "activity"),
+]
+
+@dataclass
+class ProviderProfile:
+    latency: float = 0.05           # median seconds before the response starts
+    latency_sigma: float = 0.0      # lognormal spread around the median (0 = fixed)
+    rpm: Optional[float] = None     # requests per minute before answering 429
+    rate_limit_rate: float = 0.0    # share of calls answered 429 regardless of rpm
+    error_rate: float = 0.0         # share of calls answered 500/502/503
+    malformed_rate: float = 0.0     # share of responses whose content isn't valid JSON
+    items: int = 25                 # rated items per response
+    chunk_size: int = 64            # characters per streamed chunk
+    chunk_delay: float = 0.0        # seconds between streamed chunks
+    thinking_tokens: int = 300      # reasoning tokens a thinking call spends when its budget allows
+    thinking_time: float = 0.0      # extra seconds per 1000 reasoning tokens
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.latency_sigma <= 0:
+            return self.latency
+        return self.latency * math.exp(rng.gauss(0, self.latency_sigma))
+
+@dataclass
+class MockProfile:
+    providers: Dict[str, ProviderProfile] = field(default_factory=lambda: {p: ProviderProfile() for p in PROVIDERS})
+    batch_polls: int = 2            # status polls before a submitted batch completes
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "MockProfile":
+        """{"default": {...}, "providers": {"deepseek": {...}}, "batch_polls": 2, "seed": 1}"""
+        known = {f.name for f in fields(ProviderProfile)}
+        for section in [raw.get("default", {}), *raw.get("providers", {}).values()]:
+            unknown = set(section) - known
+            if unknown:
+                raise ValueError(f"Unknown provider profile keys: {sorted(unknown)}")
+        default = raw.get("default", {})
+        providers = {p: ProviderProfile(**{**default, **raw.get("providers", {}).get(p, {})}) for p in PROVIDERS}
+        return cls(providers, raw.get("batch_polls", 2), raw.get("seed"))
+
+    @classmethod
+    def load(cls, path: str) -> "MockProfile":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+class _Window:
+    """Sliding one-minute request window for a provider's RPM limit"""
+
+    def __init__(self):
+        self.times: Deque[float] = deque()
+        self.lock = threading.Lock()
+
+    def admit(self, rpm: float) -> Tuple[bool, float, int]:
+        """(admitted, seconds until a slot frees up, remaining requests)"""
+        with self.lock:
+            now = time.monotonic()
+            while self.times and now - self.times[0] >= 60.0:
+                self.times.popleft()
+            if len(self.times) >= rpm:
+                return False, 60.0 - (now - self.times[0]), 0
+            self.times.append(now)
+            return True, 60.0 - (now - self.times[0]), int(rpm - len(self.times))
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections when several worker processes open theirs at once
+    request_queue_size = 128
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # A client process exiting with keep-alive connections open isn't an error
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+class MockServer:
+    """Threaded mock provider server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, profile: Optional[MockProfile] = None, host: str = '127.0.0.1', port: int = 0):
+        self.profile = profile or MockProfile()
+        self.rng = random.Random(self.profile.seed)
+        self.rng_lock = threading.Lock()
+        self.windows = {p: _Window() for p in PROVIDERS}
+        self.stats: Counter = Counter()
+        self.stats_lock = threading.Lock()
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.httpd = _Server((host, port), _handler(self))
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that send every provider to this server"""
+        return {
+            "OPENAI_API_KEY": "mock", "ANTHROPIC_API_KEY": "mock", "GEMINI_API_KEY": "mock",
+            "GROK_API_KEY": "mock", "MOONSHOT_API_KEY": "mock", "DEEPSEEK_API_KEY": "mock", "AIMLAPI_KEY": "mock",
+            "OPENAI_BASE_URL": f"{self.url}/openai/v1",
+            "ANTHROPIC_BASE_URL": f"{self.url}/anthropic",
+            "GOOGLE_BASE_URL": f"{self.url}/google",
+            "XAI_BASE_URL": f"{self.url}/xai/v1",
+            "MOONSHOT_BASE_URL": f"{self.url}/moonshot/v1",
+            "DEEPSEEK_BASE_URL": f"{self.url}/deepseek/v1",
+            "AIMLAPI_BASE_URL": f"{self.url}/aimlapi/v1",
+        }
+
+    def start(self) -> "MockServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, key: str, amount: int = 1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def roll(self, rate: float) -> bool:
+        with self.rng_lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def response_text(self, profile: ProviderProfile, model: str) -> str:
+        """JSON ratings for a model, or malformed content at the profile's rate"""
+        with self.rng_lock:
+            rng = random.Random(f"{model}:{self.rng.random()}")
+            picks = rng.sample(ITEM_POOL, min(profile.items, len(ITEM_POOL)))
+            picks += [(f"Item {i}", "object") for i in range(len(picks), profile.items)]
+            malformed = profile.malformed_rate > 0 and self.rng.random() < profile.malformed_rate
+        text = json.dumps({"items": [{"name": name, "type": kind, "rating": rng.randint(20, 100)}
+                                     for name, kind in picks]}, indent=1)
+        if malformed:
+            self.count("malformed")
+            # Half the time cut off mid-object, half the time prose with no JSON at all
+            return text[:len(text) // 2] if rng.random() < 0.5 else "I'm not able to rate these items. " * 8
+        return text
+
+def _handler(server: MockServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        # ---- plumbing ----
+
+        def send_json(self, obj: Any, status: int = 200, headers: Optional[Dict[str, str]] = None,
+                      raw: Optional[bytes] = None, content_type: str = 'application/json'):
+            data = raw if raw is not None else json.dumps(obj).encode()
+            self.send_response(status)
+            self.send_header('content-type', content_type)
+            self.send_header('content-length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_events(self, events: List[str], profile: ProviderProfile, headers: Dict[str, str]):
+            self.send_response(200)
+            self.send_header('content-type', 'text/event-stream')
+            self.send_header('transfer-encoding', 'chunked')
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            try:
+                for event in events:
+                    data = event.encode()
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                    self.wfile.flush()
+                    if profile.chunk_delay:
+                        time.sleep(profile.chunk_delay)
+                self.wfile.write(b'0\r\n\r\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                server.count("aborted")
+                self.close_connection = True
+
+        def read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get('content-length') or 0))
+
+        def route(self) -> Tuple[str, str]:
+            """(provider, rest of the path) from /{provider}/..."""
+            _, provider, rest = (self.path.split('?')[0] + '/').split('/', 2)
+            return provider, '/' + rest.rstrip('/')
+
+        def gate(self, provider: str, profile: ProviderProfile) -> Optional[Dict[str, str]]:
+            """Apply latency, rate limits and error injection; rate-limit headers, or None if answered"""
+            server.count(f"{provider}.requests")
+            headers: Dict[str, str] = {}
+            limited, wait = server.roll(profile.rate_limit_rate), 1.0
+            if profile.rpm:
+                admitted, wait, remaining = server.windows[provider].admit(profile.rpm)
+                limited = limited or not admitted
+                reset = datetime.now(timezone.utc) + timedelta(seconds=wait)
+                if provider == "anthropic":
+                    headers = {"anthropic-ratelimit-requests-limit": str(int(profile.rpm)),
+                               "anthropic-ratelimit-requests-remaining": str(remaining),
+                               "anthropic-ratelimit-requests-reset": reset.isoformat().replace('+00:00', 'Z')}
+                else:
+                    headers = {"x-ratelimit-limit-requests": str(int(profile.rpm)),
+                               "x-ratelimit-remaining-requests": str(remaining),
+                               "x-ratelimit-reset-requests": f"{wait:.3f}s"}
+            if limited:
+                server.count(f"{provider}.429")
+                self.send_json({"error": {"type": "rate_limit_error", "message": "Rate limit exceeded"}}, 429,
+                               {"retry-after": f"{max(wait, 0.001):.3f}", **headers})
+                return None
+            time.sleep(profile.sample_latency(server.rng))
+            if server.roll(profile.error_rate):
+                status = server.rng.choice([500, 502, 503])
+                server.count(f"{provider}.{status}")
+                self.send_json({"error": {"type": "server_error", "message": "Injected failure"}}, status)
+                return None
+            return headers
+
+        # ---- endpoints ----
+
+        def do_POST(self):
+            provider, rest = self.route()
+            if provider not in server.profile.providers:
+                return self.send_json({"error": f"unknown provider {provider!r}"}, 404)
+            profile = server.profile.providers[provider]
+            raw = self.read_body()
+            if rest == '/v1/files' and provider == "openai":
+                return self.upload_file(raw)
+            if rest == '/v1/batches' and provider == "openai":
+                return self.create_openai_batch(json.loads(raw))
+            if rest == '/v1/messages/batches' and provider == "anthropic":
+                return self.create_anthropic_batch(json.loads(raw))
+            body = json.loads(raw or b'{}')
+            headers = self.gate(provider, profile)
+            if headers is None:
+                return
+            if provider == "anthropic" and rest == '/v1/messages':
+                return self.anthropic_messages(body, profile, headers)
+            if provider == "google" and ':' in rest:
+                model, _, method = rest.rpartition('/')[2].partition(':')
+                return self.google_generate(model, method, body, profile, headers)
+            if rest.endswith('/chat/completions'):
+                return self.chat_completions(provider, body, profile, headers)
+            self.send_json({"error": f"no such endpoint {rest}"}, 404)
+
+        def do_GET(self):
+            provider, rest = self.route()
+            match = re.fullmatch(r'/v1/files/([^/]+)/content', rest)
+            if match and match.group(1) in server.files:
+                return self.send_json(None, raw=server.files[match.group(1)], content_type='application/octet-stream')
+            match = re.fullmatch(r'/v1/(?:messages/)?batches/([^/]+)(/results)?', rest)
+            if match and match.group(1) in server.batches:
+                batch = server.batches[match.group(1)]
+                if match.group(2):
+                    return self.send_json(None, raw=batch["results"], content_type='application/binary')
+                batch["polls"] += 1
+                return self.send_json(self.batch_status(match.group(1)))
+            self.send_json({"error": "not found"}, 404)
+
+        def think(self, profile: ProviderProfile, budget: Optional[int] = None) -> int:
+            """Spend the reasoning tokens a call is allowed (budget None or -1: unconstrained)"""
+            tokens = profile.thinking_tokens if budget is None or budget < 0 else min(budget, profile.thinking_tokens)
+            time.sleep(tokens / 1000 * profile.thinking_time)
+            return tokens
+
+        def chat_completions(self, provider: str, body: Dict[str, Any], profile: ProviderProfile,
+                             headers: Dict[str, str]):
+            model = body.get("model", "")
+            text = server.response_text(profile, model)
+            reasoning = provider == "deepseek" and "reasoner" in model
+            thought = self.think(profile) if reasoning else 0
+            usage = {"prompt_tokens": 1200, "completion_tokens": len(text) // 4 + thought,
+                     "total_tokens": 1200 + len(text) // 4 + thought,
+                     "prompt_tokens_details": {"cached_tokens": 1024 if body.get("prompt_cache_key") else 0}}
+            if reasoning:
+                usage["completion_tokens_details"] = {"reasoning_tokens": thought}
+                usage["prompt_cache_hit_tokens"] = 1024
+            server.count(f"{provider}.ok")
+            if not body.get("stream"):
+                return self.send_json({"id": "mock", "object": "chat.completion", "created": int(time.time()),
+                                       "model": model, "usage": usage, "choices": [{
+                                           "index": 0, "finish_reason": "stop",
+                                           "message": {"role": "assistant", "content": text}}]}, headers=headers)
+
+            def chunk(delta: Dict[str, Any], finish: Optional[str] = None, **extra: Any) -> str:
+                return "data: " + json.dumps({"id": "mock", "object": "chat.completion.chunk", "created": 0,
+                                              "model": model, "choices": [{"index": 0, "delta": delta,
+                                                                           "finish_reason": finish, **extra}]}) + "\n\n"
+            events = []
+            if reasoning:
+                events.append(": keep-alive\n\n")
+                events += [chunk({"reasoning_content": "Considering the items. "}) for _ in range(5)]
+            size = max(1, profile.chunk_size)
+            events += [chunk({"content": text[i:i + size]}) for i in range(0, len(text), size)]
+            if provider == "moonshot":
+                events.append(chunk({}, "stop", usage=usage))
+            else:
+                events.append(chunk({}, "stop"))
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    events.append("data: " + json.dumps({"id": "mock", "object": "chat.completion.chunk",
+                                                         "created": 0, "model": model, "choices": [],
+                                                         "usage": usage}) + "\n\n")
+            events.append("data: [DONE]\n\n")
+            self.send_events(events, profile, headers)
+
+        def anthropic_messages(self, body: Dict[str, Any], profile: ProviderProfile, headers: Dict[str, str]):
+            model = body.get("model", "")
+            text = server.response_text(profile, model)
+            content = (body.get("messages") or [{}])[0].get("content")
+            cache_marked = isinstance(content, list) and any(block.get("cache_control") for block in content)
+            thinking = (body.get("thinking") or {}).get("type") == "enabled"
+            if thinking and "temperature" in body and body["temperature"] != 1:
+                return self.send_json({"type": "error", "error": {
+                    "type": "invalid_request_error",
+                    "message": "temperature may only be set to 1 when thinking is enabled"}}, 400)
+            # Thinking tokens are billed as output; the usage doesn't break them out
+            thought = self.think(profile, body["thinking"]["budget_tokens"]) if thinking else 0
+            usage = {"input_tokens": 40 if cache_marked else 1240, "output_tokens": len(text) // 4 + thought,
+                     "cache_read_input_tokens": 1200 if cache_marked else 0, "cache_creation_input_tokens": 0}
+            server.count("anthropic.ok")
+            message = {"id": "msg_mock", "type": "message", "role": "assistant", "model": model,
+                       "stop_reason": "end_turn", "stop_sequence": None}
+            blocks = [{"type": "thinking", "thinking": "Considering the items. ", "signature": "mock"}] if thinking else []
+            if not body.get("stream"):
+                return self.send_json({**message, "content": blocks + [{"type": "text", "text": text}],
+                                       "usage": usage}, headers=headers)
+
+            def event(kind: str, data: Dict[str, Any]) -> str:
+                return f"event: {kind}\ndata: {json.dumps({'type': kind, **data})}\n\n"
+            size = max(1, profile.chunk_size)
+            events = [event("message_start", {"message": {**message, "content": [], "stop_reason": None,
+                                                          "usage": {**usage, "output_tokens": 1}}})]
+            if thinking:
+                events += [event("content_block_start", {"index": 0, "content_block": {"type": "thinking",
+                                                                                       "thinking": ""}}),
+                           event("content_block_delta", {"index": 0, "delta": {"type": "thinking_delta",
+                                                                               "thinking": blocks[0]["thinking"]}}),
+                           event("content_block_delta", {"index": 0, "delta": {"type": "signature_delta",
+                                                                               "signature": "mock"}}),
+                           event("content_block_stop", {"index": 0})]
+            index = len(blocks)
+            events.append(event("content_block_start", {"index": index, "content_block": {"type": "text",
+                                                                                          "text": ""}}))
+            events += [event("content_block_delta", {"index": index, "delta": {"type": "text_delta",
+                                                                               "text": text[i:i + size]}})
+                       for i in range(0, len(text), size)]
+            events += [event("content_block_stop", {"index": index}),
+                       event("message_delta", {"delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                               "usage": {"output_tokens": usage["output_tokens"]}}),
+                       event("message_stop", {})]
+            self.send_events(events, profile, headers)
+
+        def google_generate(self, model: str, method: str, body: Dict[str, Any], profile: ProviderProfile,
+                            headers: Dict[str, str]):
+            # Gemini fences its JSON; the runner's extractor strips the fence
+            text = "```json\n" + server.response_text(profile, model) + "\n```"
+            # Some google-genai versions send the budget in snake_case
+            thinking_config = (body.get("generationConfig") or {}).get("thinkingConfig") or {}
+            thought = self.think(profile, thinking_config.get("thinkingBudget", thinking_config.get("thinking_budget")))
+            server.count("google.ok")
+
+            def response(part: str, index: int) -> Dict[str, Any]:
+                return {"candidates": [{"content": {"role": "model", "parts": [{"text": part}]}, "index": 0}],
+                        "usageMetadata": {"promptTokenCount": 1200, "candidatesTokenCount": index + 1,
+                                          "thoughtsTokenCount": thought, "cachedContentTokenCount": 0}}
+            if method == "generateContent":
+                return self.send_json(response(text, len(text) // 4), headers=headers)
+            size = max(1, profile.chunk_size)
+            parts = [text[i:i + size] for i in range(0, len(text), size)]
+            self.send_events([f"data: {json.dumps(response(part, i))}\r\n\r\n" for i, part in enumerate(parts)],
+                             profile, headers)
+
+        # ---- batch APIs ----
+
+        def upload_file(self, raw: bytes):
+            boundary = re.search(r'boundary=([^;]+)', self.headers.get('content-type', ''))
+            content = raw
+            if boundary:
+                for part in raw.split(b'--' + boundary.group(1).strip('"').encode()):
+                    head, _, payload = part.partition(b'\r\n\r\n')
+                    if b'filename=' in head:
+                        content = payload.rsplit(b'\r\n', 1)[0]
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            server.files[file_id] = content
+            self.send_json({"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                            "filename": "batch.jsonl", "purpose": "batch", "status": "processed"})
+
+        def create_openai_batch(self, body: Dict[str, Any]):
+            lines = [json.loads(line) for line in server.files[body["input_file_id"]].splitlines() if line.strip()]
+            profile = server.profile.providers["openai"]
+            results = []
+            for line in lines:
+                text = server.response_text(profile, line["body"]["model"])
+                results.append({"id": "r", "custom_id": line["custom_id"], "error": None, "response": {
+                    "status_code": 200, "request_id": "mock", "body": {
+                        "id": "mock", "object": "chat.completion", "created": 0, "model": line["body"]["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": text}}],
+                        "usage": {"prompt_tokens": 1200, "completion_tokens": len(text) // 4,
+                                  "total_tokens": 1200 + len(text) // 4}}}})
+            output_id = f"file-{uuid.uuid4().hex[:12]}"
+            server.files[output_id] = ''.join(json.dumps(r) + '\n' for r in results).encode()
+            batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+            server.batches[batch_id] = {"kind": "openai", "polls": 0, "count": len(lines),
+                                        "input": body["input_file_id"], "output": output_id}
+            server.count("openai.batches")
+            self.send_json(self.batch_status(batch_id))
+
+        def create_anthropic_batch(self, body: Dict[str, Any]):
+            profile = server.profile.providers["anthropic"]
+            lines = []
+            for request in body["requests"]:
+                text = server.response_text(profile, request["params"]["model"])
+                lines.append(json.dumps({"custom_id": request["custom_id"], "result": {"type": "succeeded", "message": {
+                    "id": "msg_mock", "type": "message", "role": "assistant", "model": request["params"]["model"],
+                    "content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "stop_sequence": None,
+                    "usage": {"input_tokens": 1200, "output_tokens": len(text) // 4}}}}) + '\n')
+            batch_id = f"msgbatch_{uuid.uuid4().hex[:12]}"
+            server.batches[batch_id] = {"kind": "anthropic", "polls": 0, "count": len(lines),
+                                        "results": ''.join(lines).encode()}
+            server.count("anthropic.batches")
+            self.send_json(self.batch_status(batch_id))
+
+        def batch_status(self, batch_id: str) -> Dict[str, Any]:
+            batch = server.batches[batch_id]
+            done, count = batch["polls"] >= server.profile.batch_polls, batch["count"]
+            if batch["kind"] == "openai":
+                return {"id": batch_id, "object": "batch", "endpoint": "/v1/chat/completions", "errors": None,
+                        "input_file_id": batch["input"], "completion_window": "24h", "created_at": 0,
+                        "status": "completed" if done else "in_progress",
+                        "output_file_id": batch["output"] if done else None, "error_file_id": None,
+                        "request_counts": {"total": count, "completed": count if done else 0, "failed": 0}}
+            return {"id": batch_id, "type": "message_batch", "processing_status": "ended" if done else "in_progress",
+                    "created_at": "2025-01-01T00:00:00Z", "expires_at": "2025-01-02T00:00:00Z",
+                    "archived_at": None, "cancel_initiated_at": None,
+                    "ended_at": "2025-01-01T01:00:00Z" if done else None,
+                    "request_counts": {"processing": 0 if done else count, "succeeded": count if done else 0,
+                                       "errored": 0, "canceled": 0, "expired": 0},
+                    "results_url": f"{server.url}/anthropic/v1/messages/batches/{batch_id}/results" if done else None}
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock provider APIs for the research runner")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--profile', help="JSON profile with latency, rate limits and failure injection")
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help="command to run against the mock (after --); without one, serve until interrupted")
+    args = parser.parse_args()
+    profile = MockProfile.load(args.profile) if args.profile else MockProfile()
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+
+    with MockServer(profile, port=args.port) as server:
+        if command:
+            code = subprocess.call(command, env={**os.environ, **server.env()})
+            print(json.dumps(dict(server.stats), indent=1, sort_keys=True), file=sys.stderr)
+            sys.exit(code)
+        print(f"Mock providers listening on {server.url}; point the runner at them with:")
+        for key, value in server.env().items():
+            print(f"export {key}={value}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Import-time and CLI startup benchmark for the research runner.
+
+Each measurement runs in a fresh interpreter, so nothing is warm in
+sys.modules. Reports:
+- the cumulative import time of the runner's modules and the provider SDKs,
+  from `python -X importtime` (best of --repeat runs);
+- the wall time of `python -m research status` over a bare interpreter start,
+  which must stay under --budget-ms (100 ms by default);
+- any heavy module (SDKs, requests, asyncio) that `status` pulled in.
+
+Run it from the repository root, against a data/ directory to measure:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --data-dir /path/to/complete/data --budget-ms 100
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "research.cli",
+    "research.sweep",
+    "run_status_research",
+    "requests",
+    "openai",
+    "anthropic",
+    "google.genai",
+]
+
+# Nothing `status` does needs these
+HEAVY_MODULES = ["asyncio", "requests", "urllib3", "httpx", "openai", "anthropic", "google.genai",
+                 "run_status_research"]
+
+def run_python(args: List[str], cwd: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+
+def import_time_ms(module: str, cwd: str) -> float:
+    """Cumulative import time of `module` in microseconds -> milliseconds, or -1 if it isn't installed"""
+    result = run_python(["-X", "importtime", "-c", f"import {module}"], cwd)
+    if result.returncode != 0:
+        return -1.0
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    return -1.0
+
+def wall_time_ms(args: List[str], cwd: str) -> float:
+    started = time.perf_counter()
+    run_python(args, cwd)
+    return (time.perf_counter() - started) * 1000
+
+def best_of(repeat: int, measure) -> float:
+    return min(measure() for _ in range(repeat))
+
+def loaded_heavy_modules(spec: str, data_dir: str, cwd: str) -> List[str]:
+    """Heavy modules in sys.modules after running `status` in-process"""
+    code = ("import sys, io, contextlib\n"
+            "from research.cli import show_status\n"
+            "with contextlib.redirect_stdout(io.StringIO()):\n"
+            f"    show_status({spec!r}, {data_dir!r})\n"
+            f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n")
+    return run_python(["-c", code], cwd).stdout.split()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import times and `status` startup")
+    parser.add_argument('--spec', default='sweep.json')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement (the best is reported)")
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help="maximum `status` time over a bare interpreter start")
+    args = parser.parse_args()
+    cwd = os.getcwd()
+
+    print("Import time (cumulative, best of %d):" % args.repeat)
+    times: Dict[str, float] = {}
+    for module in MODULES:
+        times[module] = best_of(args.repeat, lambda: import_time_ms(module, cwd))
+        shown = "not installed" if times[module] < 0 else f"{times[module]:7.1f} ms"
+        print(f"  {module:<22} {shown}")
+
+    baseline = best_of(args.repeat, lambda: wall_time_ms(["-c", "pass"], cwd))
+    status = best_of(args.repeat, lambda: wall_time_ms(
+        ["-m", "research", "status", "--spec", args.spec, "--data-dir", args.data_dir], cwd))
+    overhead = status - baseline
+    print(f"\n`python -m research status`: {status:.0f} ms wall, interpreter start {baseline:.0f} ms, "
+          f"status itself {overhead:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    heavy = loaded_heavy_modules(args.spec, args.data_dir, cwd)
+    if heavy:
+        print(f"status imported heavy modules: {', '.join(heavy)}")
+    if overhead > args.budget_ms or heavy:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Performance benchmark suite for the research runner.
+
+Four benchmarks, none of which needs API keys or the network:
+- throughput: a full `run_status_research.py --async` sweep in a scratch
+  directory against the local mock providers (benchmarks/mockserver.py), once
+  with clean responses and once with latency jitter and injected 429s, 5xx
+  errors and malformed JSON. Reports jobs per second and what the mock saw.
+- distributed: the same kind of sweep through `--coordinator` with 1, 2 and 4
+  local `--worker` processes at a fixed per-worker concurrency, to show how
+  throughput scales with workers. Each worker's start-up (SDK imports and
+  clients, a few CPU seconds) is included, so on a machine with fewer cores
+  than workers the speedup falls short of linear.
+- parse: cost per response of extract_items() for clean, fenced, prose-wrapped,
+  long and malformed responses.
+- resume: the cost of deciding what is left to run over a data/ directory of
+  30 up to 100k saved results: indexing it into a fresh run ledger (cold), then
+  reloading the ledger and planning the sweep (warm, the normal resume path).
+
+Each run is saved to benchmarks/results/{timestamp}.json. With --compare the
+run is checked against an earlier one (the latest by default) and every metric
+more than --threshold worse is reported, with a non-zero exit:
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --only parse resume --sizes 30 1000 --compare
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, ROOT)
+
+from benchmarks.mockserver import ITEM_POOL, MockProfile, MockServer  # noqa: E402
+from research.extract import ResponseParseError, extract_items  # noqa: E402
+from research.ledger import RunLedger  # noqa: E402
+from research.store import ResultStore  # noqa: E402
+from research.sweep import ModelConfig, SweepSpec, done_checker, plan_sweep  # noqa: E402
+
+DEFAULT_SIZES = [30, 1000, 10000, 100000]
+# Above this many results, the synthetic data/ uses the replicate store rather than one file per result
+FILE_LAYOUT_MAX = 1000
+
+PROVIDERS = ["openai", "anthropic", "google", "xai", "moonshot", "deepseek"]
+API_NAMES = {"openai": "gpt-4.1", "anthropic": "claude-sonnet-4-20250514", "google": "gemini-2.5-pro",
+             "xai": "grok-4", "moonshot": "kimi-k2-0711-preview", "deepseek": "deepseek-reasoner"}
+
+# Failure injection for the "flaky" throughput run; the "clean" run uses MockProfile defaults
+FLAKY_PROFILE = {"default": {"latency": 0.2, "latency_sigma": 0.6, "rate_limit_rate": 0.05,
+                             "error_rate": 0.05, "malformed_rate": 0.05}, "seed": 7}
+
+# Slow enough calls that the distributed sweep is bound by in-flight slots, not by the runner
+DISTRIBUTED_PROFILE = {"default": {"latency": 1.0}, "seed": 11}
+DISTRIBUTED_TEMPERATURES = [round(0.1 * i, 1) for i in range(1, 13)]
+
+# Metrics where a larger value is better; everything else (times) should go down
+HIGHER_IS_BETTER = ("jobs_per_sec",)
+
+def timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    return min(timed(fn) for _ in range(repeat))
+
+def sample_items(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    picks = [ITEM_POOL[rng.randrange(len(ITEM_POOL))] for _ in range(count)]
+    return [{"name": name, "type": kind, "rating": rng.randint(1, 100)} for name, kind in picks]
+
+# ---- throughput ----
+
+def throughput(name: str, profile: MockProfile, models_per_provider: int, temperatures: List[float],
+               concurrency: int, workers: int = 0) -> Dict[str, Any]:
+    """One async sweep against the mock in a scratch directory (with `workers`, a distributed one)"""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    try:
+        shutil.copy(os.path.join(ROOT, 'prompt.md'), workdir)
+        models = [{"name": f"{provider}-{i}", "api_name": API_NAMES[provider], "provider": provider}
+                  for provider in PROVIDERS for i in range(models_per_provider)]
+        spec = {"temperatures": temperatures, "replicates": 1, "models": models,
+                "providers": {p: {"max_temperature": 2.0, "concurrency": concurrency} for p in PROVIDERS}}
+        with open(os.path.join(workdir, 'sweep.json'), 'w', encoding='utf-8') as f:
+            json.dump(spec, f)
+        # No client-side rate limits or response cache: measure the runner, not its pacing
+        mode = ['--coordinator', f'--local-workers={workers}', '--fixed-concurrency'] if workers else ['--async']
+        command = [sys.executable, os.path.join(ROOT, 'run_status_research.py'), *mode, '--cache', 'off',
+                   *[f"--rate-limit={p}=" for p in PROVIDERS]]
+        with MockServer(profile) as server:
+            env = {**os.environ, **server.env(), "PYTHONPATH": ROOT}
+            started = time.perf_counter()
+            result = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+            elapsed = time.perf_counter() - started
+            stats = dict(server.stats)
+        if result.returncode != 0:
+            raise RuntimeError(f"{name} sweep failed:\n{result.stderr[-2000:]}")
+        jobs = len(models) * len(temperatures)
+        saved = len(glob.glob(os.path.join(workdir, 'data', '*.json')))
+        return {"jobs": jobs, "saved": saved, "seconds": round(elapsed, 3),
+                "jobs_per_sec": round(saved / elapsed, 2),
+                "requests": sum(v for k, v in stats.items() if k.endswith('.requests')),
+                "rate_limited": sum(v for k, v in stats.items() if k.endswith('.429')),
+                "server_errors": sum(v for k, v in stats.items() if k.endswith(('.500', '.502', '.503'))),
+                "malformed": stats.get("malformed", 0)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# ---- parse ----
+
+def parse_cases(rng: random.Random) -> Dict[str, str]:
+    clean = json.dumps({"items": sample_items(rng, 25)}, indent=2)
+    return {
+        "clean": clean,
+        "fenced": f"```json\n{clean}\n```",
+        "prose": f"Here are my ratings of each item, on a scale of 1 to 100:\n\n{clean}\n\nLet me know if you "
+                 f"need anything else.",
+        "long": json.dumps({"items": sample_items(rng, 500)}, indent=2),
+        "truncated": clean[:len(clean) // 2],
+        "no_json": "I'm sorry, but I can't provide ratings for these items. " * 10,
+    }
+
+def parse_cost(rng: random.Random, repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name, text in parse_cases(rng).items():
+        def run():
+            try:
+                extract_items(text)
+            except ResponseParseError:
+                pass
+        run()
+        iterations = max(1, int(0.05 / max(timed(run), 1e-6)))
+        per_call = best_of(repeat, lambda: [run() for _ in range(iterations)]) / iterations
+        results[name] = {"bytes": len(text), "us_per_response": round(per_call * 1e6, 1),
+                         "mb_per_sec": round(len(text) / per_call / 1e6, 2)}
+    return results
+
+# ---- resume ----
+
+def write_data_dir(data_dir: str, size: int, rng: random.Random) -> SweepSpec:
+    """A data/ directory with `size` saved results, and the spec that produced it"""
+    temperatures = [0.2, 0.7, 1.0, 1.2]
+    if size <= FILE_LAYOUT_MAX:
+        replicates = 1
+        models = [ModelConfig(f"model-{i}", f"model-{i}", "openai") for i in range(-(-size // len(temperatures)))]
+    else:
+        replicates = 50
+        models = [ModelConfig(f"model-{i}", f"model-{i}", "openai")
+                  for i in range(-(-size // (len(temperatures) * replicates)))]
+    spec = SweepSpec(models=models, temperatures=temperatures, replicates=replicates,
+                     providers={"openai": {"max_temperature": 2.0}})
+    os.makedirs(data_dir, exist_ok=True)
+    store = ResultStore(os.path.join(data_dir, 'replicates'), fsync_every=10 ** 9) if replicates > 1 else None
+    written = 0
+    for config in models:
+        for temperature in temperatures:
+            for replicate in range(replicates):
+                if written == size:
+                    break
+                items = sample_items(rng, 25)
+                if store is None:
+                    with open(os.path.join(data_dir, f"{config.name}_{temperature}.json"), 'w',
+                              encoding='utf-8') as f:
+                        json.dump({"items": items}, f, indent=2)
+                else:
+                    store.append({"model": config.name, "provider": "openai", "temperature": temperature,
+                                  "replicate": replicate, "items": items})
+                written += 1
+    if store is not None:
+        store.close()
+    return spec
+
+def resume_cost(size: int, rng: random.Random, repeat: int) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="bench-resume-")
+    try:
+        data_dir = os.path.join(workdir, 'data')
+        spec = write_data_dir(data_dir, size, rng)
+        ledger_path = os.path.join(data_dir, 'runs.jsonl')
+        prompts = {"default": "prompt"}
+
+        def plan() -> int:
+            ledger = RunLedger(ledger_path)
+            done = plan_sweep(spec, prompts, done_checker(spec, list(prompts), ledger)).done
+            ledger.close()
+            return done
+
+        def cold():
+            if os.path.exists(ledger_path):
+                os.remove(ledger_path)
+            plan()
+
+        cold_seconds = best_of(repeat, cold)
+        warm_seconds = best_of(repeat, plan)
+        done = plan()
+        if done != size:
+            raise RuntimeError(f"resume over {size} results found only {done} done")
+        return {"layout": "replicates" if spec.multi_sample() else "file", "cold_ms": round(cold_seconds * 1000, 2),
+                "warm_ms": round(warm_seconds * 1000, 2),
+                "warm_us_per_result": round(warm_seconds / size * 1e6, 2)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# ---- results ----
+
+def git_commit() -> Optional[str]:
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+def flatten(prefix: str, value: Any, out: Dict[str, float]):
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            flatten(f"{prefix}.{key}" if prefix else key, inner, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+
+def is_tracked(metric: str) -> bool:
+    """Timings and throughput are compared; counts (bytes, jobs, injected failures) are context"""
+    return metric.rsplit('.', 1)[-1] in ("seconds", "us_per_response", "cold_ms", "warm_ms",
+                                         "warm_us_per_result", *HIGHER_IS_BETTER)
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Metrics at least `threshold` (a fraction) worse than the baseline"""
+    now: Dict[str, float] = {}
+    before: Dict[str, float] = {}
+    flatten("", current["benchmarks"], now)
+    flatten("", baseline["benchmarks"], before)
+    regressions = []
+    for metric, value in sorted(now.items()):
+        old = before.get(metric)
+        if not is_tracked(metric) or not old or not value:
+            continue
+        worse = old / value if metric.endswith(HIGHER_IS_BETTER) else value / old
+        change = f"{(worse - 1) * 100:.0f}% worse" if worse >= 1 else f"{(1 - worse) * 100:.0f}% better"
+        if worse > 1 + threshold:
+            regressions.append(metric)
+            change += "  <- regression"
+        print(f"  {metric:<44} {old:>12g} -> {value:<12g} ({change})")
+    return regressions
+
+def latest_result(exclude: str) -> Optional[str]:
+    paths = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, '*.json')) if p != exclude)
+    return paths[-1] if paths else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput, parse-cost and resume-cost benchmarks")
+    parser.add_argument('--only', nargs='+', choices=["throughput", "distributed", "parse", "resume"],
+                        default=["throughput", "distributed", "parse", "resume"])
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help="results in the data/ directories the resume benchmark plans over")
+    parser.add_argument('--models-per-provider', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=8, help="per-provider concurrency of the sweep")
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4],
+                        help="local worker processes for the distributed benchmark")
+    parser.add_argument('--worker-concurrency', type=int, default=2,
+                        help="per-provider concurrency of each worker in the distributed benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per timing (the best is kept)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="where to save the results (default benchmarks/results/{timestamp}.json)")
+    parser.add_argument('--compare', nargs='?', const='latest', metavar='RESULTS',
+                        help="compare against a saved run (default: the latest one)")
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    benchmarks: Dict[str, Any] = {}
+    if "throughput" in args.only:
+        temperatures = [0.2, 0.7, 1.0, 1.2]
+        benchmarks["throughput"] = {}
+        for name, profile in [("clean", MockProfile(seed=args.seed)), ("flaky", MockProfile.from_dict(FLAKY_PROFILE))]:
+            print(f"throughput/{name}: sweeping {args.models_per_provider * len(PROVIDERS) * len(temperatures)} "
+                  f"jobs against the mock...", flush=True)
+            benchmarks["throughput"][name] = result = throughput(name, profile, args.models_per_provider,
+                                                                 temperatures, args.concurrency)
+            print(f"  {result['saved']}/{result['jobs']} saved in {result['seconds']:.1f}s "
+                  f"({result['jobs_per_sec']:.1f} jobs/s); {result['requests']} requests, "
+                  f"{result['rate_limited']} 429s, {result['server_errors']} 5xx, {result['malformed']} malformed")
+    if "distributed" in args.only:
+        jobs = args.models_per_provider * len(PROVIDERS) * len(DISTRIBUTED_TEMPERATURES)
+        benchmarks["distributed"] = {}
+        for workers in args.workers:
+            print(f"distributed/{workers}: sweeping {jobs} jobs through {workers} worker(s)...", flush=True)
+            benchmarks["distributed"][str(workers)] = result = throughput(
+                f"workers{workers}", MockProfile.from_dict(DISTRIBUTED_PROFILE), args.models_per_provider,
+                DISTRIBUTED_TEMPERATURES, args.worker_concurrency, workers)
+            single = benchmarks["distributed"].get(str(min(args.workers)))
+            result["speedup"] = round(result["jobs_per_sec"] / single["jobs_per_sec"], 2)
+            print(f"  {result['saved']}/{result['jobs']} saved in {result['seconds']:.1f}s "
+                  f"({result['jobs_per_sec']:.1f} jobs/s, {result['speedup']:.2f}x {min(args.workers)} worker(s))")
+    if "parse" in args.only:
+        print("parse: extract_items() per response", flush=True)
+        benchmarks["parse"] = parse_cost(rng, args.repeat)
+        for name, result in benchmarks["parse"].items():
+            print(f"  {name:<10} {result['bytes']:>7} bytes {result['us_per_response']:>10.1f} us "
+                  f"{result['mb_per_sec']:>8.1f} MB/s")
+    if "resume" in args.only:
+        print("resume: ledger index (cold) and reload + plan (warm)", flush=True)
+        benchmarks["resume"] = {}
+        for size in args.sizes:
+            benchmarks["resume"][str(size)] = result = resume_cost(size, rng, args.repeat)
+            print(f"  {size:>7} results ({result['layout']}): cold {result['cold_ms']:.1f} ms, "
+                  f"warm {result['warm_ms']:.1f} ms ({result['warm_us_per_result']:.1f} us/result)")
+
+    run = {"timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'), "commit": git_commit(),
+           "python": platform.python_version(), "machine": platform.machine(), "args": vars(args),
+           "benchmarks": benchmarks}
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f"Saved results to {output}")
+
+    if args.compare:
+        baseline_path = latest_result(output) if args.compare == 'latest' else args.compare
+        if not baseline_path:
+            print("No earlier results to compare against")
+            return
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline_path} ({baseline.get('commit')}):")
+        regressions = compare(run, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Supporting modules for the Status LLMs research runner (run_status_research.py).
+"""
@@ -0,0 +1,5 @@
+"""Run the research CLI: python -m research {status,plan,run,export}"""
+
+from research.cli import main
+
+main()
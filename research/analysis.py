@@ -0,0 +1,195 @@
+"""
+Cross-model statistics over the collected Status LLMs ratings.
+
+Works on the flat ratings table from research.export (one row per rated item),
+loaded into pandas/NumPy. Every statistic is computed with array operations over
+all items at once (group codes, bincount, einsum) rather than Python loops over
+items, so it keeps up with thousands of replicates.
+
+Usage:
+    python -m research.analysis                  # summary tables for data/
+    python -m research.analysis --key normalized_name --bootstrap 2000   # exact names instead of entities
+"""
+
+import os
+import logging
+import argparse
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+def _require_numpy_pandas():
+    try:
+        import numpy
+        import pandas
+        return numpy, pandas
+    except ImportError:
+        raise ImportError("Analysis needs numpy and pandas: pip install numpy pandas")
+
+def load_ratings(path: Optional[str] = None, data_dir: str = 'data', canonicalize: bool = True,
+                 prompt_id: Optional[str] = 'default'):
+    """Ratings as a DataFrame, from an exported table or by (incrementally) exporting data_dir.
+
+    Only `prompt_id`'s ratings are kept (None keeps every prompt), so variants don't mix with the default prompt.
+    """
+    _require_numpy_pandas()
+    from research.export import ColumnarExporter, read_ratings
+    if path:
+        table = read_ratings(path)
+    else:
+        exporter = ColumnarExporter(data_dir)
+        exporter.update()
+        table = exporter.table()
+    df = table.to_pandas().dropna(subset=["rating"])
+    if prompt_id is not None and "prompt_id" in df:
+        df = df[df["prompt_id"] == prompt_id]
+    if canonicalize:
+        add_entities(df, os.path.join(data_dir, '.canonical', 'aliases.json'))
+    return df
+
+def add_entities(df, alias_path: str):
+    """Add entity_id/entity columns mapping each item name to its canonical entity"""
+    np, pd = _require_numpy_pandas()
+    from research.canonical import AliasTable
+
+    aliases = AliasTable.load(alias_path)
+    names = df["name"].astype("category")
+    # Resolve each distinct name once, then broadcast through the category codes
+    ids = aliases.resolve_all(names.cat.categories)
+    aliases.save(alias_path)
+    category_ids = np.fromiter((ids[name] for name in names.cat.categories), dtype=np.int64,
+                               count=len(names.cat.categories))
+    entity_ids = category_ids[names.cat.codes.to_numpy()]
+    df["entity_id"] = entity_ids
+    labels = np.array(aliases.labels, dtype=object)
+    df["entity"] = pd.Categorical(labels[entity_ids])
+
+def rating_distributions(df, by: Sequence[str] = ("model", "temperature"), bins: int = 10):
+    """Summary statistics and a histogram of ratings (1-100, `bins` equal bins) per group"""
+    np, pd = _require_numpy_pandas()
+    by = list(by)
+    grouped = df.groupby(by, observed=True)["rating"]
+    summary = grouped.agg(["count", "mean", "std", "min", "median", "max"])
+    summary["p10"] = grouped.quantile(0.10)
+    summary["p90"] = grouped.quantile(0.90)
+
+    codes, uniques = pd.MultiIndex.from_frame(df[by].astype(object)).factorize()
+    edges = np.linspace(1, 100, bins + 1)
+    bin_index = np.clip(np.searchsorted(edges, df["rating"].to_numpy(), side="right") - 1, 0, bins - 1)
+    counts = np.bincount(codes * bins + bin_index, minlength=len(uniques) * bins).reshape(len(uniques), bins)
+    labels = [f"{int(lo)}-{int(hi)}" for lo, hi in zip(edges[:-1], edges[1:])]
+    histogram = pd.DataFrame(counts, index=pd.MultiIndex.from_tuples(list(uniques), names=by), columns=labels)
+    return summary, histogram.loc[summary.index]
+
+def item_matrix(df, key: str = "entity", by: str = "model", min_raters: int = 2):
+    """Mean rating per item (rows) for each model (columns); items rated by fewer than `min_raters` are dropped"""
+    matrix = df.pivot_table(index=key, columns=by, values="rating", aggfunc="mean", observed=True)
+    return matrix[matrix.notna().sum(axis=1) >= min_raters]
+
+def spearman_matrix(matrix, min_periods: int = 5):
+    """Spearman rank correlation between columns over pairwise-complete items"""
+    return matrix.corr(method="spearman", min_periods=min_periods)
+
+def kendall_matrix(matrix, min_periods: int = 5):
+    """Kendall tau-b between columns over pairwise-complete items, vectorized with einsum"""
+    np, pd = _require_numpy_pandas()
+    values = matrix.to_numpy(dtype=np.float64).T            # (models, items)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    # sign[m, i, j] = sign(x_mi - x_mj), zero when either item is missing for model m
+    pair_valid = (valid[:, :, None] & valid[:, None, :]).astype(np.float32)
+    sign = np.sign(filled[:, :, None] - filled[:, None, :]).astype(np.float32) * pair_valid
+    untied = np.abs(sign)
+
+    concordance = np.einsum('aij,bij->ab', sign, sign) / 2          # P - Q over shared pairs
+    untied_a = np.einsum('aij,bij->ab', untied, pair_valid) / 2      # pairs untied in a, valid in b
+    shared = np.einsum('ai,bi->ab', valid.astype(np.float32), valid.astype(np.float32))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = concordance / np.sqrt(untied_a * untied_a.T)
+    tau[shared < min_periods] = np.nan
+    return pd.DataFrame(tau, index=matrix.columns, columns=matrix.columns)
+
+def temperature_sensitivity(df, by: str = "model"):
+    """Mean/std/item diversity per temperature for each model, plus the slope of mean rating vs temperature"""
+    np, pd = _require_numpy_pandas()
+    grouped = df.groupby([by, "temperature"], observed=True)
+    curves = grouped["rating"].agg(["mean", "std", "count"])
+    samples = df.drop_duplicates([by, "temperature", "replicate", "source"]).groupby(
+        [by, "temperature"], observed=True).size()
+    curves["distinct_items"] = grouped["entity" if "entity" in df else "normalized_name"].nunique()
+    curves["distinct_items_per_sample"] = curves["distinct_items"] / samples
+
+    means = curves["mean"].unstack("temperature")
+    temps = means.columns.to_numpy(dtype=np.float64)
+    y = means.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(y)
+    n = mask.sum(axis=1)
+    x = np.where(mask, temps[None, :], 0.0)
+    y0 = np.where(mask, y, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = x.sum(axis=1) / n
+        y_mean = y0.sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        slope = (dx * np.where(mask, y0 - y_mean[:, None], 0.0)).sum(axis=1) / (dx ** 2).sum(axis=1)
+    slopes = pd.Series(np.where(n >= 2, slope, np.nan), index=means.index, name="rating_per_unit_temperature")
+    return curves, slopes
+
+def bootstrap_ci(df, by: Sequence[str] = ("model", "temperature"), n_boot: int = 1000,
+                 confidence: float = 0.95, seed: Optional[int] = 0, chunk: int = 100):
+    """Percentile bootstrap confidence interval of the mean rating per group, all groups resampled at once"""
+    np, pd = _require_numpy_pandas()
+    by = list(by)
+    if df.empty:
+        return pd.DataFrame(columns=["mean", "ci_low", "ci_high", "n"])
+    ordered = df.sort_values(by, kind="stable")
+    ratings = ordered["rating"].to_numpy(dtype=np.float64)
+    codes, uniques = pd.MultiIndex.from_frame(ordered[by].astype(object)).factorize(sort=False)
+    sizes = np.bincount(codes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    row_start = starts[codes]
+    row_size = sizes[codes]
+
+    rng = np.random.default_rng(seed)
+    means = np.empty((n_boot, len(sizes)))
+    for lo in range(0, n_boot, chunk):
+        hi = min(n_boot, lo + chunk)
+        # Each row draws a replacement from its own group: start + floor(u * size)
+        draws = row_start + (rng.random((hi - lo, len(ratings))) * row_size).astype(np.int64)
+        means[lo:hi] = np.add.reduceat(ratings[draws], starts, axis=1) / sizes
+
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(means, [alpha, 1 - alpha], axis=0)
+    index = pd.MultiIndex.from_tuples(list(uniques), names=by)
+    point = np.add.reduceat(ratings, starts) / sizes
+    return pd.DataFrame({"mean": point, "ci_low": lower, "ci_high": upper, "n": sizes}, index=index)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Cross-model statistics over collected ratings")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--input', default=None, help="exported .parquet/.arrow table (default: export data-dir)")
+    parser.add_argument('--key', default='entity',
+                        help="column identifying the same item across models (entity, normalized_name or name)")
+    parser.add_argument('--bootstrap', type=int, default=1000, help="bootstrap resamples for confidence intervals")
+    args = parser.parse_args()
+
+    _, pd = _require_numpy_pandas()
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', 20)
+
+    df = load_ratings(args.input, args.data_dir)
+    logger.info("Loaded %d ratings from %d models", len(df), df["model"].nunique())
+
+    summary, _ = rating_distributions(df)
+    print("\nRating distributions\n", summary.round(2))
+    matrix = item_matrix(df, key=args.key)
+    print(f"\nSpearman rank correlation ({len(matrix)} shared items)\n", spearman_matrix(matrix).round(2))
+    print("\nKendall tau-b\n", kendall_matrix(matrix).round(2))
+    curves, slopes = temperature_sensitivity(df)
+    print("\nTemperature sensitivity\n", curves.round(2))
+    print("\nMean rating change per unit temperature\n", slopes.round(2))
+    print("\nBootstrap 95% CI of mean rating\n", bootstrap_ci(df, n_boot=args.bootstrap).round(2))
+
+if __name__ == "__main__":
+    main()
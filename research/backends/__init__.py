@@ -0,0 +1,109 @@
+"""
+Provider backends for the Status LLMs research runner.
+
+A backend knows how to reach a model and yields its response as text chunks for
+research.streaming to consume. There are three:
+- native: each provider's own SDK or API (OpenAI, Anthropic, google-genai, xAI,
+  Moonshot, DeepSeek);
+- openai-compatible: any /chat/completions endpoint over plain HTTP;
+- aimlapi: the AI/ML API aggregator, one key for every model.
+
+Models pick their backend through routes in sweep.json. A model with several
+routes has its jobs split between them by weight, so a run can use a direct
+endpoint and an aggregator side by side. Each route gets its own rate limiter and
+concurrency limit. Backend modules are imported on first use, and the native
+backend imports each provider SDK only when that provider is actually called.
+"""
+
+import importlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Backend name -> "module:Class", imported when first needed
+BACKEND_CLASSES = {
+    "native": "research.backends.native:NativeBackend",
+    "openai-compatible": "research.backends.openai_compat:OpenAICompatibleBackend",
+    "aimlapi": "research.backends.openai_compat:AIMLAPIBackend",
+}
+
+@dataclass(frozen=True)
+class Route:
+    backend: str = "native"
+    api_name: Optional[str] = None      # model id on this backend (default: the backend's own mapping)
+    endpoint: Optional[str] = None      # base URL override
+    api_key_env: Optional[str] = None   # environment variable holding the key
+    name: Optional[str] = None          # rate-limit/concurrency key (default: provider or backend name)
+    weight: int = 1                     # share of the model's jobs sent this way
+
+    def key(self, provider: str) -> str:
+        """Which rate limiter, retry breaker and concurrency limit this route's calls count against"""
+        if self.name:
+            return self.name
+        return provider if self.backend == "native" else self.backend
+
+DEFAULT_ROUTE = Route()
+
+def weighted_cycle(routes: List[Route]) -> List[Route]:
+    """One period of smooth weighted round-robin, e.g. weights 2:1 -> [a, b, a]"""
+    weights = [max(1, route.weight) for route in routes]
+    total = sum(weights)
+    current = [0] * len(routes)
+    cycle = []
+    for _ in range(total):
+        current = [c + w for c, w in zip(current, weights)]
+        best = max(range(len(routes)), key=lambda i: current[i])
+        current[best] -= total
+        cycle.append(routes[best])
+    return cycle
+
+@dataclass
+class BackendContext:
+    """Process-wide state the backends share with the runner"""
+    limiters: Any                       # research.ratelimit.RateLimiterRegistry
+    clients: Any                        # research.clients.ClientRegistry
+    stream: bool = True                 # stream responses (TTFT, early abort)
+    prompt_caching: bool = True         # mark shared prompt prefixes for provider-side caching
+    structured: bool = False            # constrain output to the items schema where the provider can
+
+class Backend:
+    """Base class: turns (model, prompt, temperature) into a stream of text chunks"""
+
+    name = ""
+
+    def __init__(self, context: BackendContext):
+        self.context = context
+
+    def api_name(self, config: Any, route: Route) -> str:
+        return route.api_name or config.api_name
+
+    def api_key_env(self, config: Any, route: Route) -> str:
+        """Environment variable that must hold the API key for this model on this route"""
+        raise NotImplementedError
+
+    def chunks(self, config: Any, route: Route, prompt: Any, temperature: float,
+               max_tokens: int) -> Iterator[str]:
+        """Response text chunks; `prompt` is a research.prompts.PromptVariant"""
+        raise NotImplementedError
+
+class BackendRegistry:
+    """Instantiates each backend once, importing its module on first use"""
+
+    def __init__(self, context: BackendContext):
+        self.context = context
+        self.backends: Dict[str, Backend] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str) -> Backend:
+        with self.lock:
+            if name not in self.backends:
+                if name not in BACKEND_CLASSES:
+                    raise ValueError(f"Unknown backend {name!r} (expected one of {sorted(BACKEND_CLASSES)})")
+                module_name, _, class_name = BACKEND_CLASSES[name].partition(':')
+                backend_class = getattr(importlib.import_module(module_name), class_name)
+                self.backends[name] = backend_class(self.context)
+                logger.debug("Loaded %s backend", name)
+            return self.backends[name]
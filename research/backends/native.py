@@ -0,0 +1,331 @@
+"""
+Native provider backend: each provider's own SDK or API.
+
+OpenAI and xAI go through the openai SDK, Anthropic through its SDK, Gemini
+through google-genai, and Moonshot and DeepSeek through their OpenAI-compatible
+HTTP APIs. Each SDK is imported the first time its provider is called, so a run
+that never touches Gemini never imports google.genai.
+
+In structured-output mode each provider is held to the items schema
+(research.extract.ITEMS_SCHEMA) through its own mechanism: a strict json_schema
+response_format for OpenAI and xAI, a forced tool call for Anthropic, a
+response_schema for Gemini, and JSON mode for Moonshot and DeepSeek.
+
+A model's reasoning_budget (research.reasoning) becomes Gemini's thinking_budget,
+Anthropic's extended-thinking budget_tokens, or for DeepSeek a budget of 0 a
+call to its non-reasoning endpoint.
+"""
+
+import os
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+from research.backends import Backend, Route
+from research.backends.openai_compat import chat_payload, iter_chat_completions_http, report_openai_usage
+from research.extract import ITEMS_SCHEMA
+from research.metrics import report_usage
+from research.prompts import anthropic_content
+from research.reasoning import effective_api_name
+
+logger = logging.getLogger(__name__)
+
+# Default endpoints for the HTTP-based providers. Any provider can be pointed
+# elsewhere (e.g. a local stub server) with {PROVIDER}_BASE_URL or ModelConfig.endpoint;
+# the OpenAI and Anthropic SDKs also honour OPENAI_BASE_URL / ANTHROPIC_BASE_URL.
+DEFAULT_BASE_URLS = {
+    "xai": "https://api.x.ai/v1",
+    "moonshot": "https://api.moonshot.ai/v1",
+    "deepseek": "https://api.deepseek.com/v1",
+}
+
+# OpenAI/xAI structured outputs: the response must match the schema exactly
+ITEMS_RESPONSE_FORMAT = {"type": "json_schema",
+                         "json_schema": {"name": "status_items", "strict": True, "schema": ITEMS_SCHEMA}}
+
+# Anthropic has no response schema; a forced call to this tool carries the items as its input
+ITEMS_TOOL = {"name": "record_items", "description": "Record the rated status items.", "input_schema": ITEMS_SCHEMA}
+
+API_KEY_ENVS = {
+    "openai": 'OPENAI_API_KEY',
+    "anthropic": 'ANTHROPIC_API_KEY',
+    "google": 'GEMINI_API_KEY',
+    "xai": 'GROK_API_KEY',
+    "moonshot": 'MOONSHOT_API_KEY',
+    "deepseek": 'DEEPSEEK_API_KEY',
+}
+
+class NativeBackend(Backend):
+    """Calls each provider directly with its SDK (or HTTP API for Moonshot and DeepSeek)"""
+
+    name = "native"
+
+    def api_key_env(self, config: Any, route: Route) -> str:
+        return route.api_key_env or API_KEY_ENVS[config.provider]
+
+    def base_url(self, config: Any, route: Route) -> Optional[str]:
+        """Resolve the API base URL for a model (None means the SDK default)"""
+        return (route.endpoint
+                or config.endpoint
+                or os.getenv(f"{config.provider.upper()}_BASE_URL")
+                or DEFAULT_BASE_URLS.get(config.provider))
+
+    def openai_client(self, provider: str, api_key_env: str, base_url: Optional[str]):
+        """Pooled OpenAI SDK client (also used for OpenAI-compatible providers like xAI)"""
+        import openai
+        clients = self.context.clients
+        return clients.get(provider, base_url, lambda stats: openai.OpenAI(
+            api_key=os.getenv(api_key_env), base_url=base_url, max_retries=0,
+            http_client=clients.httpx_client(stats)))
+
+    def anthropic_client(self, base_url: Optional[str]):
+        """Pooled Anthropic SDK client"""
+        from anthropic import Anthropic
+        clients = self.context.clients
+        return clients.get("anthropic", base_url, lambda stats: Anthropic(
+            api_key=os.getenv('ANTHROPIC_API_KEY'), base_url=base_url, max_retries=0,
+            http_client=clients.httpx_client(stats)))
+
+    def google_client(self, base_url: Optional[str]):
+        """Pooled google-genai client (it picks up GEMINI_API_KEY from the environment)"""
+        from google import genai
+        from google.genai import types
+        clients = self.context.clients
+        return clients.get("google", base_url, lambda stats: genai.Client(http_options=types.HttpOptions(
+            base_url=base_url, client_args=clients.httpx_client_args(stats))))
+
+    def chunks(self, config: Any, route: Route, prompt: Any, temperature: float,
+               max_tokens: int) -> Iterator[str]:
+        """Route to the appropriate API based on provider"""
+        base_url = self.base_url(config, route)
+        model_name = effective_api_name(config, self.api_name(config, route))
+        caching = self.context.prompt_caching
+        structured = self.context.structured
+        budget = config.reasoning_budget
+        # The limiter call_model charged for this call: header backoff and token refunds go back to it
+        key = route.key(config.provider)
+
+        # Only Anthropic needs the shared prefix marked; the others cache identical prefixes automatically
+        if config.provider == "openai":
+            client = self.openai_client("openai", 'OPENAI_API_KEY', base_url)
+            return self.iter_openai_chat(key, client, model_name, prompt.text, temperature, max_tokens,
+                                         prompt.prefix_hash if caching else None, structured)
+        elif config.provider == "anthropic":
+            # Clamp temperature to Anthropic's maximum of 1.0
+            return self.iter_anthropic_messages(key, self.anthropic_client(base_url), model_name, prompt.text,
+                                                min(temperature, 1.0), max_tokens,
+                                                prompt.prefix if caching else None, structured, budget)
+        elif config.provider == "google":
+            return self.iter_google_content(self.google_client(base_url), model_name, prompt.text,
+                                            temperature, max_tokens, structured, budget)
+        elif config.provider == "xai":
+            client = self.openai_client("xai", 'GROK_API_KEY', base_url)
+            return self.iter_openai_chat(key, client, model_name, prompt.text, temperature, max_tokens,
+                                         structured=structured)
+        elif config.provider == "moonshot":
+            return self.iter_moonshot(key, base_url, model_name, prompt.text, temperature, max_tokens, structured)
+        elif config.provider == "deepseek":
+            return self.iter_deepseek(key, base_url, model_name, prompt.text, temperature, max_tokens, structured)
+        else:
+            raise ValueError(f"Unknown provider: {config.provider}")
+
+    def iter_openai_chat(self, key: str, client: Any, model_name: str, prompt: str, temperature: float,
+                         max_tokens: int, prompt_cache_key: Optional[str] = None,
+                         structured: bool = False) -> Iterator[str]:
+        """Content chunks from an OpenAI-compatible chat completion (a single chunk when not streaming)"""
+        limiter = self.context.limiters.get(key)
+        request = dict(model=model_name, messages=[{"role": "user", "content": prompt}],
+                       temperature=temperature, max_tokens=max_tokens)
+        if structured:
+            request["response_format"] = ITEMS_RESPONSE_FORMAT
+        if prompt_cache_key:
+            # Routes requests sharing a prefix to the same cache
+            request["prompt_cache_key"] = prompt_cache_key
+        if not self.context.stream:
+            raw = client.chat.completions.with_raw_response.create(**request)
+            limiter.observe(raw.headers)
+            response = raw.parse()
+            limiter.record_usage(response.usage.total_tokens if response.usage else None)
+            report_openai_usage(response.usage)
+            yield response.choices[0].message.content
+            return
+
+        raw = client.chat.completions.with_raw_response.create(
+            **request, stream=True, stream_options={"include_usage": True})
+        limiter.observe(raw.headers)
+        stream = raw.parse()
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    limiter.record_usage(chunk.usage.total_tokens)
+                    report_openai_usage(chunk.usage)
+                for choice in chunk.choices:
+                    yield choice.delta.content or ""
+        finally:
+            stream.close()
+
+    def iter_anthropic_messages(self, key: str, client: Any, model_name: str, prompt: str, temperature: float,
+                                max_tokens: int, cache_prefix: Optional[str] = None,
+                                structured: bool = False, thinking_budget: Optional[int] = None) -> Iterator[str]:
+        """Text chunks from an Anthropic Messages call (a single chunk when not streaming).
+
+        In structured mode the answer is the input of a forced record_items tool call, yielded as JSON.
+        With a thinking budget, thinking deltas are yielded as empty strings.
+        """
+        limiter = self.context.limiters.get(key)
+        request = dict(model=model_name, max_tokens=max_tokens, temperature=temperature,
+                       messages=[{"role": "user", "content": anthropic_content(prompt, cache_prefix)}])
+        if thinking_budget:
+            # Extended thinking fixes the temperature at 1 and rejects any other value
+            del request["temperature"]
+            request["thinking"] = {"type": "enabled", "budget_tokens": thinking_budget}
+        if structured:
+            # Thinking can't be combined with a forced tool call; the tool is then only offered
+            tool_choice = {"type": "auto"} if thinking_budget else {"type": "tool", "name": ITEMS_TOOL["name"]}
+            request.update(tools=[ITEMS_TOOL], tool_choice=tool_choice)
+        if not self.context.stream:
+            raw = client.messages.with_raw_response.create(**request)
+            limiter.observe(raw.headers)
+            response = raw.parse()
+            limiter.record_usage(response.usage.input_tokens + response.usage.output_tokens)
+            report_anthropic_usage(response.usage, response.usage.output_tokens)
+            for block in response.content:
+                yield json.dumps(block.input) if block.type == "tool_use" else getattr(block, 'text', "")
+            return
+
+        raw = client.messages.with_raw_response.create(**request, stream=True)
+        limiter.observe(raw.headers)
+        stream = raw.parse()
+        start_usage = None
+        try:
+            for event in stream:
+                if event.type == "message_start":
+                    start_usage = event.message.usage
+                elif event.type == "content_block_delta":
+                    if event.delta.type == "text_delta":
+                        yield event.delta.text
+                    elif event.delta.type == "input_json_delta":
+                        yield event.delta.partial_json
+                    else:
+                        yield ""
+                elif event.type == "message_delta" and start_usage is not None:
+                    limiter.record_usage(start_usage.input_tokens + event.usage.output_tokens)
+                    report_anthropic_usage(start_usage, event.usage.output_tokens)
+        finally:
+            stream.close()
+
+    def iter_google_content(self, client: Any, model_name: str, prompt: str, temperature: float,
+                            max_tokens: int, structured: bool = False,
+                            thinking_budget: Optional[int] = None) -> Iterator[str]:
+        """Text chunks from a Gemini generate_content call (a single chunk when not streaming)"""
+        logger.info(f"Calling Google model {model_name} with temp {temperature}")
+        config = google_generation_config(model_name, temperature, max_tokens, structured, thinking_budget)
+
+        # Fenced (```json) output is handled by the extractor
+        if not self.context.stream:
+            responses = [client.models.generate_content(model=model_name, contents=prompt, config=config)]
+        else:
+            responses = client.models.generate_content_stream(model=model_name, contents=prompt, config=config)
+        try:
+            for response in responses:
+                usage = response.usage_metadata
+                if usage is not None:
+                    report_usage(usage.prompt_token_count, usage.candidates_token_count, usage.thoughts_token_count,
+                                 cached_tokens=usage.cached_content_token_count)
+                yield response.text or ""
+        finally:
+            close = getattr(responses, 'close', None)
+            if close is not None:
+                close()
+
+    def iter_moonshot(self, key: str, base_url: str, model_name: str, prompt: str, temperature: float,
+                      max_tokens: int, structured: bool = False) -> Iterator[str]:
+        """Moonshot AI models - Free tier: 6 RPM limit"""
+        import requests
+
+        logger.info(f"Calling Moonshot API with model: {model_name}")
+        try:
+            yield from iter_chat_completions_http(self.context, key, base_url, os.getenv('MOONSHOT_API_KEY'),
+                                                  chat_payload(model_name, prompt, temperature, max_tokens,
+                                                               json_mode=structured),
+                                                  timeout=90)
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 403:
+                logger.error("Moonshot 403 Forbidden - possible API key issue or model access")
+            elif e.response.status_code == 429:
+                logger.error("Moonshot rate limit exceeded - backing off")
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Moonshot API request failed: {e}")
+            raise
+
+    def iter_deepseek(self, key: str, base_url: str, model_name: str, prompt: str, temperature: float,
+                      max_tokens: int, structured: bool = False) -> Iterator[str]:
+        """DeepSeek models"""
+        import requests
+
+        # Reasoning model needs a larger budget at higher temperature (sweep.json sets 6000)
+        data = chat_payload(model_name, prompt, temperature, max_tokens, json_mode=structured)
+        if self.context.stream:
+            data["stream_options"] = {"include_usage": True}
+
+        logger.info(f"Calling DeepSeek API with model: {model_name}")
+        logger.debug("DeepSeek request data: %s", data)
+
+        try:
+            # DeepSeek reasoning model puts JSON in content, reasoning in reasoning_content
+            # (3 minutes for the reasoning model; when streaming this is the gap allowed between chunks)
+            yield from iter_chat_completions_http(self.context, key, base_url, os.getenv('DEEPSEEK_API_KEY'),
+                                                  data, timeout=180)
+        except requests.exceptions.Timeout:
+            logger.error("DeepSeek API request timed out after 180 seconds (reasoning model takes longer)")
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"DeepSeek API request failed: {e}")
+            raise
+
+@lru_cache(maxsize=None)
+def google_generation_config(model_name: str, temperature: float, max_tokens: int, structured: bool = False,
+                             thinking_budget: Optional[int] = None):
+    """Gemini generation settings, built once per (model, temperature, budgets, output mode)"""
+    from google.genai import types
+
+    # max_output_tokens counts thinking and answer tokens together
+    settings = dict(temperature=temperature, max_output_tokens=max_tokens)
+    if structured:
+        settings.update(response_mime_type="application/json", response_schema=gemini_schema(ITEMS_SCHEMA))
+    if thinking_budget is not None:
+        return types.GenerateContentConfig(**settings,
+                                           thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget))
+    # Note: Gemini 2.5 Pro requires thinking mode, Flash can have it disabled
+    if "pro" in model_name.lower():
+        # Pro models require thinking mode; max_output_tokens needs room for thinking + response
+        return types.GenerateContentConfig(**settings)
+    # Flash models can disable thinking for speed
+    return types.GenerateContentConfig(**settings, thinking_config=types.ThinkingConfig(thinking_budget=0))
+
+def gemini_schema(schema: Any) -> Any:
+    """JSON Schema -> Gemini's OpenAPI subset: upper-case type names, no additionalProperties"""
+    if isinstance(schema, list):
+        return [gemini_schema(value) for value in schema]
+    if not isinstance(schema, dict):
+        return schema
+    converted = {}
+    for key, value in schema.items():
+        if key == "additionalProperties":
+            continue
+        if key == "type":
+            converted[key] = value.upper()
+        elif key == "properties":
+            converted[key] = {name: gemini_schema(inner) for name, inner in value.items()}
+        else:
+            converted[key] = gemini_schema(value)
+    return converted
+
+def report_anthropic_usage(usage: Any, output_tokens: int):
+    """Report Anthropic usage; input_tokens there excludes the prompt-cache reads and writes"""
+    cached = getattr(usage, 'cache_read_input_tokens', None) or 0
+    written = getattr(usage, 'cache_creation_input_tokens', None) or 0
+    report_usage(usage.input_tokens + cached + written, output_tokens,
+                 cached_tokens=cached, cache_write_tokens=written)
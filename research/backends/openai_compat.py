@@ -0,0 +1,154 @@
+"""
+OpenAI-compatible /chat/completions backends over plain HTTP.
+
+Used by the native backend for Moonshot and DeepSeek, and on its own for any
+OpenAI-compatible endpoint (self-hosted servers, gateways) and for the AI/ML API
+aggregator. Requests go through the pooled keep-alive session of the route, and
+responses stream as server-sent events unless streaming is turned off.
+"""
+
+import os
+import json
+import logging
+from typing import Any, Dict, Iterator
+
+from research.backends import Backend, BackendContext, Route
+from research.metrics import report_usage
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a response (when streaming, the longest allowed gap between chunks)
+DEFAULT_TIMEOUT = 180.0
+
+def report_openai_usage(usage: Any):
+    """Report token usage from an OpenAI-style usage object or dict"""
+    if usage is None:
+        return
+    if not isinstance(usage, dict):
+        usage = usage.model_dump()
+    details = usage.get("completion_tokens_details") or {}
+    # Cached prefix tokens: OpenAI/xAI report prompt_tokens_details, DeepSeek cache hits, Moonshot a flat count
+    candidates = ((usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+                  usage.get("prompt_cache_hit_tokens"), usage.get("cached_tokens"))
+    cached = next((count for count in candidates if count is not None), None)
+    report_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"), details.get("reasoning_tokens"),
+                 cached_tokens=cached)
+
+def iter_chat_completions_http(context: BackendContext, key: str, base_url: str, api_key: str,
+                               payload: Dict[str, Any], timeout: float) -> Iterator[str]:
+    """Content chunks from an OpenAI-compatible /chat/completions endpoint over plain HTTP.
+
+    Reasoning deltas (DeepSeek's reasoning_content) are yielded as empty strings.
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    if context.stream:
+        payload = {**payload, "stream": True}
+    session = context.clients.session(key, base_url)
+    response = session.post(f"{base_url}/chat/completions", headers=headers, json=payload,
+                            timeout=timeout, stream=context.stream)
+    try:
+        logger.info("%s response status: %s", key, response.status_code)
+        context.limiters.get(key).observe(response.headers)
+        if response.status_code != 200:
+            logger.error("%s API error response: %s", key, response.text)
+        response.raise_for_status()
+
+        if not context.stream:
+            result = response.json()
+            report_openai_usage(result.get("usage"))
+            yield result["choices"][0]["message"]["content"]
+            return
+
+        # Bytes, decoded per line: SSE is UTF-8, but without a charset requests would guess ISO-8859-1
+        for raw in response.iter_lines(chunk_size=None):
+            line = raw.decode('utf-8')
+            # Server-sent events; DeepSeek also sends ': keep-alive' comments while reasoning
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            chunk = json.loads(data)
+            for choice in chunk.get("choices") or []:
+                # Moonshot reports usage on the final choice rather than the chunk
+                usage = chunk.get("usage") or choice.get("usage")
+                if usage:
+                    report_openai_usage(usage)
+                delta = choice.get("delta") or {}
+                yield delta.get("content") or ""
+            if not chunk.get("choices") and chunk.get("usage"):
+                report_openai_usage(chunk["usage"])
+    finally:
+        response.close()
+
+def chat_payload(model: str, prompt: str, temperature: float, max_tokens: int,
+                 json_mode: bool = False) -> Dict[str, Any]:
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if json_mode:
+        # Guarantees syntactically valid JSON (the prompt itself must ask for JSON); not the schema
+        payload["response_format"] = {"type": "json_object"}
+    return payload
+
+class OpenAICompatibleBackend(Backend):
+    """Any /chat/completions endpoint; the route names the endpoint and key variable"""
+
+    name = "openai-compatible"
+    default_base_url = None
+    default_api_key_env = None
+
+    def base_url(self, config: Any, route: Route) -> str:
+        key = route.key(config.provider)
+        base_url = (route.endpoint or os.getenv(f"{key.upper().replace('-', '_')}_BASE_URL")
+                    or self.default_base_url)
+        if not base_url:
+            raise ValueError(f"Route {key!r} for {config.name} needs an endpoint")
+        return base_url.rstrip('/')
+
+    def api_key_env(self, config: Any, route: Route) -> str:
+        key = route.key(config.provider)
+        return route.api_key_env or self.default_api_key_env or f"{key.upper().replace('-', '_')}_API_KEY"
+
+    def chunks(self, config: Any, route: Route, prompt: Any, temperature: float,
+               max_tokens: int) -> Iterator[str]:
+        if config.reasoning_budget is not None:
+            raise ValueError(f"{config.name} has a reasoning budget, which only the native backend can send")
+        payload = chat_payload(self.api_name(config, route), prompt.text, temperature, max_tokens)
+        if self.context.stream:
+            payload["stream_options"] = {"include_usage": True}
+        return iter_chat_completions_http(self.context, route.key(config.provider), self.base_url(config, route),
+                                          os.getenv(self.api_key_env(config, route)), payload, DEFAULT_TIMEOUT)
+
+# AI/ML API model ids for the models in sweep.json
+AIMLAPI_MODELS = {
+    "claude-sonnet-4": "anthropic/claude-4-sonnet",
+    "claude-opus-4": "anthropic/claude-4-opus",
+    "gemini-2.5-pro": "google/gemini-2.5-pro",
+    "grok-4": "x-ai/grok-4",
+    "gpt-4.1": "openai/gpt-4.1",
+    "gpt-4o": "openai/gpt-4o",
+    "gpt-o3": "openai/o3",
+    "kimi-k2": "moonshot/kimi-k2-instruct",
+    "deepseek-r1": "deepseek/deepseek-r1",
+}
+
+class AIMLAPIBackend(OpenAICompatibleBackend):
+    """The AI/ML API aggregator: every model behind one OpenAI-compatible endpoint and key"""
+
+    name = "aimlapi"
+    default_base_url = "https://api.aimlapi.com/v1"
+    default_api_key_env = "AIMLAPI_KEY"
+
+    def api_name(self, config: Any, route: Route) -> str:
+        if route.api_name:
+            return route.api_name
+        if config.name not in AIMLAPI_MODELS:
+            raise ValueError(f"No AI/ML API model id for {config.name}; set api_name on its aimlapi route")
+        return AIMLAPI_MODELS[config.name]
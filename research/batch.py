@@ -0,0 +1,277 @@
+"""
+Provider batch-API submission for large Status LLMs sweeps.
+
+OpenAI (Batch API) and Anthropic (Message Batches) accept thousands of requests
+in one asynchronous job, at higher throughput and half the price of
+synchronous calls. Pending jobs are compiled into batches and submitted. Open
+batches are polled together with a growing interval, and their results are
+handed back as `BatchResult`s so the caller can parse and save them through the
+usual path.
+
+Every request carries a custom_id. Anthropic requires custom_ids to match
+^[a-zA-Z0-9_-]{1,64}$, so ids are derived from the model, temperature and
+replicate, sanitized, and suffixed with a short hash. The mapping back to the
+job lives in a ledger (data/batches/ledger.json) together with every
+submitted batch. A crashed or interrupted run resumes by polling the batches
+that are still open instead of resubmitting their requests.
+"""
+
+import io
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from research.prompts import anthropic_content
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join('data', 'batches', 'ledger.json')
+
+CUSTOM_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
+_UNSAFE = re.compile(r'[^a-zA-Z0-9_-]+')
+
+# Batch states as seen by the poller
+RUNNING, ENDED, FAILED = "running", "ended", "failed"
+
+def make_custom_id(model: str, temperature: float, replicate: int, prompt_id: str = "default") -> str:
+    """Readable, collision-safe id like 'gpt-4_1-t0_7-r3-1a2b3c4d' that satisfies CUSTOM_ID_PATTERN"""
+    identity = f"{model}|{temperature}|{replicate}"
+    readable = f"{model}-t{temperature}-r{replicate}"
+    if prompt_id != "default":
+        identity += f"|{prompt_id}"
+        readable += f"-{prompt_id}"
+    digest = hashlib.sha1(identity.encode()).hexdigest()[:8]
+    readable = _UNSAFE.sub('_', readable)
+    custom_id = f"{readable[:64 - len(digest) - 1]}-{digest}"
+    assert CUSTOM_ID_PATTERN.match(custom_id), custom_id
+    return custom_id
+
+@dataclass
+class BatchRequest:
+    custom_id: str
+    api_name: str
+    prompt: str
+    temperature: float
+    max_tokens: int
+    cache_prefix: Optional[str] = None  # shared prompt prefix to mark for prompt caching
+    reasoning_budget: Optional[int] = None  # Anthropic extended-thinking budget_tokens
+
+@dataclass
+class BatchResult:
+    custom_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    usage: Dict[str, Optional[int]] = field(default_factory=dict)
+
+class OpenAIBatchBackend:
+    """Batch API: upload a JSONL file of /v1/chat/completions requests, download the output file"""
+
+    provider = "openai"
+    max_requests = 50_000
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        lines = [json.dumps({
+            "custom_id": r.custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": r.api_name, "messages": [{"role": "user", "content": r.prompt}],
+                     "temperature": r.temperature, "max_tokens": r.max_tokens},
+        }, ensure_ascii=False) for r in requests]
+        payload = ('\n'.join(lines) + '\n').encode('utf-8')
+        upload = self.client.files.create(file=("status-llms-batch.jsonl", io.BytesIO(payload)), purpose="batch")
+        batch = self.client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions",
+                                           completion_window="24h")
+        return batch.id
+
+    def poll(self, batch_id: str) -> Tuple[str, Dict[str, int]]:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts.model_dump() if batch.request_counts else {}
+        if batch.status == "completed":
+            return ENDED, counts
+        if batch.status in ("failed", "expired", "cancelled"):
+            # Expired/cancelled batches still deliver whatever finished
+            return (ENDED if batch.output_file_id else FAILED), counts
+        return RUNNING, counts
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                body = response.get("body") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    error = entry.get("error") or body.get("error") or f"HTTP {response.get('status_code')}"
+                    yield BatchResult(entry["custom_id"], error=str(error))
+                    continue
+                usage = body.get("usage") or {}
+                details = usage.get("completion_tokens_details") or {}
+                yield BatchResult(entry["custom_id"], text=body["choices"][0]["message"]["content"], usage={
+                    "prompt_tokens": usage.get("prompt_tokens"),
+                    "completion_tokens": usage.get("completion_tokens"),
+                    "reasoning_tokens": details.get("reasoning_tokens"),
+                    "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+                })
+
+class AnthropicBatchBackend:
+    """Message Batches API: requests go inline, results stream back as JSONL"""
+
+    provider = "anthropic"
+    max_requests = 100_000
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        batch = self.client.messages.batches.create(requests=[{
+            "custom_id": r.custom_id, "params": self.params(r)} for r in requests])
+        return batch.id
+
+    def params(self, r: BatchRequest) -> Dict[str, Any]:
+        params = {"model": r.api_name, "max_tokens": r.max_tokens, "temperature": r.temperature,
+                  "messages": [{"role": "user", "content": anthropic_content(r.prompt, r.cache_prefix)}]}
+        if r.reasoning_budget:
+            # Extended thinking runs at its fixed temperature of 1
+            del params["temperature"]
+            params["thinking"] = {"type": "enabled", "budget_tokens": r.reasoning_budget}
+        return params
+
+    def poll(self, batch_id: str) -> Tuple[str, Dict[str, int]]:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts.model_dump() if batch.request_counts else {}
+        return (ENDED if batch.processing_status == "ended" else RUNNING), counts
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        for entry in self.client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type != "succeeded":
+                error = getattr(getattr(result, 'error', None), 'error', None) or result.type
+                yield BatchResult(entry.custom_id, error=str(error))
+                continue
+            message = result.message
+            text = ''.join(block.text for block in message.content if block.type == "text")
+            cached = message.usage.cache_read_input_tokens or 0
+            written = message.usage.cache_creation_input_tokens or 0
+            yield BatchResult(entry.custom_id, text=text, usage={
+                "prompt_tokens": message.usage.input_tokens + cached + written,
+                "completion_tokens": message.usage.output_tokens,
+                "reasoning_tokens": None,
+                "cached_tokens": cached,
+                "cache_write_tokens": written,
+            })
+
+class BatchLedger:
+    """Persistent record of submitted batches and what each custom_id stands for"""
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        self.path = path
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.requests: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self.batches, self.requests = saved["batches"], saved["requests"]
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"batches": self.batches, "requests": self.requests}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def add(self, batch_id: str, provider: str, jobs: Dict[str, Dict[str, Any]]):
+        """Record a submitted batch; `jobs` maps custom_id -> job description"""
+        self.batches[batch_id] = {"provider": provider, "state": RUNNING, "submitted": time.time(),
+                                  "custom_ids": sorted(jobs), "counts": {}}
+        for custom_id, job in jobs.items():
+            self.requests[custom_id] = {**job, "batch": batch_id}
+        self.save()
+
+    def open_batches(self) -> List[str]:
+        return [batch_id for batch_id, batch in self.batches.items() if batch["state"] == RUNNING]
+
+    def in_flight(self, custom_id: str) -> bool:
+        """Whether this request is part of a batch that hasn't ended yet"""
+        request = self.requests.get(custom_id)
+        return request is not None and self.batches.get(request["batch"], {}).get("state") == RUNNING
+
+    def finish(self, batch_id: str, state: str):
+        batch = self.batches[batch_id]
+        batch["state"] = state
+        batch["finished"] = time.time()
+        # Forget the request mapping once handled; the batch entry keeps the history
+        for custom_id in batch["custom_ids"]:
+            if self.requests.get(custom_id, {}).get("batch") == batch_id:
+                del self.requests[custom_id]
+        self.save()
+
+def poll_batches(backends: Dict[str, Any], ledger: BatchLedger, handle: Callable[[Dict[str, Any], BatchResult], None],
+                 interval: float = 30.0, max_interval: float = 300.0, sleep: Callable[[float], None] = time.sleep,
+                 fail: Optional[Callable[[Dict[str, Any], str], None]] = None) -> int:
+    """Poll every open batch until all have ended, passing each result with its job to `handle`.
+
+    Jobs that get no result (the whole batch failed, or a request is missing from an
+    ended batch) go to `fail` with the reason, so they aren't left marked as running.
+
+    The interval grows by half each round without progress and drops back to
+    `interval` when any batch reports new completions. Returns how many results
+    were handled.
+    """
+    handled = 0
+    delay = interval
+    while True:
+        progressed = False
+        for batch_id in ledger.open_batches():
+            batch = ledger.batches[batch_id]
+            backend = backends.get(batch["provider"])
+            if backend is None:
+                continue
+            state, counts = backend.poll(batch_id)
+            if counts != batch.get("counts"):
+                progressed = True
+                batch["counts"] = counts
+                logger.info("📬 %s batch %s: %s", batch["provider"], batch_id,
+                            ', '.join(f"{k} {v}" for k, v in counts.items()))
+            if state == RUNNING:
+                continue
+            progressed = True
+            unanswered = {custom_id for custom_id in batch["custom_ids"]
+                          if ledger.requests.get(custom_id, {}).get("batch") == batch_id}
+            if state == ENDED:
+                for result in backend.results(batch_id):
+                    job = ledger.requests.get(result.custom_id)
+                    if job is None:
+                        logger.warning("Unknown custom_id %s in batch %s", result.custom_id, batch_id)
+                        continue
+                    unanswered.discard(result.custom_id)
+                    handle(job, result)
+                    handled += 1
+                reason = "no result in the batch"
+            else:
+                logger.error("❌ %s batch %s failed; its requests will be resubmitted next run",
+                             batch["provider"], batch_id)
+                reason = f"batch {state}"
+            if fail is not None:
+                for custom_id in sorted(unanswered):
+                    fail(ledger.requests[custom_id], reason)
+            ledger.finish(batch_id, state)
+        ledger.save()
+        if not ledger.open_batches():
+            return handled
+        delay = interval if progressed else min(max_interval, delay * 1.5)
+        logger.info("⏳ Waiting %.0fs for %d open batches", delay, len(ledger.open_batches()))
+        sleep(delay)
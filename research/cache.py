@@ -0,0 +1,217 @@
+"""
+Content-addressed on-disk response cache for the Status LLMs research runner.
+
+Every call is keyed on a hash of (provider, api_name, prompt text, temperature,
+max_tokens, replicate). The raw response text is stored next to its parsed
+JSON, so re-parsing, re-validating or re-exporting never touches the network,
+and editing prompt.md or max_tokens only pays for the cells that changed.
+
+Modes:
+    off           never read or write the cache
+    read-through  serve hits from the cache, call and store on a miss (default)
+    read-only     serve hits only; a miss raises CacheMiss instead of calling
+    refresh       always call, overwrite the cached entry
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "read-through", "read-only", "refresh")
+
+DEFAULT_CACHE_DIR = os.path.join('data', '.cache')
+
+class CacheMiss(LookupError):
+    """Raised in read-only mode when a response is not cached"""
+
+def cache_key(provider: str, api_name: str, prompt: str, temperature: float,
+              max_tokens: int, replicate: int = 0, reasoning_budget: Optional[int] = None) -> str:
+    """Stable content hash identifying one model call"""
+    fields = {
+        "provider": provider,
+        "api_name": api_name,
+        "prompt": prompt,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "replicate": replicate,
+    }
+    # Only set budgets are part of the key, so responses cached before budgets existed still match
+    if reasoning_budget is not None:
+        fields["reasoning_budget"] = reasoning_budget
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def cache_key_factory(provider: str, api_name: str, prompt: str, max_tokens: int,
+                      reasoning_budget: Optional[int] = None) -> Callable[[float, int], str]:
+    """cache_key() for many (temperature, replicate) pairs of one model/prompt, hashing the prompt only once"""
+    fields = {"provider": provider, "api_name": api_name, "prompt": prompt, "max_tokens": max_tokens}
+    if reasoning_budget is not None:
+        fields["reasoning_budget"] = reasoning_budget
+    # With sorted keys, replicate and temperature are the last two fields of the payload
+    prefix = json.dumps(fields, sort_keys=True, ensure_ascii=False)[:-1] + ', '
+    base = hashlib.sha256(prefix.encode('utf-8'))
+
+    def key(temperature: float, replicate: int = 0) -> str:
+        digest = base.copy()
+        digest.update(f'"replicate": {json.dumps(replicate)}, "temperature": {json.dumps(temperature)}}}'.encode())
+        return digest.hexdigest()
+    return key
+
+class ResponseCache:
+    """Stores one JSON file per call under {directory}/{key[:2]}/{key}.json"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, mode: str = "read-through",
+                 max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode} (expected one of {', '.join(CACHE_MODES)})")
+        self.directory = directory
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _expired(self, path: str) -> bool:
+        return self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached entry for `key` ({raw, parsed, meta, created}), or None"""
+        if self.mode in ("off", "refresh"):
+            return None
+        path = self._path(key)
+        try:
+            if self._expired(path):
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # mark as recently used for LRU eviction
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+            return None
+
+    def _write(self, key: str, entry: Dict[str, Any]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def put(self, key: str, raw: str, meta: Dict[str, Any], parsed: Optional[Dict[str, Any]] = None):
+        """Store a raw response (and its parsed form, if known)"""
+        if self.mode in ("off", "read-only"):
+            return
+        self._write(key, {"key": key, "meta": meta, "raw": raw, "parsed": parsed, "created": time.time()})
+
+    def put_parsed(self, key: str, parsed: Dict[str, Any]):
+        """Attach the parsed JSON to an already cached raw response"""
+        if self.mode in ("off", "read-only"):
+            return
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        entry["parsed"] = parsed
+        self._write(key, entry)
+
+    def discard(self, key: str):
+        """Forget a cached response, e.g. one that turned out to be unusable"""
+        if self.mode in ("off", "read-only"):
+            return
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def fetch(self, key: str, call: Callable[[], str], meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Read-through lookup: return the cached entry, or run `call` and cache its response"""
+        entry = self.get(key)
+        if entry is not None:
+            with self.lock:
+                self.hits += 1
+            logger.info("💾 Cache hit for %s @ %s", meta.get("api_name"), meta.get("temperature"))
+            return entry
+        if self.mode == "read-only":
+            raise CacheMiss(f"No cached response for {meta.get('api_name')} @ {meta.get('temperature')}")
+        with self.lock:
+            self.misses += 1
+        raw = call()
+        self.put(key, raw, meta)
+        return {"key": key, "meta": meta, "raw": raw, "parsed": None, "created": time.time()}
+
+    def keys(self) -> Set[str]:
+        """Keys of every cached entry, from a directory listing (no files are opened)"""
+        if self.mode in ("off", "refresh") or not os.path.isdir(self.directory):
+            return set()
+        keys = set()
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                keys.update(name[:-5] for name in os.listdir(shard.path) if name.endswith('.json'))
+        return keys
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every cached entry, e.g. to re-parse offline"""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json'):
+                    try:
+                        with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                            yield json.load(f)
+                    except (OSError, json.JSONDecodeError):
+                        continue
+
+    def evict(self) -> int:
+        """Drop entries older than max_age, then least recently used ones until under max_bytes"""
+        if not os.path.isdir(self.directory) or (self.max_age is None and self.max_bytes is None):
+            return 0
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+
+        removed = 0
+        now = time.time()
+        kept = []
+        for mtime, size, path in files:
+            if self.max_age is not None and now - mtime > self.max_age:
+                os.remove(path)
+                removed += 1
+            else:
+                kept.append((mtime, size, path))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in kept)
+            for mtime, size, path in sorted(kept):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                removed += 1
+
+        if removed:
+            logger.info("🧹 Evicted %d cached responses", removed)
+        return removed
+
+    def log_summary(self):
+        if self.mode != "off":
+            logger.info("💾 Response cache (%s): %d hits, %d misses", self.mode, self.hits, self.misses)
@@ -0,0 +1,208 @@
+"""
+Item-name canonicalization for cross-model aggregation.
+
+Models name the same thing differently ("Owning a private yacht", "Private yacht
+ownership"). Every name is reduced to a canonical key (normalized, stop words
+and possession verbs dropped, light plural stemming, tokens sorted). Identical
+keys share an entity outright. Otherwise the name is matched against a trigram
+inverted index: only entities sharing enough informative trigrams are scored,
+with trigram Jaccard similarity. That keeps clustering near-linear instead of
+comparing every pair of names.
+
+The alias table is persisted to data/.canonical/aliases.json and updated
+incrementally: names already seen cost a dict lookup, new names one blocked
+index query.
+
+Usage:
+    python -m research.canonical              # update aliases from data/ and list merged entities
+"""
+
+import os
+import json
+import math
+import logging
+import argparse
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from research.export import normalize_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALIAS_PATH = os.path.join('data', '.canonical', 'aliases.json')
+ALIAS_VERSION = 1
+
+STOP_WORDS = {
+    "a", "an", "the", "of", "for", "to", "in", "on", "at", "and", "with", "your", "one", "s",
+    "own", "owning", "ownership", "owner", "owners", "having", "have", "being", "possessing", "possession",
+}
+
+DEFAULT_THRESHOLD = 0.7
+# Trigrams shared by more than this many entities are too common to be useful for blocking
+MAX_POSTING = 500
+
+def _stem(token: str) -> str:
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+def canonical_key(name: str) -> str:
+    """Order- and filler-insensitive key: 'Owning a private yacht' -> 'private yacht'"""
+    tokens = [_stem(t) for t in normalize_name(name).split() if t not in STOP_WORDS]
+    if not tokens:
+        tokens = normalize_name(name).split()
+    return ' '.join(sorted(set(tokens)))
+
+def trigrams(key: str) -> Set[str]:
+    """Character trigrams of each token, padded so short tokens still produce some"""
+    grams = set()
+    for token in key.split():
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class AliasTable:
+    """Maps item names to stable canonical entity ids"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.labels: List[str] = []                  # entity id -> display label
+        self.keys: Dict[str, int] = {}               # canonical key -> entity id
+        self.names: Dict[str, int] = {}              # raw name -> entity id
+        self.entity_keys: List[str] = []             # entity id -> key it is indexed under
+        self.entity_grams: List[Set[str]] = []       # entity id -> trigrams of that key
+        self.index: Dict[str, Set[int]] = defaultdict(set)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_ALIAS_PATH, threshold: float = DEFAULT_THRESHOLD) -> "AliasTable":
+        table = cls(threshold)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return table
+        if saved.get("version") != ALIAS_VERSION or saved.get("threshold") != threshold:
+            logger.info("Alias table %s is stale, rebuilding", path)
+            return table
+        for entity in saved["entities"]:
+            table._add_entity(entity["label"], entity["keys"][0])
+            for key in entity["keys"][1:]:
+                table.keys[key] = entity["id"]
+        table.names.update(saved["names"])
+        table.dirty = False
+        return table
+
+    def save(self, path: str = DEFAULT_ALIAS_PATH):
+        if not self.dirty:
+            return
+        keys_by_entity: Dict[int, List[str]] = defaultdict(list)
+        for key, entity in self.keys.items():
+            keys_by_entity[entity].append(key)
+        # The first key is the one the entity is indexed under
+        entities = []
+        for entity, label in enumerate(self.labels):
+            first = self.entity_keys[entity]
+            keys = [first] + [k for k in keys_by_entity[entity] if k != first]
+            entities.append({"id": entity, "label": label, "keys": keys})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": ALIAS_VERSION, "threshold": self.threshold,
+                       "entities": entities, "names": self.names}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.dirty = False
+
+    def _add_entity(self, label: str, key: str) -> int:
+        entity = len(self.labels)
+        self.labels.append(label)
+        self.keys[key] = entity
+        grams = trigrams(key)
+        self.entity_keys.append(key)
+        self.entity_grams.append(grams)
+        for gram in grams:
+            self.index[gram].add(entity)
+        return entity
+
+    def _match(self, key: str) -> Optional[int]:
+        grams = trigrams(key)
+        if not grams:
+            return None
+        # Prefix filter: any entity with Jaccard >= threshold must share at least one of
+        # the (n - ceil(t * n) + 1) rarest trigrams, so only those postings are scanned.
+        ordered = sorted(grams, key=lambda g: len(self.index.get(g, ())))
+        prefix = len(ordered) - math.ceil(self.threshold * len(ordered)) + 1
+        candidates: Set[int] = set()
+        for gram in ordered[:prefix]:
+            posting = self.index.get(gram)
+            if posting and len(posting) <= MAX_POSTING:
+                candidates.update(posting)
+
+        best, best_score = None, self.threshold
+        size = len(grams)
+        for entity in candidates:
+            other = self.entity_grams[entity]
+            # Length filter: Jaccard can't reach the threshold if sizes differ too much
+            if not self.threshold * size <= len(other) <= size / self.threshold:
+                continue
+            overlap = len(grams & other)
+            score = overlap / (size + len(other) - overlap)
+            if score >= best_score:
+                best, best_score = entity, score
+        return best
+
+    def resolve(self, name: str) -> int:
+        """Entity id for a name, creating or extending an entity when it is new"""
+        entity = self.names.get(name)
+        if entity is not None:
+            return entity
+        key = canonical_key(name)
+        entity = self.keys.get(key)
+        if entity is None:
+            entity = self._match(key)
+            if entity is None:
+                entity = self._add_entity(name, key)
+            else:
+                self.keys[key] = entity
+        self.names[name] = entity
+        self.dirty = True
+        return entity
+
+    def resolve_all(self, names: Iterable[str]) -> Dict[str, int]:
+        """Entity ids for many names; each distinct name is resolved once"""
+        return {name: self.resolve(name) for name in dict.fromkeys(names)}
+
+    def label(self, entity: int) -> str:
+        return self.labels[entity]
+
+    def aliases(self) -> Dict[int, List[str]]:
+        """Raw names grouped by entity"""
+        grouped: Dict[int, List[str]] = defaultdict(list)
+        for name, entity in self.names.items():
+            grouped[entity].append(name)
+        return grouped
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Update the canonical item alias table")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    from research.export import ColumnarExporter
+    exporter = ColumnarExporter(args.data_dir)
+    exporter.update()
+    names = exporter.table().column("name").unique().to_pylist()
+
+    path = os.path.join(args.data_dir, '.canonical', 'aliases.json')
+    table = AliasTable.load(path, args.threshold)
+    before = len(table.labels)
+    table.resolve_all(n for n in names if n)
+    table.save(path)
+    logger.info("%d distinct names -> %d entities (%d new)", len(names), len(table.labels), len(table.labels) - before)
+    for entity, names in sorted(table.aliases().items()):
+        if len(names) > 1:
+            print(f"{table.label(entity)}: {' | '.join(sorted(names))}")
+
+if __name__ == "__main__":
+    main()
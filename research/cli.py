@@ -0,0 +1,171 @@
+"""
+Command-line entry point for the Status LLMs research runner.
+
+    python -m research status                 # done/remaining cells per model and prompt
+    python -m research plan [runner options]  # compiled plan and ETA, no API calls
+    python -m research run [runner options]   # run the sweep (same options as run_status_research.py)
+    python -m research export [--output PATH] # columnar export of every rating
+    python -m research db [--rebuild]         # bring data/results.db up to date with data/
+    python -m research budgets                # reasoning-budget variants vs their base models
+    python -m research watch [--port 8765]    # stream new results and aggregates to the dashboard
+
+`status` reads sweep.json and the run ledger (data/runs.jsonl), plus the job
+queue of a distributed sweep if there is one. It never imports the runner, the
+provider SDKs, requests or asyncio, so it answers in well under 100 ms on a
+complete data directory. `plan` and `run` import run_status_research.py when
+they are chosen, and the runner imports each SDK only when a provider is called.
+"""
+
+import os
+import sys
+import json
+import argparse
+from collections import Counter
+from typing import List, Optional
+
+from research.ledger import LEDGER_NAME, RunLedger
+from research.sweep import DEFAULT_SPEC_PATH, SweepSpec, done_checker, plan_sweep, prompt_data_dir
+
+def show_status(spec_path: str = DEFAULT_SPEC_PATH, data_dir: str = 'data', verbose: bool = False,
+                replicates: Optional[int] = None) -> int:
+    """Print how much of the sweep is done; returns the number of cells still to run"""
+    spec = SweepSpec.load(spec_path)
+    if replicates:
+        spec.replicates = replicates
+    prompt_ids = list(spec.prompts)
+    # Read-only: a data/ directory without a ledger is indexed in memory but not written to
+    ledger = RunLedger(os.path.join(data_dir, LEDGER_NAME), read_only=True)
+    plan = plan_sweep(spec, dict.fromkeys(prompt_ids, ""), done_checker(spec, prompt_ids, ledger))
+    remaining = Counter((job.config.name, job.prompt_id) for job in plan.jobs)
+    total = plan.done + len(plan.jobs)
+
+    print(f"{spec_path}: {plan.done}/{total} cells done, {len(plan.jobs)} remaining"
+          + (f", {plan.pruned} pruned (temperature out of range)" if plan.pruned else ""))
+    for config in spec.models:
+        temperatures = spec.temperatures_for(config)
+        allowed = sum(1 for t in temperatures if t <= spec.max_temperature(config.provider))
+        cells = allowed * (config.replicates or spec.replicates)
+        for prompt_id in prompt_ids:
+            left = remaining[(config.name, prompt_id)]
+            if left or verbose:
+                print(f"  {config.name:<16} {prompt_id:<12} {cells - left:>5}/{cells:<5}"
+                      + ("" if left else " ✓"))
+
+    show_live_concurrency(os.path.join(data_dir, 'metrics', 'concurrency.json'))
+
+    queue_path = os.path.join(data_dir, 'queue.db')
+    if os.path.exists(queue_path):
+        show_queue(queue_path)
+
+    ledger_path = os.path.join(data_dir, 'batches', 'ledger.json')
+    if os.path.exists(ledger_path):
+        from research.batch import BatchLedger
+        open_batches = BatchLedger(ledger_path).open_batches()
+        if open_batches:
+            print(f"{len(open_batches)} batch(es) still running; resume with: python -m research run --batch")
+    return len(plan.jobs)
+
+def show_live_concurrency(path: str):
+    """Print the in-flight limits published by a sweep that is still running"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            status = json.load(f)
+        os.kill(status["pid"], 0)
+    except (OSError, ValueError, KeyError, TypeError):
+        return
+    if not status.get("adaptive"):
+        return
+    limits = ", ".join(f"{provider} {state['limit']} (cut {state['decreases']}x)" if state["decreases"]
+                       else f"{provider} {state['limit']}" for provider, state in status["providers"].items())
+    print(f"Running sweep (pid {status['pid']}) concurrency: {limits}")
+
+def show_queue(path: str):
+    """Print what a distributed sweep (--coordinator/--worker) still has queued or in flight"""
+    from research.jobqueue import SQLiteJobQueue
+    queue = SQLiteJobQueue(path)
+    counts, workers = queue.counts(), queue.workers()
+    queue.close()
+    if counts["pending"] or counts["leased"] or counts["finished"]:
+        print(f"Job queue {path}: {counts['pending']} pending, {counts['leased']} in flight, "
+              f"{counts['finished']} waiting for the coordinator; {len(workers)} worker(s) seen in the last minute"
+              + (f" ({', '.join(sorted(workers))})" if workers else ""))
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="python -m research", description="Status LLMs research runner")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    status = commands.add_parser('status', help="show done/remaining cells without importing any provider SDK")
+    status.add_argument('--spec', default=DEFAULT_SPEC_PATH)
+    status.add_argument('--data-dir', default='data')
+    status.add_argument('--replicates', type=int, default=None, help="samples per cell, overriding the spec")
+    status.add_argument('-v', '--verbose', action='store_true', help="also list finished models")
+
+    # plan and run hand everything after the subcommand to the runner's own parser
+    commands.add_parser('plan', add_help=False, help="print the compiled plan and ETA (runner options apply)")
+    commands.add_parser('run', add_help=False, help="run the sweep (see `python -m research run --help`)")
+
+    export = commands.add_parser('export', help="export every rating to a Parquet/Arrow table")
+    export.add_argument('--spec', default=DEFAULT_SPEC_PATH)
+    export.add_argument('--data-dir', default='data')
+    export.add_argument('--output', default=None, help="output .parquet or .arrow file")
+
+    db = commands.add_parser('db', help="index data/ into the SQLite results database used by the dashboard")
+    db.add_argument('--spec', default=DEFAULT_SPEC_PATH)
+    db.add_argument('--data-dir', default='data')
+    db.add_argument('--rebuild', action='store_true', help="recreate the database from scratch")
+
+    budgets = commands.add_parser('budgets', help="compare latency and ratings of @think-N reasoning-budget variants")
+    budgets.add_argument('--data-dir', default='data')
+    budgets.add_argument('--prompt-id', default='default')
+
+    watch = commands.add_parser('watch', help="serve new results and aggregate changes as Server-Sent Events")
+    watch.add_argument('--data-dir', default='data')
+    watch.add_argument('--host', default='127.0.0.1')
+    watch.add_argument('--port', type=int, default=8765)
+    watch.add_argument('--interval', type=float, default=0.5, help="seconds between polls of the results database")
+
+    if argv and argv[0] in ('plan', 'run'):
+        from run_status_research import cli
+        cli(['--plan', *argv[1:]] if argv[0] == 'plan' else argv[1:])
+        return
+
+    args = parser.parse_args(argv)
+    if args.command == 'status':
+        sys.exit(1 if show_status(args.spec, args.data_dir, args.verbose, args.replicates) else 0)
+    elif args.command == 'db':
+        import logging
+        from research.resultsdb import DB_NAME, ResultsDB
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        spec = SweepSpec.load(args.spec)
+        path = os.path.join(args.data_dir, DB_NAME)
+        if args.rebuild:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        # Unchanged results are skipped, so indexing an existing database only adds what is new
+        db = ResultsDB(path)
+        db.index({prompt_id: prompt_data_dir(prompt_id, args.data_dir) for prompt_id in spec.prompts},
+                 {m.name: m.provider for m in spec.models})
+        db.close()
+    elif args.command == 'budgets':
+        import logging
+        from research.reasoning import compare_budgets, log_comparison
+        from research.resultsdb import DB_NAME
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        log_comparison(compare_budgets(os.path.join(args.data_dir, DB_NAME),
+                                       os.path.join(args.data_dir, 'metrics', 'calls.jsonl'), args.prompt_id))
+    elif args.command == 'watch':
+        import logging
+        from research.watch import serve
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        serve(args.data_dir, args.host, args.port, args.interval)
+    elif args.command == 'export':
+        import logging
+        from research.export import ColumnarExporter
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        spec = SweepSpec.load(args.spec)
+        providers = {m.name: m.provider for m in spec.models}
+        data_dirs = {prompt_id: prompt_data_dir(prompt_id, args.data_dir) for prompt_id in spec.prompts}
+        ColumnarExporter(args.data_dir, providers, data_dirs).write(
+            args.output or os.path.join(args.data_dir, 'ratings.parquet'))
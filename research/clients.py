@@ -0,0 +1,139 @@
+"""
+Long-lived provider clients for the Status LLMs research runner.
+
+Building a new SDK client (or calling bare `requests.post`) for every request
+pays a fresh TCP + TLS handshake each time. The registry keeps one keep-alive
+client or `requests.Session` per (provider, base_url) with a tunable pool size,
+and counts requests, new connections and TLS handshakes so the run summary
+shows how often connections were actually reused. requests and urllib3 are only
+imported when the first plain-HTTP session is built.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 20
+
+@dataclass
+class ClientStats:
+    provider: str
+    base_url: Optional[str]
+    clients_created: int = 0
+    lookups: int = 0
+    requests: int = 0
+    connections: int = 0
+    tls_handshakes: int = 0
+
+    @property
+    def reused(self) -> int:
+        """Requests served over an already-open connection"""
+        return max(0, self.requests - self.connections)
+
+def _counting_adapter(stats: ClientStats, **kwargs):
+    """HTTPAdapter whose connection pools report every new connection to ClientStats"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class CountingHTTPPool(HTTPConnectionPool):
+        def _new_conn(self):
+            stats.connections += 1
+            return super()._new_conn()
+
+    class CountingHTTPSPool(HTTPSConnectionPool):
+        def _new_conn(self):
+            stats.connections += 1
+            stats.tls_handshakes += 1
+            return super()._new_conn()
+
+    class CountingAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": CountingHTTPPool, "https": CountingHTTPSPool}
+
+        def send(self, request, **kwargs):
+            stats.requests += 1
+            return super().send(request, **kwargs)
+
+    return CountingAdapter(**kwargs)
+
+class ClientRegistry:
+    """Creates each provider client once and hands the same instance back on every call"""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self.clients: Dict[Tuple[str, Optional[str]], Any] = {}
+        self.stats: Dict[Tuple[str, Optional[str]], ClientStats] = {}
+        self.lock = threading.Lock()
+
+    def configure(self, pool_size: int):
+        """Set the connection pool size for clients created from now on"""
+        self.pool_size = pool_size
+
+    def get(self, provider: str, base_url: Optional[str],
+            factory: Callable[[ClientStats], Any]) -> Any:
+        """Return the cached client for (provider, base_url), building it with `factory` on first use"""
+        key = (provider, base_url)
+        with self.lock:
+            stats = self.stats.setdefault(key, ClientStats(provider, base_url))
+            stats.lookups += 1
+            if key not in self.clients:
+                self.clients[key] = factory(stats)
+                stats.clients_created += 1
+                logger.debug("Created %s client for %s", provider, base_url or "default endpoint")
+            return self.clients[key]
+
+    def session(self, provider: str, base_url: Optional[str]) -> "requests.Session":
+        """Keep-alive requests.Session for plain HTTP providers"""
+        import requests
+
+        def build(stats: ClientStats) -> requests.Session:
+            session = requests.Session()
+            adapter = _counting_adapter(stats, pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            return session
+        return self.get(provider, base_url, build)
+
+    def httpx_client_args(self, stats: ClientStats) -> Dict[str, Any]:
+        """Keyword arguments for an httpx.Client with pooled keep-alive and connection tracing"""
+        import httpx
+
+        def trace(event: str, info: Dict[str, Any]):
+            if event == "connection.connect_tcp.complete":
+                stats.connections += 1
+            elif event == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+
+        def on_request(request: "httpx.Request"):
+            stats.requests += 1
+            request.extensions["trace"] = trace
+
+        return {
+            "limits": httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            "event_hooks": {"request": [on_request]},
+        }
+
+    def httpx_client(self, stats: ClientStats, timeout: float = 600.0):
+        """Pooled httpx.Client for the OpenAI and Anthropic SDKs"""
+        import httpx
+        return httpx.Client(timeout=timeout, **self.httpx_client_args(stats))
+
+    def close(self):
+        """Close every pooled client"""
+        with self.lock:
+            for client in self.clients.values():
+                close = getattr(client, "close", None)
+                if callable(close):
+                    close()
+            self.clients.clear()
+
+    def log_summary(self):
+        """Log connection reuse per provider"""
+        for stats in sorted(self.stats.values(), key=lambda s: s.provider):
+            logger.info("🔌 %s: %d requests over %d connections (%d reused, %d TLS handshakes, %d client builds)",
+                        stats.provider, stats.requests, stats.connections, stats.reused,
+                        stats.tls_handshakes, stats.clients_created)
@@ -0,0 +1,200 @@
+"""
+Adaptive (AIMD) per-provider concurrency for the Status LLMs research runner.
+
+Each provider's in-flight limit starts at its configured concurrency and then
+follows the provider's health, like TCP congestion control:
+- every healthy call adds `increase / limit`, so the limit grows by `increase`
+  per window of `limit` calls while latency and errors stay normal;
+- a transient failure (429, 5xx, timeout, dropped connection) or a latency spike
+  (recent latency above `latency_tolerance` times the model's running baseline)
+  multiplies the limit by `decrease`.
+Only calls that started after the last cut can cut again, so one burst of 429s
+halves the limit once rather than once per failed call. Calls held back by the
+client-side rate limiter don't raise the limit: more in-flight requests would
+only wait longer in its queue.
+
+The current limits are logged when they change and written to
+data/metrics/concurrency.json, so `python -m research status` (or anything
+else) can show them while a sweep runs. With `adaptive=False` the limits stay
+fixed at their initial values.
+"""
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from research.store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS_PATH = os.path.join('data', 'metrics', 'concurrency.json')
+
+# Without a max_concurrency in sweep.json, a provider may grow to this multiple of its starting limit
+DEFAULT_GROWTH = 4
+
+@dataclass
+class AIMDSettings:
+    initial: int = 2
+    minimum: int = 1
+    maximum: int = 8
+    increase: float = 1.0           # added to the limit per window of healthy calls
+    decrease: float = 0.5           # limit multiplier on overload
+    latency_tolerance: float = 2.0  # recent/baseline latency ratio that counts as overload
+    min_samples: int = 5            # healthy calls per model before latency can cut the limit
+
+@dataclass
+class _LatencyBaseline:
+    baseline: float = 0.0  # slow EWMA: what this model's latency normally is
+    recent: float = 0.0    # fast EWMA: what it is right now
+    samples: int = 0
+
+    def update(self, latency: float):
+        if self.samples == 0:
+            self.baseline = self.recent = latency
+        else:
+            self.baseline += 0.05 * (latency - self.baseline)
+            self.recent += 0.3 * (latency - self.recent)
+        self.samples += 1
+
+@dataclass
+class ProviderConcurrency:
+    """AIMD state for one provider"""
+    settings: AIMDSettings
+    limit: float = 0.0
+    in_flight: int = 0
+    increases: int = 0
+    decreases: int = 0
+    last_decrease: float = 0.0
+    last_reason: Optional[str] = None
+    latencies: Dict[str, _LatencyBaseline] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.limit = float(self.settings.initial)
+
+    @property
+    def current(self) -> int:
+        return max(self.settings.minimum, int(self.limit))
+
+class ConcurrencyController:
+    """Per-provider in-flight limits, adjusted from the outcome of every provider call"""
+
+    def __init__(self, adaptive: bool = True, status_path: Optional[str] = DEFAULT_STATUS_PATH):
+        self.adaptive = adaptive
+        self.status_path = status_path
+        self.providers: Dict[str, ProviderConcurrency] = {}
+        self.lock = threading.Lock()
+
+    def configure(self, limits: Dict[str, int], bounds: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Start each provider at `limits[provider]`; `bounds` holds optional min/max_concurrency per provider"""
+        with self.lock:
+            for provider, initial in limits.items():
+                bound = (bounds or {}).get(provider, {})
+                initial = max(1, int(initial))
+                minimum = int(bound.get("min_concurrency", 1))
+                maximum = int(bound.get("max_concurrency", initial * DEFAULT_GROWTH))
+                self.providers[provider] = ProviderConcurrency(AIMDSettings(
+                    initial=min(max(initial, minimum), maximum), minimum=minimum, maximum=max(maximum, minimum)))
+        self.write_status()
+
+    def _provider(self, provider: str) -> ProviderConcurrency:
+        if provider not in self.providers:
+            self.providers[provider] = ProviderConcurrency(AIMDSettings())
+        return self.providers[provider]
+
+    def limit(self, provider: str) -> int:
+        with self.lock:
+            return self._provider(provider).current
+
+    def maximum(self, provider: str) -> int:
+        """The most calls the provider can ever have in flight (sizes the worker pool)"""
+        with self.lock:
+            state = self._provider(provider)
+            return state.settings.maximum if self.adaptive else state.current
+
+    def try_acquire(self, provider: str) -> bool:
+        """Take an in-flight slot if the provider is under its current limit"""
+        with self.lock:
+            state = self._provider(provider)
+            if state.in_flight >= state.current:
+                return False
+            state.in_flight += 1
+            return True
+
+    def release(self, provider: str):
+        with self.lock:
+            state = self._provider(provider)
+            state.in_flight = max(0, state.in_flight - 1)
+
+    def record_success(self, provider: str, model: str, latency: float, started: float, throttled: bool = False):
+        """A call that started at `started` (time.monotonic()) succeeded after `latency` seconds"""
+        if not self.adaptive:
+            return
+        with self.lock:
+            state = self._provider(provider)
+            history = state.latencies.setdefault(model, _LatencyBaseline())
+            history.update(latency)
+            settings = state.settings
+            if (history.samples > settings.min_samples
+                    and history.recent > settings.latency_tolerance * history.baseline):
+                changed = self._decrease(provider, state, started,
+                                         f"latency {history.recent:.1f}s vs {history.baseline:.1f}s for {model}")
+            elif throttled or state.limit >= settings.maximum:
+                return
+            else:
+                before = state.current
+                state.limit = min(float(settings.maximum), state.limit + settings.increase / max(state.limit, 1.0))
+                changed = state.current != before
+                if changed:
+                    state.increases += 1
+                    logger.info("🎚️ %s concurrency %d -> %d", provider, before, state.current)
+        if changed:
+            self.write_status()
+
+    def record_failure(self, provider: str, error: str, started: float):
+        """A call that started at `started` hit a transient failure (429, 5xx, timeout, ...)"""
+        if not self.adaptive:
+            return
+        with self.lock:
+            changed = self._decrease(provider, self._provider(provider), started, error)
+        if changed:
+            self.write_status()
+
+    def _decrease(self, provider: str, state: ProviderConcurrency, started: float, reason: str) -> bool:
+        """Multiplicative cut, at most once per round of calls in flight when the last cut happened"""
+        if started < state.last_decrease or state.limit <= state.settings.minimum:
+            return False
+        before = state.current
+        state.limit = max(float(state.settings.minimum), state.limit * state.settings.decrease)
+        state.last_decrease = time.monotonic()
+        state.last_reason = reason
+        state.decreases += 1
+        logger.warning("🎚️ %s concurrency %d -> %d (%s)", provider, before, state.current, reason)
+        return True
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current limit, in-flight calls and adjustment counts per provider"""
+        with self.lock:
+            return {provider: {"limit": state.current, "in_flight": state.in_flight,
+                               "min": state.settings.minimum, "max": state.settings.maximum,
+                               "increases": state.increases, "decreases": state.decreases,
+                               "last_decrease": state.last_reason}
+                    for provider, state in sorted(self.providers.items())}
+
+    def write_status(self):
+        """Publish the current limits to the status file"""
+        if not self.status_path:
+            return
+        os.makedirs(os.path.dirname(self.status_path) or '.', exist_ok=True)
+        atomic_write_json(self.status_path, {"adaptive": self.adaptive, "updated": round(time.time(), 3),
+                                             "pid": os.getpid(), "providers": self.snapshot()})
+
+    def log_summary(self):
+        self.write_status()
+        for provider, state in self.snapshot().items():
+            if state["increases"] or state["decreases"]:
+                logger.info("🎚️ %s: concurrency ended at %d (range %d-%d; raised %d, cut %d times)",
+                            provider, state["limit"], state["min"], state["max"], state["increases"],
+                            state["decreases"])
@@ -0,0 +1,236 @@
+"""
+Coordinator and worker loops for distributed sweeps of the Status LLMs research runner.
+
+`run_status_research.py --coordinator` plans the sweep as usual and puts the
+jobs in a shared queue (research.jobqueue). `--worker` processes, on this host or
+others and each with its own API keys, rate limits and adaptive concurrency,
+claim jobs per provider whenever they have a free slot for it, call the models
+and return the parsed results. Only the coordinator writes data/ (result files,
+replicate store, run ledger, results database), once per job.
+
+Jobs travel as JSON carrying the model config, route, temperature, replicate and
+prompt id, so a worker needs the prompt files but not the coordinator's
+sweep.json. A worker whose prompt text differs from the coordinator's refuses
+the job rather than answering a different question.
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from research.backends import Route
+from research.engine import Job, Progress, SweepSummary
+from research.jobqueue import DONE, JobQueue, Lease
+from research.sweep import ModelConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE = 60.0
+
+def job_id(job: Job) -> str:
+    return f"{job.config.name}|{job.temperature}|{job.replicate}|{job.prompt_id}"
+
+def job_payload(job: Job, max_tokens: int, prompt_hash: str) -> Dict[str, Any]:
+    """What a worker needs to run `job`; `max_tokens` is resolved here so the worker's spec doesn't matter"""
+    config = job.config
+    return {"config": {"name": config.name, "api_name": config.api_name, "provider": config.provider,
+                       "endpoint": config.endpoint, "max_tokens": max_tokens,
+                       "reasoning_budget": config.reasoning_budget},
+            "route": asdict(job.route) if job.route is not None else None,
+            "temperature": job.temperature, "replicate": job.replicate,
+            "prompt_id": job.prompt_id, "prompt_hash": prompt_hash}
+
+def payload_job(payload: Dict[str, Any]) -> Job:
+    route = payload.get("route")
+    return Job(ModelConfig(**payload["config"]), payload["temperature"], payload["replicate"],
+               payload["prompt_id"], Route(**route) if route is not None else None)
+
+@dataclass
+class WorkerSummary:
+    claimed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    lost: int = 0  # leases taken over by another worker before the result came back
+    elapsed: float = 0.0
+
+class Worker:
+    """Claims jobs from a queue as the controller's per-provider limits allow and runs them on a thread pool"""
+
+    def __init__(self, queue: JobQueue, execute: Callable[[Job, Dict[str, Any]], Dict[str, Any]],
+                 controller: Any, name: Optional[str] = None, lease: float = DEFAULT_LEASE,
+                 poll: float = 1.0, idle_timeout: float = 30.0, providers: Optional[Set[str]] = None):
+        self.queue = queue
+        self.execute = execute
+        self.controller = controller  # research.concurrency.ConcurrencyController
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = lease
+        self.poll = poll
+        self.idle_timeout = idle_timeout
+        self.providers = providers
+        self.held: Dict[str, Lease] = {}
+        self.lost: Set[str] = set()
+        self.summary = WorkerSummary()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+
+    def run(self, pool_size: int = 32) -> WorkerSummary:
+        """Serve the queue until it has been drained for `idle_timeout` seconds"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        start = time.monotonic()
+        last_beat, idle_since = 0.0, None
+        logger.info("🛰️ Worker %s serving %s", self.name, ", ".join(sorted(self.providers)) if self.providers
+                    else "every provider")
+        executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="worker")
+        try:
+            while True:
+                now = time.monotonic()
+                # Renew well before expiry; also take back the jobs of dead workers if the coordinator is down
+                if now - last_beat >= self.lease / 3:
+                    self.heartbeat()
+                    self.queue.requeue_expired()
+                    last_beat = now
+                if self.claim(executor):
+                    idle_since = None
+                elif not self.held and self.queue.drained():
+                    idle_since = idle_since or now
+                    if now - idle_since >= self.idle_timeout:
+                        break
+                self.wake.wait(self.poll)
+                self.wake.clear()
+        except KeyboardInterrupt:
+            with self.lock:
+                leases = list(self.held.values())
+            for lease in leases:
+                self.queue.release(lease)
+            logger.warning("🛰️ Worker %s stopped, gave back %d jobs", self.name, len(leases))
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+        self.summary.elapsed = time.monotonic() - start
+        return self.summary
+
+    def heartbeat(self):
+        with self.lock:
+            leases = list(self.held.values())
+            info = {"host": socket.gethostname(), "pid": os.getpid(), "in_flight": len(leases),
+                    "succeeded": self.summary.succeeded, "failed": self.summary.failed}
+        held = self.queue.heartbeat(self.name, leases, self.lease, info)
+        for lease in leases:
+            if lease.id not in held and lease.id not in self.lost:
+                self.lost.add(lease.id)
+                logger.warning("🛰️ Lost the lease on %s; its result will be discarded",
+                               payload_job(lease.payload).describe())
+
+    def claim(self, executor: Any) -> int:
+        """Lease as many jobs as the providers' current limits leave room for and start them"""
+        started = 0
+        for provider, count in self.queue.claimable().items():
+            if self.providers and provider not in self.providers:
+                continue
+            slots = 0
+            while slots < count and self.controller.try_acquire(provider):
+                slots += 1
+            if not slots:
+                continue
+            leases = self.queue.claim(self.name, provider, slots, self.lease)
+            for _ in range(slots - len(leases)):
+                self.controller.release(provider)
+            with self.lock:
+                self.summary.claimed += len(leases)
+                for lease in leases:
+                    self.held[lease.id] = lease
+            for lease in leases:
+                executor.submit(self.run_one, lease)
+            started += len(leases)
+        return started
+
+    def run_one(self, lease: Lease):
+        job = payload_job(lease.payload)
+        try:
+            result = self.execute(job, lease.payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.error("❌ %s failed: %s", job.describe(), error)
+            succeeded, accepted = False, self.settle(lease, lambda: self.queue.fail(lease, error))
+        else:
+            succeeded, accepted = True, self.settle(lease, lambda: self.queue.complete(lease, result))
+        finally:
+            self.controller.release(lease.provider)
+        with self.lock:
+            self.held.pop(lease.id, None)
+            if not accepted:
+                self.summary.lost += 1
+            elif succeeded:
+                self.summary.succeeded += 1
+            else:
+                self.summary.failed += 1
+        if not accepted:
+            logger.warning("🛰️ %s was taken over by another worker; discarded this result", job.describe())
+        self.wake.set()
+
+    def settle(self, lease: Lease, update: Callable[[], bool]) -> bool:
+        try:
+            return update()
+        except Exception as e:
+            # The lease runs out and the job goes to another worker
+            logger.error("🛰️ Couldn't report %s to the queue: %s", lease.id, e)
+            return False
+
+def coordinate(queue: JobQueue, jobs: List[Job], commit: Callable[[Job, Any], None], poll: float = 1.0,
+               status_interval: float = 30.0, processes: Optional[List[Any]] = None) -> SweepSummary:
+    """Commit results from the queue as workers finish them, until no job is left.
+
+    `commit(job, finished)` saves one research.jobqueue.Finished result. `processes`
+    are local worker processes (subprocess.Popen); if they all exit while jobs remain
+    the coordinator gives up rather than waiting for workers that won't come.
+    """
+    summary = SweepSummary(total=len(jobs))
+    progress = Progress(jobs)
+    by_id = {job_id(job): job for job in jobs}
+    start = last_status = time.monotonic()
+    while True:
+        for expired_id, worker, state in queue.requeue_expired():
+            logger.warning("🛰️ Lease on %s held by %s expired (worker gone?), job %s", expired_id, worker,
+                           "failed after too many attempts" if state != "pending" else "re-queued")
+        finished = queue.finished()
+        committed = []
+        try:
+            for item in finished:
+                job = by_id.get(item.id) or payload_job(item.payload)
+                commit(job, item)
+                committed.append(item.id)
+                done = progress.update(job) if item.id in by_id else "earlier sweep"
+                if item.state == DONE:
+                    summary.succeeded += 1
+                    logger.info("✅ %s done - %s (%s)", done, job.describe(), item.worker)
+                else:
+                    summary.failed += 1
+                    summary.failures.append((job, item.error))
+                    logger.error("❌ %s - %s failed: %s", done, job.describe(), item.error)
+        finally:
+            queue.mark_committed(committed)
+        if finished:
+            continue
+
+        counts = queue.counts()
+        if not counts["pending"] and not counts["leased"] and not counts["finished"]:
+            break
+        if processes and all(process.poll() is not None for process in processes):
+            logger.error("🛰️ Every local worker has exited with %d jobs pending and %d leased",
+                         counts["pending"], counts["leased"])
+            break
+        now = time.monotonic()
+        if now - last_status >= status_interval:
+            workers = queue.workers(max_age=status_interval * 2)
+            logger.info("🛰️ %d pending, %d in flight on %d workers (%s)", counts["pending"], counts["leased"],
+                        len(workers), ", ".join(sorted(workers)) or "none seen yet")
+            last_status = now
+        time.sleep(poll)
+
+    summary.elapsed = time.monotonic() - start
+    return summary
@@ -0,0 +1,155 @@
+"""
+Concurrent sweep engine for the Status LLMs research runner.
+
+Fans (model, temperature, replicate) jobs out over asyncio with a separate
+concurrency limit per provider, so a slow DeepSeek R1 call never holds up
+OpenAI or Anthropic. The limits come from a ConcurrencyController
+(research.concurrency), which may raise or lower them while the sweep runs.
+Provider calls stay synchronous and run on a dedicated thread pool sized to the
+sum of the providers' maximum limits. asyncio and the thread pool are imported
+when a sweep actually runs, so planning and status stay cheap.
+"""
+
+import os
+import time
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# In-flight request limits per provider. Moonshot's free tier is 6 RPM, so one
+# request at a time is plenty; DeepSeek R1 calls are long but cheap to overlap.
+DEFAULT_PROVIDER_CONCURRENCY = {
+    "anthropic": 4,
+    "google": 4,
+    "xai": 2,
+    "moonshot": 1,
+    "deepseek": 4,
+    "openai": 8,
+    "aimlapi": 8,
+}
+
+@dataclass(frozen=True)
+class Job:
+    config: Any  # research.sweep.ModelConfig
+    temperature: float
+    replicate: int = 0
+    prompt_id: str = "default"
+    route: Any = None  # research.backends.Route; None means the native provider API
+
+    @property
+    def provider(self) -> str:
+        """Rate-limit/concurrency key: the provider, or the route's key when it goes elsewhere"""
+        return self.route.key(self.config.provider) if self.route is not None else self.config.provider
+
+    def describe(self) -> str:
+        suffix = f" #{self.replicate}" if self.replicate else ""
+        if self.prompt_id != "default":
+            suffix += f" [{self.prompt_id}]"
+        return f"{self.config.name} @ {self.temperature}{suffix}"
+
+@dataclass
+class SweepSummary:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    failures: List[Tuple[Job, str]] = field(default_factory=list)
+
+def result_path(name: str, temperature: float, data_dir: str = 'data') -> str:
+    """Legacy single-sample output file, data/{name}_{temp}.json"""
+    return os.path.join(data_dir, f"{name}_{temperature}.json")
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+class Progress:
+    """Completion counter with an ETA from each provider's observed throughput"""
+
+    def __init__(self, jobs: List[Job], parallel: bool = True):
+        self.total = len(jobs)
+        self.parallel = parallel
+        self.remaining = Counter(job.provider for job in jobs)
+        self.finished: Counter = Counter()
+        self.start = time.monotonic()
+
+    def update(self, job: Job) -> str:
+        """Count one finished job (successful or not) and describe progress so far"""
+        self.remaining[job.provider] -= 1
+        self.finished[job.provider] += 1
+        done = sum(self.finished.values())
+        elapsed = time.monotonic() - self.start
+        if self.parallel:
+            # Providers drain side by side; the slowest queue decides when we're done
+            eta = max((self.remaining[p] * elapsed / self.finished[p]
+                       for p in self.remaining if self.remaining[p] and self.finished[p]), default=0.0)
+        else:
+            eta = sum(self.remaining.values()) * elapsed / done
+        return f"{done}/{self.total}" + (f", ETA {format_duration(eta)}" if done < self.total else "")
+
+async def run_sweep(jobs: List[Job], worker: Callable[[Job], None],
+                    concurrency: Optional[Dict[str, int]] = None,
+                    default_concurrency: int = 2, controller: Any = None) -> SweepSummary:
+    """Run every job through `worker` concurrently, bounded per provider.
+
+    Without a `controller`, each provider is held at a fixed limit from `concurrency`
+    (and DEFAULT_PROVIDER_CONCURRENCY).
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from research.concurrency import ConcurrencyController
+
+    providers = {job.provider for job in jobs}
+    if controller is None:
+        limits = dict(DEFAULT_PROVIDER_CONCURRENCY)
+        limits.update(concurrency or {})
+        controller = ConcurrencyController(adaptive=False, status_path=None)
+        controller.configure({p: limits.get(p, default_concurrency) for p in providers})
+    pool_size = max(1, sum(controller.maximum(p) for p in providers))
+
+    summary = SweepSummary(total=len(jobs))
+    progress = Progress(jobs)
+    loop = asyncio.get_running_loop()
+    # Set whenever one of the provider's jobs finishes, which is also when its limit may have gone up
+    slot_freed = {p: asyncio.Event() for p in providers}
+    start = time.monotonic()
+
+    async def run_one(job: Job):
+        try:
+            await loop.run_in_executor(executor, worker, job)
+            summary.succeeded += 1
+            logger.info("✅ %s done - %s", progress.update(job), job.describe())
+        except Exception as e:
+            summary.failed += 1
+            summary.failures.append((job, f"{type(e).__name__}: {e}"))
+            logger.error("❌ %s - failed to process %s: %s", progress.update(job), job.describe(), e)
+        finally:
+            controller.release(job.provider)
+            slot_freed[job.provider].set()
+
+    async def dispatch(provider: str, queue: List[Job]):
+        """Start the provider's jobs in order, each as soon as it is under its current limit"""
+        running = []
+        for job in queue:
+            while not controller.try_acquire(provider):
+                slot_freed[provider].clear()
+                await slot_freed[provider].wait()
+            running.append(asyncio.ensure_future(run_one(job)))
+        await asyncio.gather(*running)
+
+    queues: Dict[str, List[Job]] = {}
+    for job in jobs:
+        queues.setdefault(job.provider, []).append(job)
+    with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sweep") as executor:
+        await asyncio.gather(*(dispatch(provider, queue) for provider, queue in queues.items()))
+
+    summary.elapsed = time.monotonic() - start
+    return summary
@@ -0,0 +1,330 @@
+"""
+Columnar export of every collected rating for the Status LLMs research project.
+
+Compiles the legacy data/{model}_{temp}.json files and the replicate JSONL store,
+for the default prompt and every prompt variant, into one flat Arrow table (one row per rated item) with dictionary-encoded
+string columns, and writes it as Parquet (or Arrow IPC for zero-copy memory
+mapping). Rebuilds are incremental: each source file becomes its own part under
+data/ratings-parts/, legacy files are re-read only when they change, and JSONL
+shards are only read past the byte offset that was already exported.
+
+Usage:
+    python -m research.export                      # -> data/ratings.parquet
+    python -m research.export --output data/ratings.arrow
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import argparse
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = 'data'
+DEFAULT_OUTPUT = os.path.join('data', 'ratings.parquet')
+PARTS_DIRNAME = 'ratings-parts'
+MANIFEST_NAME = 'manifest.json'
+# Bumped when the part schema changes; parts written by another version are exported again
+PARTS_VERSION = 3
+
+# Fallback provider lookup for legacy files, whose names only carry the model
+PROVIDER_PREFIXES = {
+    "claude": "anthropic",
+    "gemini": "google",
+    "grok": "xai",
+    "kimi": "moonshot",
+    "deepseek": "deepseek",
+    "gpt": "openai",
+}
+
+STRING_COLUMNS = ["prompt_id", "model", "provider", "source", "name", "normalized_name", "type"]
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+def normalize_name(name: str) -> str:
+    """Case-, accent- and punctuation-insensitive form of an item name"""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return _SPACES.sub(' ', _NON_WORD.sub(' ', name.lower())).strip()
+
+def infer_provider(model: str) -> Optional[str]:
+    """Guess a provider from a model name like 'claude-opus-4' or 'example-gpt-4o'"""
+    for part in model.split('-'):
+        for prefix, provider in PROVIDER_PREFIXES.items():
+            if part.startswith(prefix):
+                return provider
+    return None
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise ImportError("Columnar export needs pyarrow: pip install pyarrow")
+
+def parse_result_filename(filename: str):
+    """Split '{model}_{temperature}.json' into (model, temperature); model names may contain '_'"""
+    stem = filename[:-len('.json')]
+    model, _, temp = stem.rpartition('_')
+    try:
+        return model, float(temp)
+    except ValueError:
+        return None, None
+
+def _rows_for(record: Dict[str, Any], source: str, prompt_id: str, rows: Dict[str, List[Any]]):
+    for index, item in enumerate(record.get("items") or []):
+        rows["prompt_id"].append(prompt_id)
+        rows["model"].append(record["model"])
+        rows["provider"].append(record.get("provider"))
+        rows["temperature"].append(float(record["temperature"]))
+        rows["replicate"].append(int(record.get("replicate", 0)))
+        rows["source"].append(source)
+        rows["item_index"].append(index)
+        rows["name"].append(item.get("name"))
+        rows["normalized_name"].append(normalize_name(item.get("name") or ""))
+        rows["type"].append(item.get("type"))
+        rating = item.get("rating")
+        rows["rating"].append(float(rating) if isinstance(rating, (int, float)) else None)
+
+def _build_table(rows: Dict[str, List[Any]]):
+    pa = _require_pyarrow()
+    columns = {
+        "prompt_id": pa.array(rows["prompt_id"], pa.string()),
+        "model": pa.array(rows["model"], pa.string()),
+        "provider": pa.array(rows["provider"], pa.string()),
+        # float64 so 0.7 reads back as 0.7 and matches the temperatures in sweep.json
+        "temperature": pa.array(rows["temperature"], pa.float64()),
+        "replicate": pa.array(rows["replicate"], pa.int32()),
+        "source": pa.array(rows["source"], pa.string()),
+        "item_index": pa.array(rows["item_index"], pa.int16()),
+        "name": pa.array(rows["name"], pa.string()),
+        "normalized_name": pa.array(rows["normalized_name"], pa.string()),
+        "type": pa.array(rows["type"], pa.string()),
+        "rating": pa.array(rows["rating"], pa.float32()),
+    }
+    for name in STRING_COLUMNS:
+        columns[name] = columns[name].dictionary_encode()
+    return pa.table(columns)
+
+def _empty_rows() -> Dict[str, List[Any]]:
+    return {name: [] for name in ("prompt_id", "model", "provider", "temperature", "replicate", "source",
+                                  "item_index", "name", "normalized_name", "type", "rating")}
+
+class ColumnarExporter:
+    """Maintains data/ratings-parts/ incrementally and writes the combined table.
+
+    `data_dirs` maps prompt id -> its data directory (research.sweep.prompt_data_dir);
+    by default only the default prompt's results in `data_dir` are exported.
+    """
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, providers: Optional[Dict[str, str]] = None,
+                 data_dirs: Optional[Dict[str, str]] = None):
+        self.data_dir = data_dir
+        self.data_dirs = data_dirs or {'default': data_dir}
+        self.parts_dir = os.path.join(data_dir, PARTS_DIRNAME)
+        self.manifest_path = os.path.join(self.parts_dir, MANIFEST_NAME)
+        self.providers = providers or {}
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == PARTS_VERSION:
+                return manifest
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {"version": PARTS_VERSION, "files": {}, "shards": {}}
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _write_part(self, rows: Dict[str, List[Any]], part_id: str) -> str:
+        import pyarrow.parquet as pq
+        name = f"part-{part_id}.parquet"
+        pq.write_table(_build_table(rows), os.path.join(self.parts_dir, name))
+        return name
+
+    def _remove_part(self, name: str):
+        try:
+            os.remove(os.path.join(self.parts_dir, name))
+        except FileNotFoundError:
+            pass
+
+    def _source_key(self, path: str) -> str:
+        """Manifest key of a source file: its path relative to the data directory"""
+        return os.path.relpath(path, self.data_dir).replace(os.sep, '/')
+
+    def _update_files(self, manifest: Dict[str, Any], prompt_id: str, data_dir: str, seen: set) -> int:
+        """Legacy one-file-per-cell results: re-export a file only when it changes"""
+        written = 0
+        for filename in sorted(os.listdir(data_dir)):
+            if not filename.endswith('.json'):
+                continue
+            model, temperature = parse_result_filename(filename)
+            if model is None:
+                continue
+            path = os.path.join(data_dir, filename)
+            key = self._source_key(path)
+            st = os.stat(path)
+            seen.add(key)
+            previous = manifest["files"].get(key)
+            if previous and previous["mtime"] == st.st_mtime and previous["size"] == st.st_size:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Skipping unreadable result file %s: %s", path, e)
+                continue
+            if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+                logger.warning("Skipping result file %s: not an object with an items list", path)
+                continue
+            record = {"model": model, "temperature": temperature, "replicate": 0,
+                      "provider": self.providers.get(model) or infer_provider(model),
+                      "items": data.get("items")}
+            rows = _empty_rows()
+            _rows_for(record, "file", prompt_id, rows)
+            if previous:
+                self._remove_part(previous["part"])
+            part_id = hashlib.sha1(f"{key}:{st.st_mtime}:{st.st_size}".encode()).hexdigest()[:16]
+            manifest["files"][key] = {"mtime": st.st_mtime, "size": st.st_size,
+                                      "part": self._write_part(rows, part_id)}
+            written += 1
+        return written
+
+    def _update_shards(self, manifest: Dict[str, Any], prompt_id: str, store_dir: str, seen: set) -> int:
+        """Append-only replicate shards: only read what was appended since the last export"""
+        written = 0
+        if not os.path.isdir(store_dir):
+            return written
+        for shard in sorted(os.listdir(store_dir)):
+            if not shard.endswith('.jsonl'):
+                continue
+            path = os.path.join(store_dir, shard)
+            key = self._source_key(path)
+            seen.add(key)
+            state = manifest["shards"].setdefault(key, {"offset": 0, "parts": []})
+            size = os.path.getsize(path)
+            if size < state["offset"]:
+                # Shard was rewritten; start over
+                for part in state["parts"]:
+                    self._remove_part(part)
+                state.update(offset=0, parts=[])
+            if size == state["offset"]:
+                continue
+            rows = _empty_rows()
+            with open(path, 'rb') as f:
+                f.seek(state["offset"])
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # record still being written
+                    state_offset = state["offset"] + len(line)
+                    try:
+                        _rows_for(json.loads(line), "store", prompt_id, rows)
+                    except (json.JSONDecodeError, KeyError):
+                        logger.warning("Skipping unreadable record in %s", path)
+                    state["offset"] = state_offset
+            if rows["model"]:
+                part_id = hashlib.sha1(f"{key}:{state['offset']}".encode()).hexdigest()[:16]
+                state["parts"].append(self._write_part(rows, part_id))
+                written += 1
+        return written
+
+    def update(self) -> int:
+        """Bring the parts up to date with data/; returns how many parts were written"""
+        _require_pyarrow()
+        os.makedirs(self.parts_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        written = 0
+        if not manifest["files"] and not manifest["shards"]:
+            # Fresh start (or parts from an older schema): don't leave stale parts behind
+            for name in os.listdir(self.parts_dir):
+                if name.startswith('part-') and name.endswith('.parquet'):
+                    self._remove_part(name)
+
+        seen = set()
+        for prompt_id, data_dir in self.data_dirs.items():
+            if os.path.isdir(data_dir):
+                written += self._update_files(manifest, prompt_id, data_dir, seen)
+                written += self._update_shards(manifest, prompt_id, os.path.join(data_dir, 'replicates'), seen)
+        # Sources that are gone, or belong to prompts not exported this time
+        for key in set(manifest["files"]) - seen:
+            self._remove_part(manifest["files"].pop(key)["part"])
+        for key in set(manifest["shards"]) - seen:
+            for part in manifest["shards"].pop(key)["parts"]:
+                self._remove_part(part)
+
+        self._save_manifest(manifest)
+        if written:
+            logger.info("📦 Exported %d new columnar parts", written)
+        return written
+
+    def table(self):
+        """Combined table of all parts; legacy files are dropped for cells the replicate store covers"""
+        pa = _require_pyarrow()
+        import pyarrow.parquet as pq
+        import pyarrow.compute as pc
+
+        manifest = self._load_manifest()
+        parts = [entry["part"] for entry in manifest["files"].values()]
+        parts += [part for state in manifest["shards"].values() for part in state["parts"]]
+        if not parts:
+            return _build_table(_empty_rows())
+        tables = [pq.read_table(os.path.join(self.parts_dir, part)) for part in parts]
+        table = pa.concat_tables(tables, promote_options="permissive").unify_dictionaries()
+
+        is_store = pc.equal(table["source"], "store")
+        if pc.any(is_store).as_py():
+            cell_columns = ["prompt_id", "model", "temperature"]
+            cells = table.filter(is_store).select(cell_columns).group_by(cell_columns).aggregate([])
+            cell_keys = pc.binary_join_element_wise(
+                *(pc.cast(cells[name], pa.string()) for name in cell_columns), "|")
+            row_keys = pc.binary_join_element_wise(
+                *(pc.cast(table[name], pa.string()) for name in cell_columns), "|")
+            duplicate = pc.and_(pc.invert(is_store), pc.is_in(row_keys, value_set=cell_keys))
+            table = table.filter(pc.invert(duplicate))
+        return table.combine_chunks()
+
+    def write(self, output: str = DEFAULT_OUTPUT):
+        """Update parts and write the combined table to .parquet or .arrow"""
+        self.update()
+        table = self.table()
+        tmp = output + '.tmp'
+        if output.endswith('.arrow') or output.endswith('.feather'):
+            import pyarrow.feather as feather
+            feather.write_feather(table, tmp, compression='uncompressed')
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp)
+        os.replace(tmp, output)
+        logger.info("📦 Wrote %d rated items to %s", table.num_rows, output)
+        return table
+
+def read_ratings(path: str = DEFAULT_OUTPUT):
+    """Load an exported table, memory-mapped (zero-copy for uncompressed .arrow files)"""
+    _require_pyarrow()
+    if path.endswith('.arrow') or path.endswith('.feather'):
+        import pyarrow.feather as feather
+        return feather.read_table(path, memory_map=True)
+    import pyarrow.parquet as pq
+    return pq.read_table(path, memory_map=True)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Export all ratings to a columnar table")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--output', default=None, help="output .parquet or .arrow file")
+    args = parser.parse_args()
+    ColumnarExporter(args.data_dir).write(args.output or os.path.join(args.data_dir, 'ratings.parquet'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Incremental extraction of the {"items": [...]} object from model responses.
+
+`ItemExtractor` consumes response text chunk by chunk, as it streams in. It skips
+prose, markdown fences and anything else before the first JSON object, follows
+the object's structure without buffering it, and parses and validates each
+element of "items" the moment its closing brace arrives. A bad item, or an
+element that isn't an object at all, raises straight away, and memory use stays
+at one item regardless of response length. Other keys of the root object are
+kept in the result, as json.loads would have kept them.
+
+With `repair=True` near-valid output is fixed up locally instead of rejected:
+trailing commas inside an item, ratings given as strings ("85" or "85/100"),
+type names in the wrong case or plural, and a root object that was cut off
+after the items array closed. Each fix is counted in the result's "repairs".
+`ITEMS_SCHEMA` is the same contract as a JSON Schema, for providers that can
+constrain their output to one.
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+VALID_TYPES = ("activity", "object")
+REQUIRED_KEYS = ("name", "type", "rating")
+
+# Structural characters outside strings, and the characters that end a string run
+_STRUCTURAL = re.compile(r'["{}\[\]:,]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_RATING_TEXT = re.compile(r'\s*(\d+(?:\.\d+)?)\s*(?:/\s*100)?\s*$')
+
+ITEMS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "type": {"type": "string", "enum": list(VALID_TYPES)},
+                    "rating": {"type": "integer", "minimum": 1, "maximum": 100},
+                },
+                "required": list(REQUIRED_KEYS),
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["items"],
+    "additionalProperties": False,
+}
+
+class ResponseParseError(ValueError):
+    """Response does not contain a valid items object"""
+
+def validate_item(item: Any) -> Dict[str, Any]:
+    """Check one item against the name/type/rating rules"""
+    if not isinstance(item, dict) or not all(key in item for key in REQUIRED_KEYS):
+        raise ResponseParseError("Item missing required keys")
+    if item["type"] not in VALID_TYPES:
+        raise ResponseParseError(f"Invalid type: {item['type']}")
+    if not isinstance(item["rating"], (int, float)) or not 1 <= item["rating"] <= 100:
+        raise ResponseParseError(f"Invalid rating: {item['rating']}")
+    return item
+
+def repair_item(item: Any) -> Tuple[Any, int]:
+    """Coerce near-valid item values into shape; returns the item and how many fixes it took"""
+    if not isinstance(item, dict):
+        return item, 0
+    item, fixes = dict(item), 0
+    kind = item.get("type")
+    if isinstance(kind, str) and kind not in VALID_TYPES:
+        normalized = kind.strip().lower()
+        normalized = normalized[:-3] + "y" if normalized.endswith("ies") else normalized.rstrip("s")
+        if normalized in VALID_TYPES:
+            item["type"], fixes = normalized, fixes + 1
+    rating = item.get("rating")
+    if isinstance(rating, str):
+        match = _RATING_TEXT.match(rating)
+        if match:
+            value = float(match.group(1))
+            item["rating"], fixes = int(value) if value.is_integer() else value, fixes + 1
+    return item, fixes
+
+class ItemExtractor:
+    """Streaming parser: feed() chunks, get validated items back as soon as each one is complete"""
+
+    def __init__(self, max_items: Optional[int] = None, repair: bool = False):
+        self.max_items = max_items
+        self.repair = repair
+        self.repairs = 0
+        self.items: List[Dict[str, Any]] = []
+        self.seen_object = False
+        self.found_items = False
+        self.done = False
+        self.chars = 0
+
+        self._depth = 0                 # nesting depth inside the current root object
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []    # current root-level string (possible key)
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._items_depth = None        # depth of the items array once entered
+        self._item: Optional[List[str]] = None  # buffer for the item being read
+        self._value: Optional[List[str]] = None  # buffer for a root-level value other than "items"
+        self.extra: Dict[str, Any] = {}  # the root object's other keys, in order
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume more response text; returns the items completed by this chunk"""
+        completed = []
+        self.chars += len(chunk)
+        pos, end = 0, len(chunk)
+        while pos < end and not self.done:
+            if self._in_string:
+                pos = self._scan_string(chunk, pos, end)
+                continue
+
+            if self._depth == 0:
+                start = chunk.find('{', pos)
+                if start == -1:
+                    break
+                self.seen_object = True
+                self._depth = 1
+                self._key = self._last_string = None
+                self.extra = {}
+                pos = start + 1
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            stop = match.start() if match else end
+            if self._item is not None:
+                self._item.append(chunk[pos:stop])
+            elif self._value is not None:
+                self._value.append(chunk[pos:stop])
+            elif self._depth == self._items_depth and chunk[pos:stop].strip():
+                raise ResponseParseError(f"Item is not an object: {chunk[pos:stop].strip()[:50]}")
+            if not match:
+                break
+            char = match.group()
+            pos = stop + 1
+            if self._value is not None and self._depth == 1 and char in ',}':
+                self._finish_value()
+            elif self._item is not None:
+                self._item.append(char)
+            elif self._value is not None:
+                self._value.append(char)
+            elif self._depth == self._items_depth and char in '"[':
+                raise ResponseParseError("Item is not an object")
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._string = []
+            elif char in '{[':
+                if char == '[' and self._depth == 1 and self._key == "items":
+                    self._items_depth = 2
+                    self.found_items = True
+                elif char == '{' and self._items_depth is not None and self._depth == self._items_depth:
+                    self._item = ['{']
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._item is not None and self._depth == self._items_depth:
+                    completed.append(self._finish_item())
+                elif char == ']' and self._items_depth is not None and self._depth == 1:
+                    self._items_depth = None
+                elif self._depth == 0:
+                    if self.found_items:
+                        self.done = True
+                    # otherwise keep looking for a later object that has "items"
+            elif char == ':' and self._depth == 1:
+                self._key = self._last_string
+                if self._key == "items":
+                    self.extra.setdefault("items", None)  # keeps its place among the other keys
+                else:
+                    self._value = []
+        return completed
+
+    def _scan_string(self, chunk: str, pos: int, end: int) -> int:
+        if self._escape:
+            self._escape = False
+            self._append_string(chunk[pos])
+            return pos + 1
+        match = _STRING_SPECIAL.search(chunk, pos)
+        stop = match.start() if match else end
+        self._append_string(chunk[pos:stop])
+        if not match:
+            return end
+        char = match.group()
+        self._append_string(char)
+        if char == '\\':
+            self._escape = True
+        else:
+            self._in_string = False
+            if self._depth == 1:
+                self._last_string = ''.join(self._string)[:-1]
+        return stop + 1
+
+    def _append_string(self, text: str):
+        if self._item is not None:
+            self._item.append(text)
+            return
+        if self._value is not None:
+            self._value.append(text)
+        if self._depth == 1:
+            self._string.append(text)
+
+    def _finish_value(self):
+        text = ''.join(self._value).strip()
+        self._value = None
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            fixed = _TRAILING_COMMA.sub(r'\1', text) if self.repair else text
+            try:
+                value = json.loads(fixed) if fixed != text else None
+            except json.JSONDecodeError:
+                value = None
+            if value is None:
+                raise ResponseParseError(f"Invalid JSON for '{self._key}': {e}")
+            self.repairs += 1
+        self.extra[self._key] = value
+
+    def _finish_item(self) -> Dict[str, Any]:
+        text = ''.join(self._item)
+        self._item = None
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as e:
+            fixed = _TRAILING_COMMA.sub(r'\1', text) if self.repair else text
+            if fixed == text:
+                raise ResponseParseError(f"Invalid item JSON: {e}")
+            try:
+                item = json.loads(fixed)
+            except json.JSONDecodeError:
+                raise ResponseParseError(f"Invalid item JSON: {e}")
+            self.repairs += 1
+        if self.repair:
+            item, fixes = repair_item(item)
+            self.repairs += fixes
+        validate_item(item)
+        self.items.append(item)
+        if self.max_items is not None and len(self.items) > self.max_items:
+            raise ResponseParseError(f"Response exceeded the {self.max_items}-item budget")
+        return item
+
+    def finish(self) -> Dict[str, Any]:
+        """Final result once the whole response has been fed"""
+        if not self.seen_object:
+            raise ResponseParseError("No JSON found in response")
+        if not self.found_items:
+            raise ResponseParseError("Missing 'items' key in response")
+        if not self.done:
+            # Cut off after the items array closed: nothing of the answer is missing
+            if not (self.repair and self._items_depth is None and self._item is None and self._depth == 1):
+                raise ResponseParseError("Incomplete JSON in response")
+            self.repairs += 1
+        result = {**self.extra, "items": self.items}
+        if self.repairs:
+            result["repairs"] = self.repairs
+        return result
+
+def extract_items(response: str, repair: bool = False) -> Dict[str, Any]:
+    """Parse a complete response in one go"""
+    extractor = ItemExtractor(repair=repair)
+    extractor.feed(response)
+    return extractor.finish()
@@ -0,0 +1,704 @@
+"""
+Shared job queue for distributed sweeps of the Status LLMs research runner.
+
+A coordinator puts the sweep's (model, temperature, replicate, prompt) jobs in a
+queue; workers in other processes or on other hosts claim them, call the models
+and hand back the parsed results, which the coordinator alone saves to data/
+(see research.distributed). The queue makes that exactly-once:
+- a claim is a lease that runs out unless the worker's heartbeat renews it, so
+  the jobs of a worker that died go back to pending once their lease expires,
+  and fail for good after `max_deliveries` claims;
+- every claim hands out a new fencing token and a result is only accepted with
+  the current one, so a worker that lost its lease can't overwrite the result of
+  the worker that took the job over;
+- finished jobs stay uncommitted until the coordinator has saved them, so a
+  coordinator restart picks up results that arrived while it was down.
+
+Backends:
+    SQLiteJobQueue  a SQLite file (WAL), for processes on one host (default data/queue.db)
+    RedisJobQueue   any Redis-compatible server; atomic Lua scripts, needs the redis package
+    MemoryJobQueue  in-process stand-in with the same semantics, for tests and single-process runs
+`open_queue()` picks one from a URL. Leases use wall-clock time, so hosts sharing
+a queue need roughly synchronized clocks (well within the lease length).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.path.join('data', 'queue.db')
+DEFAULT_MAX_DELIVERIES = 3
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+# (job id, provider, payload): the provider is the rate-limit/concurrency key workers claim by
+QueuedJob = Tuple[str, str, Dict[str, Any]]
+
+@dataclass
+class Lease:
+    """A claimed job; `token` must accompany its result"""
+    id: str
+    provider: str
+    payload: Dict[str, Any]
+    token: int
+
+@dataclass
+class Finished:
+    """A done or failed job waiting for the coordinator to commit it"""
+    id: str
+    state: str
+    payload: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    worker: Optional[str] = None
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+class JobQueue:
+    """Base class: leased, fenced job queue shared by a coordinator and its workers"""
+
+    def __init__(self, max_deliveries: int = DEFAULT_MAX_DELIVERIES):
+        self.max_deliveries = max_deliveries
+
+    def enqueue(self, jobs: Iterable[QueuedJob]) -> int:
+        """Add jobs as pending; returns how many were added.
+
+        A job already pending, leased or waiting to be committed is left alone. One that
+        was committed or failed before is reset, so re-running a sweep re-queues it.
+        """
+        raise NotImplementedError
+
+    def drop_pending(self, keep: Set[str]) -> int:
+        """Remove pending jobs whose id is not in `keep` (left over from an earlier sweep)"""
+        raise NotImplementedError
+
+    def claimable(self) -> Dict[str, int]:
+        """Pending jobs per provider"""
+        raise NotImplementedError
+
+    def claim(self, worker: str, provider: str, limit: int, lease: float) -> List[Lease]:
+        """Lease up to `limit` of the provider's pending jobs to `worker` for `lease` seconds"""
+        raise NotImplementedError
+
+    def heartbeat(self, worker: str, leases: List[Lease], lease: float, info: Optional[Dict[str, Any]] = None
+                  ) -> Set[str]:
+        """Extend the worker's leases and mark it alive; returns the ids it still holds"""
+        raise NotImplementedError
+
+    def complete(self, lease: Lease, result: Dict[str, Any]) -> bool:
+        """Store a job's result; False if the lease was lost and the result discarded"""
+        raise NotImplementedError
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        """Give a job back after an error: pending again, or failed once out of deliveries"""
+        raise NotImplementedError
+
+    def release(self, lease: Lease) -> bool:
+        """Give a job back unattempted (worker shutting down); doesn't count as a delivery"""
+        raise NotImplementedError
+
+    def requeue_expired(self) -> List[Tuple[str, Optional[str], str]]:
+        """Take back expired leases; returns (id, worker, new state) for each"""
+        raise NotImplementedError
+
+    def finished(self, limit: int = 500) -> List[Finished]:
+        """Done and failed jobs not yet committed, oldest first"""
+        raise NotImplementedError
+
+    def mark_committed(self, ids: List[str]):
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        """Jobs pending, leased, and finished but not yet committed"""
+        raise NotImplementedError
+
+    def workers(self, max_age: float = 60.0) -> Dict[str, Dict[str, Any]]:
+        """Workers seen within the last `max_age` seconds, with what they last reported"""
+        raise NotImplementedError
+
+    def drained(self) -> bool:
+        """Nothing left to claim or in flight"""
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def close(self):
+        pass
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    worker TEXT,
+    token INTEGER NOT NULL DEFAULT 0,
+    deliveries INTEGER NOT NULL DEFAULT 0,
+    expires REAL,
+    result TEXT,
+    error TEXT,
+    committed INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claimable ON jobs (state, provider, seq);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (committed, state, updated);
+
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    info TEXT,
+    seen REAL NOT NULL
+);
+"""
+
+class SQLiteJobQueue(JobQueue):
+    """Queue in a SQLite file; claims run in IMMEDIATE transactions, so processes never claim the same job"""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_deliveries: int = DEFAULT_MAX_DELIVERIES):
+        super().__init__(max_deliveries)
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Autocommit; every write below opens its own IMMEDIATE transaction
+        self.conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _write(self, statements):
+        """Run `statements(conn)` in one IMMEDIATE transaction and return its result"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def _read(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def enqueue(self, jobs: Iterable[QueuedJob]) -> int:
+        jobs = list(jobs)
+        now = time.time()
+
+        def statements(conn):
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM jobs").fetchone()[0]
+            added = 0
+            for job_id, provider, payload in jobs:
+                seq += 1
+                cursor = conn.execute("""
+                    INSERT INTO jobs (id, provider, payload, state, seq, updated) VALUES (?, ?, ?, 'pending', ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        provider = excluded.provider, payload = excluded.payload, state = 'pending',
+                        seq = excluded.seq, worker = NULL, deliveries = 0, expires = NULL, result = NULL,
+                        error = NULL, committed = 0, updated = excluded.updated
+                    WHERE jobs.committed = 1""",
+                    (job_id, provider, _dumps(payload), seq, now))
+                added += cursor.rowcount
+            return added
+        return self._write(statements)
+
+    def drop_pending(self, keep: Set[str]) -> int:
+        def statements(conn):
+            ids = [row[0] for row in conn.execute("SELECT id FROM jobs WHERE state = 'pending'")
+                   if row[0] not in keep]
+            conn.executemany("DELETE FROM jobs WHERE id = ? AND state = 'pending'", [(i,) for i in ids])
+            return len(ids)
+        return self._write(statements)
+
+    def claimable(self) -> Dict[str, int]:
+        return dict(self._read("SELECT provider, COUNT(*) FROM jobs WHERE state = 'pending' GROUP BY provider"))
+
+    def claim(self, worker: str, provider: str, limit: int, lease: float) -> List[Lease]:
+        now = time.time()
+
+        def statements(conn):
+            rows = conn.execute("""
+                SELECT id, payload, token FROM jobs WHERE state = 'pending' AND provider = ?
+                ORDER BY seq LIMIT ?""", (provider, limit)).fetchall()
+            conn.executemany("""
+                UPDATE jobs SET state = 'leased', worker = ?, token = token + 1, deliveries = deliveries + 1,
+                                expires = ?, updated = ?
+                WHERE id = ?""", [(worker, now + lease, now, job_id) for job_id, _, _ in rows])
+            return [Lease(job_id, provider, json.loads(payload), token + 1) for job_id, payload, token in rows]
+        return self._write(statements)
+
+    def heartbeat(self, worker: str, leases: List[Lease], lease: float, info: Optional[Dict[str, Any]] = None
+                  ) -> Set[str]:
+        now = time.time()
+
+        def statements(conn):
+            held = set()
+            for held_lease in leases:
+                cursor = conn.execute("""
+                    UPDATE jobs SET expires = ? WHERE id = ? AND state = 'leased' AND token = ? AND worker = ?""",
+                    (now + lease, held_lease.id, held_lease.token, worker))
+                if cursor.rowcount:
+                    held.add(held_lease.id)
+            conn.execute("INSERT OR REPLACE INTO workers (name, info, seen) VALUES (?, ?, ?)",
+                         (worker, _dumps(info or {}), now))
+            return held
+        return self._write(statements)
+
+    def _settle(self, lease: Lease, sql: str, params: Tuple) -> bool:
+        """Apply an update to a job only while `lease` is its current one"""
+        def statements(conn):
+            return conn.execute(sql + " WHERE id = ? AND state = 'leased' AND token = ?",
+                                params + (lease.id, lease.token)).rowcount > 0
+        return self._write(statements)
+
+    def complete(self, lease: Lease, result: Dict[str, Any]) -> bool:
+        return self._settle(lease, "UPDATE jobs SET state = 'done', result = ?, error = NULL, expires = NULL, "
+                                   "committed = 0, updated = ?", (_dumps(result), time.time()))
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        return self._settle(lease, "UPDATE jobs SET state = CASE WHEN deliveries >= ? THEN 'failed' ELSE 'pending' END, "
+                                   "error = ?, expires = NULL, updated = ?",
+                            (self.max_deliveries, error, time.time()))
+
+    def release(self, lease: Lease) -> bool:
+        return self._settle(lease, "UPDATE jobs SET state = 'pending', deliveries = deliveries - 1, "
+                                   "expires = NULL, updated = ?", (time.time(),))
+
+    def requeue_expired(self) -> List[Tuple[str, Optional[str], str]]:
+        now = time.time()
+
+        def statements(conn):
+            rows = conn.execute("SELECT id, worker, deliveries FROM jobs WHERE state = 'leased' AND expires < ?",
+                                (now,)).fetchall()
+            requeued = []
+            for job_id, worker, deliveries in rows:
+                state = FAILED if deliveries >= self.max_deliveries else PENDING
+                conn.execute("UPDATE jobs SET state = ?, error = ?, expires = NULL, updated = ? WHERE id = ?",
+                             (state, f"lease held by {worker} expired", now, job_id))
+                requeued.append((job_id, worker, state))
+            return requeued
+        return self._write(statements)
+
+    def finished(self, limit: int = 500) -> List[Finished]:
+        rows = self._read("""
+            SELECT id, state, payload, result, error, worker FROM jobs
+            WHERE committed = 0 AND state IN ('done', 'failed') ORDER BY updated LIMIT ?""", (limit,))
+        return [Finished(job_id, state, json.loads(payload), json.loads(result) if result else None, error, worker)
+                for job_id, state, payload, result, error, worker in rows]
+
+    def mark_committed(self, ids: List[str]):
+        self._write(lambda conn: conn.executemany("UPDATE jobs SET committed = 1 WHERE id = ?",
+                                                  [(job_id,) for job_id in ids]))
+
+    def counts(self) -> Dict[str, int]:
+        rows = dict(self._read("""
+            SELECT CASE WHEN state IN ('done', 'failed') THEN 'finished' ELSE state END, COUNT(*) FROM jobs
+            WHERE state IN ('pending', 'leased') OR committed = 0 GROUP BY 1"""))
+        return {PENDING: rows.get(PENDING, 0), LEASED: rows.get(LEASED, 0), "finished": rows.get("finished", 0)}
+
+    def workers(self, max_age: float = 60.0) -> Dict[str, Dict[str, Any]]:
+        rows = self._read("SELECT name, info, seen FROM workers WHERE seen >= ?", (time.time() - max_age,))
+        return {name: {**json.loads(info or '{}'), "seen": seen} for name, info, seen in rows}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+@dataclass
+class _MemoryJob:
+    provider: str
+    payload: Dict[str, Any]
+    state: str = PENDING
+    worker: Optional[str] = None
+    token: int = 0
+    deliveries: int = 0
+    expires: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    committed: bool = False
+
+class MemoryJobQueue(JobQueue):
+    """In-process queue with the same leasing and fencing rules, for tests and threads of one process"""
+
+    def __init__(self, max_deliveries: int = DEFAULT_MAX_DELIVERIES):
+        super().__init__(max_deliveries)
+        self.jobs: Dict[str, _MemoryJob] = {}
+        self.pending: Dict[str, Deque[str]] = {}
+        self.unfinished: Dict[str, None] = {}  # finished, uncommitted ids in finishing order
+        self.seen: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def _push(self, job_id: str, front: bool = False):
+        queue = self.pending.setdefault(self.jobs[job_id].provider, deque())
+        queue.appendleft(job_id) if front else queue.append(job_id)
+
+    def _finish(self, job_id: str, state: str):
+        self.jobs[job_id].state = state
+        self.unfinished[job_id] = None
+
+    def enqueue(self, jobs: Iterable[QueuedJob]) -> int:
+        added = 0
+        with self.lock:
+            for job_id, provider, payload in jobs:
+                existing = self.jobs.get(job_id)
+                if existing is not None and not existing.committed:
+                    continue
+                token = existing.token if existing else 0
+                self.jobs[job_id] = _MemoryJob(provider, payload, token=token)
+                self._push(job_id)
+                added += 1
+        return added
+
+    def drop_pending(self, keep: Set[str]) -> int:
+        with self.lock:
+            dropped = [job_id for job_id, job in self.jobs.items() if job.state == PENDING and job_id not in keep]
+            for job_id in dropped:
+                del self.jobs[job_id]
+            for provider, queue in self.pending.items():
+                self.pending[provider] = deque(job_id for job_id in queue if job_id in self.jobs)
+            return len(dropped)
+
+    def claimable(self) -> Dict[str, int]:
+        with self.lock:
+            return {provider: sum(1 for job_id in queue if self.jobs[job_id].state == PENDING)
+                    for provider, queue in self.pending.items() if queue}
+
+    def claim(self, worker: str, provider: str, limit: int, lease: float) -> List[Lease]:
+        leases = []
+        with self.lock:
+            queue = self.pending.get(provider, deque())
+            while queue and len(leases) < limit:
+                job_id = queue.popleft()
+                job = self.jobs.get(job_id)
+                if job is None or job.state != PENDING:
+                    continue
+                job.state, job.worker, job.expires = LEASED, worker, time.time() + lease
+                job.token += 1
+                job.deliveries += 1
+                leases.append(Lease(job_id, provider, job.payload, job.token))
+        return leases
+
+    def _current(self, lease: Lease) -> Optional[_MemoryJob]:
+        job = self.jobs.get(lease.id)
+        return job if job is not None and job.state == LEASED and job.token == lease.token else None
+
+    def heartbeat(self, worker: str, leases: List[Lease], lease: float, info: Optional[Dict[str, Any]] = None
+                  ) -> Set[str]:
+        held = set()
+        with self.lock:
+            now = time.time()
+            for held_lease in leases:
+                job = self._current(held_lease)
+                if job is not None and job.worker == worker:
+                    job.expires = now + lease
+                    held.add(held_lease.id)
+            self.seen[worker] = {**(info or {}), "seen": now}
+        return held
+
+    def complete(self, lease: Lease, result: Dict[str, Any]) -> bool:
+        with self.lock:
+            job = self._current(lease)
+            if job is None:
+                return False
+            job.result, job.error = result, None
+            self._finish(lease.id, DONE)
+            return True
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        with self.lock:
+            job = self._current(lease)
+            if job is None:
+                return False
+            job.error = error
+            if job.deliveries >= self.max_deliveries:
+                self._finish(lease.id, FAILED)
+            else:
+                job.state = PENDING
+                self._push(lease.id, front=True)
+            return True
+
+    def release(self, lease: Lease) -> bool:
+        with self.lock:
+            job = self._current(lease)
+            if job is None:
+                return False
+            job.state = PENDING
+            job.deliveries -= 1
+            self._push(lease.id, front=True)
+            return True
+
+    def requeue_expired(self) -> List[Tuple[str, Optional[str], str]]:
+        requeued = []
+        with self.lock:
+            now = time.time()
+            for job_id, job in self.jobs.items():
+                if job.state != LEASED or job.expires >= now:
+                    continue
+                job.error = f"lease held by {job.worker} expired"
+                if job.deliveries >= self.max_deliveries:
+                    self._finish(job_id, FAILED)
+                else:
+                    job.state = PENDING
+                    self._push(job_id, front=True)
+                requeued.append((job_id, job.worker, job.state))
+        return requeued
+
+    def finished(self, limit: int = 500) -> List[Finished]:
+        with self.lock:
+            ids = list(self.unfinished)[:limit]
+            return [Finished(job_id, self.jobs[job_id].state, self.jobs[job_id].payload, self.jobs[job_id].result,
+                             self.jobs[job_id].error, self.jobs[job_id].worker) for job_id in ids]
+
+    def mark_committed(self, ids: List[str]):
+        with self.lock:
+            for job_id in ids:
+                self.jobs[job_id].committed = True
+                self.unfinished.pop(job_id, None)
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            states = [job.state for job in self.jobs.values()]
+            return {PENDING: states.count(PENDING), LEASED: states.count(LEASED), "finished": len(self.unfinished)}
+
+    def workers(self, max_age: float = 60.0) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            cutoff = time.time() - max_age
+            return {name: dict(info) for name, info in self.seen.items() if info["seen"] >= cutoff}
+
+# Redis layout under a key prefix: {p}:job:{id} hashes, {p}:pending:{provider} lists of ids,
+# {p}:providers set, {p}:leases sorted set (id -> expiry), {p}:finished list of uncommitted ids,
+# {p}:workers hash (name -> JSON). Each state change is one Lua script, so it is atomic.
+
+_REDIS_ENQUEUE = """
+local key = ARGV[1] .. ':job:' .. ARGV[2]
+local state = redis.call('HGET', key, 'state')
+if state and redis.call('HGET', key, 'committed') ~= '1' then
+    return 0
+end
+redis.call('HSET', key, 'provider', ARGV[3], 'payload', ARGV[4], 'state', 'pending', 'deliveries', 0,
+           'committed', '0', 'updated', ARGV[5])
+redis.call('HDEL', key, 'worker', 'expires', 'result', 'error')
+redis.call('RPUSH', ARGV[1] .. ':pending:' .. ARGV[3], ARGV[2])
+redis.call('SADD', ARGV[1] .. ':providers', ARGV[3])
+return 1
+"""
+
+_REDIS_CLAIM = """
+local leases = {}
+local pending = ARGV[1] .. ':pending:' .. ARGV[3]
+while #leases < tonumber(ARGV[4]) do
+    local id = redis.call('LPOP', pending)
+    if not id then break end
+    local key = ARGV[1] .. ':job:' .. id
+    if redis.call('HGET', key, 'state') == 'pending' then
+        local token = redis.call('HINCRBY', key, 'token', 1)
+        redis.call('HINCRBY', key, 'deliveries', 1)
+        redis.call('HSET', key, 'state', 'leased', 'worker', ARGV[2], 'expires', ARGV[5], 'updated', ARGV[6])
+        redis.call('ZADD', ARGV[1] .. ':leases', ARGV[5], id)
+        table.insert(leases, {id, redis.call('HGET', key, 'payload'), token})
+    end
+end
+return leases
+"""
+
+_REDIS_HEARTBEAT = """
+local held = {}
+for i = 5, #ARGV, 2 do
+    local key = ARGV[1] .. ':job:' .. ARGV[i]
+    local fields = redis.call('HMGET', key, 'state', 'token', 'worker')
+    if fields[1] == 'leased' and fields[2] == ARGV[i + 1] and fields[3] == ARGV[2] then
+        redis.call('HSET', key, 'expires', ARGV[3])
+        redis.call('ZADD', ARGV[1] .. ':leases', ARGV[3], ARGV[i])
+        table.insert(held, ARGV[i])
+    end
+end
+redis.call('HSET', ARGV[1] .. ':workers', ARGV[2], ARGV[4])
+return held
+"""
+
+# ARGV: prefix, id, token, action (complete/fail/release), value, now, max deliveries
+_REDIS_SETTLE = """
+local key = ARGV[1] .. ':job:' .. ARGV[2]
+local fields = redis.call('HMGET', key, 'state', 'token', 'deliveries', 'provider')
+if fields[1] ~= 'leased' or fields[2] ~= ARGV[3] then
+    return 0
+end
+redis.call('ZREM', ARGV[1] .. ':leases', ARGV[2])
+redis.call('HDEL', key, 'expires')
+redis.call('HSET', key, 'updated', ARGV[6])
+if ARGV[4] == 'complete' then
+    redis.call('HSET', key, 'state', 'done', 'result', ARGV[5], 'committed', '0')
+    redis.call('HDEL', key, 'error')
+    redis.call('RPUSH', ARGV[1] .. ':finished', ARGV[2])
+elseif ARGV[4] == 'fail' and tonumber(fields[3]) >= tonumber(ARGV[7]) then
+    redis.call('HSET', key, 'state', 'failed', 'error', ARGV[5], 'committed', '0')
+    redis.call('RPUSH', ARGV[1] .. ':finished', ARGV[2])
+else
+    if ARGV[4] == 'fail' then
+        redis.call('HSET', key, 'error', ARGV[5])
+    else
+        redis.call('HINCRBY', key, 'deliveries', -1)
+    end
+    redis.call('HSET', key, 'state', 'pending')
+    redis.call('LPUSH', ARGV[1] .. ':pending:' .. fields[4], ARGV[2])
+end
+return 1
+"""
+
+# ARGV: prefix, now, max deliveries
+_REDIS_REQUEUE = """
+local requeued = {}
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', ARGV[1] .. ':leases', '-inf', ARGV[2])) do
+    redis.call('ZREM', ARGV[1] .. ':leases', id)
+    local key = ARGV[1] .. ':job:' .. id
+    local fields = redis.call('HMGET', key, 'state', 'deliveries', 'provider', 'worker')
+    if fields[1] == 'leased' then
+        redis.call('HSET', key, 'error', 'lease held by ' .. (fields[4] or '?') .. ' expired', 'updated', ARGV[2])
+        redis.call('HDEL', key, 'expires')
+        local state = 'pending'
+        if tonumber(fields[2]) >= tonumber(ARGV[3]) then
+            state = 'failed'
+            redis.call('HSET', key, 'state', 'failed', 'committed', '0')
+            redis.call('RPUSH', ARGV[1] .. ':finished', id)
+        else
+            redis.call('HSET', key, 'state', 'pending')
+            redis.call('LPUSH', ARGV[1] .. ':pending:' .. fields[3], id)
+        end
+        table.insert(requeued, {id, fields[4] or '', state})
+    end
+end
+return requeued
+"""
+
+def _require_redis():
+    try:
+        import redis
+        return redis
+    except ImportError:
+        raise ImportError("A Redis job queue needs the redis package: pip install redis")
+
+class RedisJobQueue(JobQueue):
+    """Queue on a Redis-compatible server (single node; the scripts touch keys they derive themselves)"""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "status-llms",
+                 max_deliveries: int = DEFAULT_MAX_DELIVERIES, client: Any = None):
+        super().__init__(max_deliveries)
+        self.prefix = prefix
+        self.client = client if client is not None else _require_redis().Redis.from_url(url, decode_responses=True)
+        self.scripts = {name: self.client.register_script(source) for name, source in (
+            ("enqueue", _REDIS_ENQUEUE), ("claim", _REDIS_CLAIM), ("heartbeat", _REDIS_HEARTBEAT),
+            ("settle", _REDIS_SETTLE), ("requeue", _REDIS_REQUEUE))}
+
+    def _key(self, *parts: str) -> str:
+        return ':'.join((self.prefix, *parts))
+
+    def enqueue(self, jobs: Iterable[QueuedJob]) -> int:
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        for job_id, provider, payload in jobs:
+            self.scripts["enqueue"](args=[self.prefix, job_id, provider, _dumps(payload), now], client=pipe)
+        return sum(int(added) for added in pipe.execute())
+
+    def drop_pending(self, keep: Set[str]) -> int:
+        dropped = 0
+        for provider in self.client.smembers(self._key('providers')):
+            pending = self._key('pending', provider)
+            for job_id in set(self.client.lrange(pending, 0, -1)) - keep:
+                # Deleting the hash first makes a concurrent claim skip the id
+                if self.client.hget(self._key('job', job_id), 'state') == PENDING:
+                    self.client.delete(self._key('job', job_id))
+                    dropped += 1
+                self.client.lrem(pending, 0, job_id)
+        return dropped
+
+    def claimable(self) -> Dict[str, int]:
+        providers = sorted(self.client.smembers(self._key('providers')))
+        pipe = self.client.pipeline(transaction=False)
+        for provider in providers:
+            pipe.llen(self._key('pending', provider))
+        return {provider: count for provider, count in zip(providers, pipe.execute()) if count}
+
+    def claim(self, worker: str, provider: str, limit: int, lease: float) -> List[Lease]:
+        now = time.time()
+        rows = self.scripts["claim"](args=[self.prefix, worker, provider, limit, now + lease, now])
+        return [Lease(job_id, provider, json.loads(payload), int(token)) for job_id, payload, token in rows]
+
+    def heartbeat(self, worker: str, leases: List[Lease], lease: float, info: Optional[Dict[str, Any]] = None
+                  ) -> Set[str]:
+        now = time.time()
+        args = [self.prefix, worker, now + lease, _dumps({**(info or {}), "seen": now})]
+        for held_lease in leases:
+            args += [held_lease.id, held_lease.token]
+        return set(self.scripts["heartbeat"](args=args))
+
+    def _settle(self, lease: Lease, action: str, value: str = "") -> bool:
+        return bool(self.scripts["settle"](args=[self.prefix, lease.id, lease.token, action, value, time.time(),
+                                                 self.max_deliveries]))
+
+    def complete(self, lease: Lease, result: Dict[str, Any]) -> bool:
+        return self._settle(lease, "complete", _dumps(result))
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        return self._settle(lease, "fail", error)
+
+    def release(self, lease: Lease) -> bool:
+        return self._settle(lease, "release")
+
+    def requeue_expired(self) -> List[Tuple[str, Optional[str], str]]:
+        rows = self.scripts["requeue"](args=[self.prefix, time.time(), self.max_deliveries])
+        return [(job_id, worker or None, state) for job_id, worker, state in rows]
+
+    def finished(self, limit: int = 500) -> List[Finished]:
+        ids = self.client.lrange(self._key('finished'), 0, limit - 1)
+        pipe = self.client.pipeline(transaction=False)
+        for job_id in ids:
+            pipe.hmget(self._key('job', job_id), 'state', 'payload', 'result', 'error', 'worker')
+        return [Finished(job_id, state, json.loads(payload), json.loads(result) if result else None, error, worker)
+                for job_id, (state, payload, result, error, worker) in zip(ids, pipe.execute())]
+
+    def mark_committed(self, ids: List[str]):
+        pipe = self.client.pipeline(transaction=False)
+        for job_id in ids:
+            pipe.hset(self._key('job', job_id), 'committed', '1')
+            pipe.lrem(self._key('finished'), 1, job_id)
+        pipe.execute()
+
+    def counts(self) -> Dict[str, int]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zcard(self._key('leases'))
+        pipe.llen(self._key('finished'))
+        leased, finished = pipe.execute()
+        return {PENDING: sum(self.claimable().values()), LEASED: leased, "finished": finished}
+
+    def workers(self, max_age: float = 60.0) -> Dict[str, Dict[str, Any]]:
+        cutoff = time.time() - max_age
+        workers = {name: json.loads(info) for name, info in self.client.hgetall(self._key('workers')).items()}
+        return {name: info for name, info in workers.items() if info.get("seen", 0) >= cutoff}
+
+    def close(self):
+        self.client.close()
+
+_MEMORY_QUEUES: Dict[str, MemoryJobQueue] = {}
+
+def open_queue(url: str = DEFAULT_QUEUE_PATH, max_deliveries: int = DEFAULT_MAX_DELIVERIES) -> JobQueue:
+    """redis://host:port/db[#prefix], memory://name, or a SQLite path (optionally sqlite:///path)"""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        url, _, prefix = url.partition('#')
+        return RedisJobQueue(url, prefix or "status-llms", max_deliveries)
+    if url.startswith('memory://'):
+        # Shared by name within the process, so a coordinator and worker threads see the same queue
+        queue = _MEMORY_QUEUES.setdefault(url, MemoryJobQueue(max_deliveries))
+        queue.max_deliveries = max_deliveries
+        return queue
+    if url.startswith('sqlite://'):
+        url = url[len('sqlite://'):]
+        url = url[1:] if url.startswith('/') else url
+    return SQLiteJobQueue(url, max_deliveries)
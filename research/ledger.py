@@ -0,0 +1,158 @@
+"""
+Append-only run ledger for the Status LLMs research runner.
+
+data/runs.jsonl gets one line per job state change: running, done or failed,
+with the attempt count, the output location and, once done, a hash of the saved
+content. Loading folds the lines into the latest state per job, so resume,
+`python -m research status` and the dashboard answer "is this cell done?" with
+a dictionary lookup instead of listing and re-parsing data/. A torn last line
+left by a crash is ignored.
+
+Outputs come in two layouts: a single-sample result file (data/{model}_{temp}.json)
+and a record in the replicate store (data/replicates/{model}.jsonl). A job counts
+as done only in the layout the sweep is using. A data/ directory from before the
+ledger is indexed once on first use. Result files that don't parse (e.g. left
+truncated by a crash) are not indexed, so they are run again.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, IO, Iterable, List, Optional, Tuple
+
+from research.export import parse_result_filename
+from research.store import read_records
+
+logger = logging.getLogger(__name__)
+
+LEDGER_NAME = 'runs.jsonl'
+DEFAULT_LEDGER_PATH = os.path.join('data', LEDGER_NAME)
+
+RUNNING, DONE, FAILED = "running", "done", "failed"
+
+JobKey = Tuple[str, float, int, str]  # (model, temperature, replicate, prompt_id)
+
+def content_hash(data: Any) -> str:
+    """Stable hash of a result's JSON content"""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def layout_of(path: str) -> str:
+    return "replicates" if path.endswith('.jsonl') else "file"
+
+class RunLedger:
+    """Latest state of every job, backed by an append-only JSONL file"""
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH, read_only: bool = False):
+        self.path = path
+        self.root = os.path.dirname(path) or '.'
+        self.read_only = read_only
+        self.jobs: Dict[Tuple[str, JobKey], Dict[str, Any]] = {}
+        self.file: Optional[IO[str]] = None
+        self.lock = threading.Lock()
+        self.exists = os.path.exists(path)
+        if self.exists:
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping unreadable line in %s", self.path)
+                    continue
+                self._apply(entry)
+
+    def _apply(self, entry: Dict[str, Any]):
+        key = (entry["model"], entry["temperature"], entry["replicate"], entry["prompt_id"])
+        self.jobs[(layout_of(entry["path"]), key)] = entry
+
+    def _append(self, entries: Iterable[Dict[str, Any]]):
+        with self.lock:
+            for entry in entries:
+                self._apply(entry)
+                if self.read_only:
+                    continue
+                if self.file is None:
+                    os.makedirs(self.root, exist_ok=True)
+                    self.file = open(self.path, 'a', encoding='utf-8')
+                self.file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            if self.file is not None:
+                self.file.flush()
+            self.exists = self.exists or self.file is not None
+
+    def relative(self, path: str) -> str:
+        """Output location as recorded: relative to the ledger's directory"""
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def entry(self, key: JobKey, layout: str = "file") -> Optional[Dict[str, Any]]:
+        return self.jobs.get((layout, key))
+
+    def is_done(self, key: JobKey, layout: str = "file") -> bool:
+        entry = self.jobs.get((layout, key))
+        return entry is not None and entry["state"] == DONE
+
+    def record(self, key: JobKey, state: str, path: str, **fields: Any):
+        """Append one state change for a job; `path` is where its result goes"""
+        model, temperature, replicate, prompt_id = key
+        previous = self.jobs.get((layout_of(path), key)) or {}
+        attempt = previous.get("attempt", 0) + (1 if state == RUNNING else 0)
+        self._append([{"model": model, "temperature": temperature, "replicate": replicate, "prompt_id": prompt_id,
+                       "state": state, "attempt": max(attempt, 1), "path": self.relative(path), **fields,
+                       "timestamp": round(time.time(), 3)}])
+
+    def start(self, key: JobKey, path: str):
+        self.record(key, RUNNING, path)
+
+    def finish(self, key: JobKey, path: str, data: Any):
+        self.record(key, DONE, path, hash=content_hash(data))
+
+    def fail(self, key: JobKey, path: str, error: str):
+        self.record(key, FAILED, path, error=error)
+
+    def index(self, data_dirs: Dict[str, str]):
+        """Record what is already on disk; `data_dirs` maps prompt id -> its data directory"""
+        entries: List[Dict[str, Any]] = []
+        now = round(time.time(), 3)
+        for prompt_id, data_dir in data_dirs.items():
+            if not os.path.isdir(data_dir):
+                continue
+            for filename in sorted(os.listdir(data_dir)):
+                model, temperature = parse_result_filename(filename) if filename.endswith('.json') else (None, None)
+                if model is None:
+                    continue
+                path = os.path.join(data_dir, filename)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning("Not indexing unreadable result %s: %s", path, e)
+                    continue
+                if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+                    logger.warning("Not indexing %s: no items list", path)
+                    continue
+                entries.append({"model": model, "temperature": temperature, "replicate": 0, "prompt_id": prompt_id,
+                                "state": DONE, "attempt": 1, "path": self.relative(path),
+                                "hash": content_hash(data), "timestamp": now})
+            store_dir = os.path.join(data_dir, 'replicates')
+            for record in read_records(store_dir):
+                path = os.path.join(store_dir, f"{record['model']}.jsonl")
+                entries.append({"model": record["model"], "temperature": record["temperature"],
+                                "replicate": record["replicate"], "prompt_id": prompt_id, "state": DONE,
+                                "attempt": 1, "path": self.relative(path),
+                                "hash": content_hash({"items": record.get("items")}), "timestamp": now})
+        self._append(entries)
+        if not self.read_only:
+            logger.info("📒 Indexed %d existing results into %s", len(entries), self.path)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
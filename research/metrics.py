@@ -0,0 +1,351 @@
+"""
+Per-call usage tracking and run metrics for the Status LLMs research runner.
+
+Provider call functions report token usage with `report_usage()` (and streamed
+calls their time-to-first-token with `report_stream()`); whoever made
+the call collects it with the `track_usage()` context manager. The active
+record lives in a contextvar, so it follows the call into worker threads.
+
+`MetricsRecorder` keeps one `CallRecord` per provider call (latency, queue wait,
+attempts, HTTP status, tokens, cost). Records are appended to a JSONL file,
+optionally written out as a Prometheus textfile, and summarized per provider
+(p50/p95/p99 latency, throughput, prompt-cache hit ratio, cost) at the end of a run.
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_PATH = os.path.join('data', 'metrics', 'calls.jsonl')
+
+# List prices in USD per million tokens (input, output, cached input), keyed by API model name
+PRICES: Dict[str, Tuple[float, float, float]] = {
+    "claude-sonnet-4-20250514": (3.00, 15.00, 0.30),
+    "claude-opus-4-20250514": (15.00, 75.00, 1.50),
+    "gemini-2.5-pro": (1.25, 10.00, 0.31),
+    "grok-4": (3.00, 15.00, 0.75),
+    "kimi-k2-0711-preview": (0.60, 2.50, 0.15),
+    "deepseek-reasoner": (0.55, 2.19, 0.14),
+    "deepseek-chat": (0.27, 1.10, 0.07),
+    "gpt-4.1": (2.00, 8.00, 0.50),
+    "gpt-4o": (2.50, 10.00, 1.25),
+}
+
+# Providers whose completion count excludes reasoning tokens (billed as output on top)
+REASONING_BILLED_SEPARATELY = {"google"}
+
+# Anthropic bills prompt-cache writes at a premium over the input price
+CACHE_WRITE_MULTIPLIER = 1.25
+
+@dataclass
+class CallUsage:
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    reasoning_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None     # prompt tokens read from the provider's prompt cache
+    cache_write_tokens: Optional[int] = None  # prompt tokens written to it (Anthropic)
+    ttft: Optional[float] = None            # streamed calls only
+    tokens_per_sec: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+_current_usage: contextvars.ContextVar[Optional[CallUsage]] = contextvars.ContextVar("current_usage", default=None)
+
+@contextmanager
+def track_usage() -> Iterator[CallUsage]:
+    """Collect the usage reported by provider calls made inside this block"""
+    usage = CallUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+def current_usage() -> Optional[CallUsage]:
+    """The usage record being collected for the current call, if any"""
+    return _current_usage.get()
+
+def report_usage(prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                 reasoning_tokens: Optional[int] = None, cached_tokens: Optional[int] = None,
+                 cache_write_tokens: Optional[int] = None):
+    """Record token usage for the call currently being tracked (no-op outside track_usage).
+
+    prompt_tokens is the full prompt, including any cached_tokens and cache_write_tokens.
+    """
+    usage = _current_usage.get()
+    if usage is None:
+        return
+    usage.prompt_tokens = prompt_tokens
+    usage.completion_tokens = completion_tokens
+    usage.reasoning_tokens = reasoning_tokens
+    usage.cached_tokens = cached_tokens
+    usage.cache_write_tokens = cache_write_tokens
+
+def report_stream(ttft: Optional[float], tokens_per_sec: Optional[float]):
+    """Record time-to-first-token and throughput for a streamed call"""
+    usage = _current_usage.get()
+    if usage is None:
+        return
+    usage.ttft = round(ttft, 3) if ttft is not None else None
+    usage.tokens_per_sec = tokens_per_sec
+
+def call_cost(provider: str, api_name: str, prompt_tokens: Optional[int], completion_tokens: Optional[int],
+              reasoning_tokens: Optional[int] = None, cached_tokens: Optional[int] = None,
+              cache_write_tokens: Optional[int] = None) -> Optional[float]:
+    """USD cost of one call from the price table (None for unpriced models or missing usage)"""
+    price = PRICES.get(api_name)
+    if price is None or prompt_tokens is None or completion_tokens is None:
+        return None
+    input_price, output_price, cached_price = price
+    cached, written = cached_tokens or 0, cache_write_tokens or 0
+    output = completion_tokens
+    if provider in REASONING_BILLED_SEPARATELY:
+        output += reasoning_tokens or 0
+    return ((prompt_tokens - cached - written) * input_price + cached * cached_price
+            + written * input_price * CACHE_WRITE_MULTIPLIER + output * output_price) / 1_000_000
+
+def answer_tokens(provider: str, completion_tokens: Optional[int], reasoning_tokens: Optional[int]) -> Optional[int]:
+    """Completion tokens spent on the answer itself, whether or not the provider counts reasoning in completion"""
+    if completion_tokens is None:
+        return None
+    if provider in REASONING_BILLED_SEPARATELY or not reasoning_tokens:
+        return completion_tokens
+    return max(0, completion_tokens - reasoning_tokens)
+
+@dataclass
+class CallRecord:
+    run_id: str
+    model: str
+    provider: str
+    api_name: str
+    temperature: float
+    replicate: int
+    prompt_id: str
+    started: float                          # unix time the call was made
+    latency: float                          # wall time including queue wait and retries
+    queue_wait: float                       # time held by the rate limiter before the first request
+    attempts: int
+    status: Optional[int]                   # HTTP status of the last attempt (200 on success)
+    error: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    reasoning_tokens: Optional[int] = None
+    answer_tokens: Optional[int] = None     # completion tokens other than reasoning
+    cached_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    ttft: Optional[float] = None
+    tokens_per_sec: Optional[float] = None
+    cost: Optional[float] = None
+    parse: Optional[str] = None             # "ok", "repaired", "failed" or "aborted" once the response is checked
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (q in 0-100) of unsorted values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lo, hi = math.floor(rank), math.ceil(rank)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+def latency_history(path: str = DEFAULT_METRICS_PATH) -> Dict[str, float]:
+    """Median latency of past successful calls per model, from the metrics JSONL"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("error") is None and record.get("latency") is not None:
+                    latencies[record["model"]].append(record["latency"])
+    except FileNotFoundError:
+        return {}
+    return {model: percentile(values, 50) for model, values in latencies.items()}
+
+class MetricsRecorder:
+    """Collects per-call records, streams them to JSONL and reports per-provider summaries"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_METRICS_PATH, prometheus_path: Optional[str] = None):
+        self.path = path
+        self.prometheus_path = prometheus_path
+        self.run_id = time.strftime('%Y%m%dT%H%M%S')
+        self.started = time.time()
+        self.records: List[CallRecord] = []
+        self.file: Optional[IO[str]] = None
+        self.lock = threading.Lock()
+
+    def record(self, record: CallRecord):
+        with self.lock:
+            self.records.append(record)
+            if self.path:
+                if self.file is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    self.file = open(self.path, 'a', encoding='utf-8')
+                self.file.write(json.dumps(asdict(record), separators=(',', ':')) + '\n')
+                self.file.flush()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider latency percentiles, throughput, token totals and cost"""
+        by_provider: Dict[str, List[CallRecord]] = defaultdict(list)
+        with self.lock:
+            for record in self.records:
+                by_provider[record.provider].append(record)
+
+        summary = {}
+        for provider, records in sorted(by_provider.items()):
+            ok = [r for r in records if r.ok]
+            latencies = [r.latency for r in ok]
+            # Throughput over the window this provider was actually busy
+            window = max(r.started + r.latency for r in records) - min(r.started for r in records)
+            completion = sum(r.completion_tokens or 0 for r in ok)
+            costs = [r.cost for r in records if r.cost is not None]
+            ttfts = [r.ttft for r in ok if r.ttft is not None]
+            prompt = sum(r.prompt_tokens or 0 for r in records)
+            cached = sum(r.cached_tokens or 0 for r in records)
+            summary[provider] = {
+                "calls": len(records),
+                "failed": len(records) - len(ok),
+                "retries": sum(r.retries for r in records),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "ttft_p50": percentile(ttfts, 50),
+                "queue_wait": sum(r.queue_wait for r in records),
+                "calls_per_min": len(ok) / window * 60 if window > 0 else None,
+                "tokens_per_sec": completion / window if window > 0 else None,
+                "prompt_tokens": prompt,
+                "completion_tokens": sum(r.completion_tokens or 0 for r in records),
+                "reasoning_tokens": sum(r.reasoning_tokens or 0 for r in records),
+                "answer_tokens": sum(r.answer_tokens or 0 for r in records),
+                "cached_tokens": cached,
+                "cache_write_tokens": sum(r.cache_write_tokens or 0 for r in records),
+                "cache_hit_ratio": cached / prompt if prompt else None,
+                "cost": sum(costs) if costs else None,
+                "latency_sum": sum(latencies),
+                "statuses": Counter(r.status for r in records),
+            }
+        return summary
+
+    def parse_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model parse outcomes, and the completion tokens paid for responses that were thrown away"""
+        by_model: Dict[str, Dict[str, Any]] = {}
+        with self.lock:
+            for record in self.records:
+                if record.parse is None:
+                    continue
+                stats = by_model.setdefault(record.model, {"provider": record.provider, "outcomes": Counter(),
+                                                           "wasted_tokens": 0})
+                stats["outcomes"][record.parse] += 1
+                if record.parse in ("failed", "aborted"):
+                    stats["wasted_tokens"] += record.completion_tokens or 0
+        return by_model
+
+    def log_parse_summary(self):
+        """Log each model's parse-failure rate, worst first"""
+        summary = self.parse_summary()
+        if not summary:
+            return
+        rate = lambda s: (s["outcomes"]["failed"] + s["outcomes"]["aborted"]) / sum(s["outcomes"].values())
+        logger.info("🧩 %-18s %7s %8s %6s %7s %6s %11s", "model", "checked", "repaired", "failed", "aborted",
+                    "rate", "wasted tok")
+        for model, s in sorted(summary.items(), key=lambda kv: -rate(kv[1])):
+            outcomes = s["outcomes"]
+            logger.info("🧩 %-18s %7d %8d %6d %7d %6s %11d", model, sum(outcomes.values()), outcomes["repaired"],
+                        outcomes["failed"], outcomes["aborted"], format(rate(s), ".0%"), s["wasted_tokens"])
+
+    def log_summary(self):
+        """Log the per-provider run report, slowest p95 first"""
+        summary = self.summary()
+        if not summary:
+            return
+        fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+        logger.info("📈 %-10s %5s %5s %7s %7s %7s %7s %8s %8s %7s %9s",
+                    "provider", "calls", "fail", "p50", "p95", "p99", "ttft", "calls/m", "tok/s", "cached",
+                    "cost $")
+        for provider, s in sorted(summary.items(), key=lambda kv: -(kv[1]["p95"] or 0)):
+            logger.info("📈 %-10s %5d %5d %7s %7s %7s %7s %8s %8s %7s %9s",
+                        provider, s["calls"], s["failed"], fmt(s["p50"], ".2f"), fmt(s["p95"], ".2f"),
+                        fmt(s["p99"], ".2f"), fmt(s["ttft_p50"], ".2f"), fmt(s["calls_per_min"], ".1f"),
+                        fmt(s["tokens_per_sec"], ".0f"), fmt(s["cache_hit_ratio"], ".0%"), fmt(s["cost"], ".4f"))
+        costs = [s["cost"] for s in summary.values() if s["cost"] is not None]
+        elapsed = time.time() - self.started
+        calls = sum(s["calls"] for s in summary.values())
+        logger.info("📈 %d calls in %.1fs (%.1f/min), total cost $%.4f", calls, elapsed,
+                    calls / elapsed * 60 if elapsed > 0 else 0, sum(costs))
+        self.log_parse_summary()
+
+    def write_prometheus(self, path: Optional[str] = None):
+        """Write the summary in Prometheus textfile-collector format (atomically)"""
+        path = path or self.prometheus_path
+        if not path:
+            return
+        families = {
+            "status_llms_calls_total": ("counter", "Provider calls by final HTTP status"),
+            "status_llms_call_latency_seconds": ("summary", "Wall latency of successful calls"),
+            "status_llms_tokens_total": ("counter", "Tokens reported by the provider"),
+            "status_llms_retries_total": ("counter", "Retried attempts"),
+            "status_llms_queue_wait_seconds_total": ("counter", "Time spent waiting on rate limits"),
+            "status_llms_cost_usd_total": ("counter", "Estimated cost from list prices"),
+            "status_llms_parse_total": ("counter", "Checked responses by parse outcome"),
+        }
+        samples: Dict[str, List[str]] = defaultdict(list)
+        for provider, s in self.summary().items():
+            label = f'provider="{provider}"'
+            for status, count in s["statuses"].items():
+                samples["status_llms_calls_total"].append(
+                    f'status_llms_calls_total{{{label},status="{status or "error"}"}} {count}')
+            latency = samples["status_llms_call_latency_seconds"]
+            for q, quantile in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+                if s[q] is not None:
+                    latency.append(f'status_llms_call_latency_seconds{{{label},quantile="{quantile}"}} {s[q]:.6f}')
+            latency.append(f'status_llms_call_latency_seconds_sum{{{label}}} {s["latency_sum"]:.6f}')
+            latency.append(f'status_llms_call_latency_seconds_count{{{label}}} {s["calls"] - s["failed"]}')
+            for kind in ("prompt", "completion", "reasoning", "answer", "cached", "cache_write"):
+                samples["status_llms_tokens_total"].append(
+                    f'status_llms_tokens_total{{{label},kind="{kind}"}} {s[kind + "_tokens"]}')
+            samples["status_llms_retries_total"].append(f'status_llms_retries_total{{{label}}} {s["retries"]}')
+            samples["status_llms_queue_wait_seconds_total"].append(
+                f'status_llms_queue_wait_seconds_total{{{label}}} {s["queue_wait"]:.6f}')
+            if s["cost"] is not None:
+                samples["status_llms_cost_usd_total"].append(f'status_llms_cost_usd_total{{{label}}} {s["cost"]:.6f}')
+
+        for model, s in self.parse_summary().items():
+            for outcome, count in sorted(s["outcomes"].items()):
+                samples["status_llms_parse_total"].append(
+                    f'status_llms_parse_total{{provider="{s["provider"]}",model="{model}",outcome="{outcome}"}} {count}')
+
+        # Each metric family's samples must form one contiguous group
+        lines = []
+        for name, (kind, description) in families.items():
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"] + samples[name]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp, path)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,86 @@
+"""
+Prompt variants for Status LLMs sweeps.
+
+A variant is a long instruction prefix shared with other variants, followed by a
+short variant-specific suffix (item count, region, decade, language, ...). The
+prefix comes first and stays byte-identical, so providers can serve it from their
+prompt cache: Anthropic through an explicit cache_control breakpoint, and OpenAI,
+DeepSeek, xAI, Moonshot and Gemini automatically once it is long enough. Every
+result is tagged with the variant's id and a hash of its full text. That keeps
+results from an edited prompt apart from older ones.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+START_MARKER = "Begin your response:"
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+@dataclass(frozen=True)
+class PromptVariant:
+    id: str
+    prefix: str         # shared instructions, eligible for prompt caching
+    suffix: str = ""    # variant-specific tail
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+    @property
+    def hash(self) -> str:
+        return _digest(self.text)
+
+    @property
+    def prefix_hash(self) -> str:
+        return _digest(self.prefix)
+
+    def tags(self) -> Dict[str, str]:
+        """Fields recorded with every result produced from this prompt"""
+        return {"prompt_id": self.id, "prompt_hash": self.hash}
+
+def read_prompt_file(path: str) -> str:
+    """Prompt text from a markdown file, cut off after the "Begin your response:" marker"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        logger.error("%s file not found", path)
+        raise
+    if START_MARKER in content:
+        return content.split(START_MARKER)[0] + START_MARKER
+    return content
+
+def load_variant(prompt_id: str, entry: Union[str, Dict[str, Any]]) -> PromptVariant:
+    """Build a variant from a sweep spec entry.
+
+    A plain path uses the whole file as the prompt (and as the cacheable prefix).
+    {"path": ..., "suffix": ...} keeps the file's instructions as the shared
+    prefix and inserts the suffix just before the "Begin your response:" marker.
+    """
+    if isinstance(entry, str):
+        return PromptVariant(prompt_id, read_prompt_file(entry))
+    unknown = set(entry) - {"path", "suffix", "note"}
+    if unknown or "path" not in entry:
+        raise ValueError(f"Prompt {prompt_id!r} needs a 'path' and takes an optional 'suffix' "
+                         f"(unknown keys: {sorted(unknown)})")
+    base = read_prompt_file(entry["path"])
+    suffix = entry.get("suffix", "").strip()
+    if not suffix:
+        return PromptVariant(prompt_id, base)
+    prefix = base[:-len(START_MARKER)] if base.endswith(START_MARKER) else base + "\n\n"
+    return PromptVariant(prompt_id, prefix, f"{suffix}\n\n{START_MARKER}")
+
+def anthropic_content(prompt: str, cache_prefix: Optional[str] = None) -> Union[str, List[Dict[str, Any]]]:
+    """User message content, with a cache breakpoint after `cache_prefix` when the prompt starts with it"""
+    if not cache_prefix or not prompt.startswith(cache_prefix):
+        return prompt
+    blocks = [{"type": "text", "text": cache_prefix, "cache_control": {"type": "ephemeral"}}]
+    if len(prompt) > len(cache_prefix):
+        blocks.append({"type": "text", "text": prompt[len(cache_prefix):]})
+    return blocks
@@ -0,0 +1,236 @@
+"""
+Per-provider rate limiting for the Status LLMs research runner.
+
+Each provider gets a requests-per-minute and (optionally) a tokens-per-minute
+token bucket. Callers block in `acquire()` only when a budget is actually
+exhausted, and the limiter backs off further whenever a response carries
+Retry-After or x-ratelimit-* headers saying the provider wants us to slow down.
+"""
+
+import re
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+@dataclass
+class RateLimit:
+    rpm: Optional[float] = None  # requests per minute, None = unlimited
+    tpm: Optional[float] = None  # tokens per minute, None = unlimited
+
+# Published quotas for the tiers we run on; override with --rate-limit.
+DEFAULT_RATE_LIMITS = {
+    "anthropic": RateLimit(rpm=50, tpm=40000),
+    "google": RateLimit(rpm=150),
+    "xai": RateLimit(rpm=60),
+    "moonshot": RateLimit(rpm=6),       # Free tier: 6 RPM
+    "deepseek": RateLimit(),            # DeepSeek does not enforce a fixed rate limit
+    "openai": RateLimit(rpm=500, tpm=30000),
+}
+
+# Retries on HTTP 429 before the error is surfaced to the caller (when used standalone;
+# the runner leaves retries to research.retry and only uses the limiter's backoff).
+MAX_RATE_LIMIT_RETRIES = 3
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens (possibly going into debt) and return how long to wait"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """Give back tokens that were reserved but not used"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse '12', '1.5', '20ms', '6m0s' or an HTTP/RFC 3339 date into seconds"""
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and ''.join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    from email.utils import parsedate_to_datetime  # only HTTP-date values get this far
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_from_headers(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds the provider asked us to wait, from Retry-After or exhausted x-ratelimit-* headers"""
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+    if 'retry-after-ms' in headers:
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+    if 'retry-after' in headers:
+        delay = parse_duration(headers['retry-after'])
+        if delay is not None:
+            return delay
+
+    # OpenAI/xAI/DeepSeek: x-ratelimit-remaining-requests + x-ratelimit-reset-requests
+    # Anthropic: anthropic-ratelimit-requests-remaining + anthropic-ratelimit-requests-reset
+    delays = []
+    for kind in ('requests', 'tokens'):
+        for remaining_key, reset_key in ((f'x-ratelimit-remaining-{kind}', f'x-ratelimit-reset-{kind}'),
+                                         (f'anthropic-ratelimit-{kind}-remaining', f'anthropic-ratelimit-{kind}-reset')):
+            remaining = headers.get(remaining_key)
+            reset = headers.get(reset_key)
+            if remaining is not None and reset is not None and remaining.strip() == '0':
+                delay = parse_duration(reset)
+                if delay is not None:
+                    delays.append(delay)
+    return max(delays) if delays else None
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough token cost of a request as counted against TPM quotas (prompt + completion budget)"""
+    return len(prompt) // 4 + max_tokens
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """True for HTTP 429 errors raised by requests or the provider SDKs"""
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return status == 429
+
+class ProviderRateLimiter:
+    """RPM/TPM budgets plus header-driven backoff for a single provider"""
+
+    def __init__(self, provider: str, limit: RateLimit):
+        self.provider = provider
+        self.limit = limit
+        self.request_bucket = self._bucket(limit.rpm, burst=max(1.0, (limit.rpm or 0) / 10))
+        self.token_bucket = self._bucket(limit.tpm, burst=limit.tpm)
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.waited = 0.0
+
+    @staticmethod
+    def _bucket(per_minute: Optional[float], burst: Optional[float]) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        return TokenBucket(per_minute / 60.0, burst)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request of `tokens` estimated tokens fits the budget; returns seconds waited"""
+        delay = 0.0
+        if self.request_bucket:
+            delay = max(delay, self.request_bucket.reserve(1))
+        if self.token_bucket and tokens:
+            delay = max(delay, self.token_bucket.reserve(tokens))
+        self.local.estimate = tokens
+        with self.lock:
+            delay = max(delay, self.blocked_until - time.monotonic())
+        if delay > 0:
+            logger.info("⏳ %s rate limit: waiting %.1fs", self.provider, delay)
+            time.sleep(delay)
+            with self.lock:
+                self.waited += delay
+        self.local.last_wait = max(delay, 0.0)
+        return max(delay, 0.0)
+
+    def last_wait(self) -> float:
+        """Seconds this thread's most recent acquire() waited for the budget"""
+        return getattr(self.local, 'last_wait', 0.0)
+
+    def record_usage(self, actual: Optional[int]):
+        """Refund the unused part of this thread's last estimate once real usage is known"""
+        estimated = getattr(self.local, 'estimate', 0)
+        self.local.estimate = 0
+        if self.token_bucket and actual is not None and actual < estimated:
+            self.token_bucket.refund(estimated - actual)
+
+    def observe(self, headers: Mapping[str, str], default: float = 0.0):
+        """Pause the provider if response headers say a quota is exhausted"""
+        delay = backoff_from_headers(headers)
+        if delay is None:
+            delay = default
+        if delay > 0:
+            with self.lock:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            logger.info("⏳ %s asked us to back off for %.1fs", self.provider, delay)
+
+    def call(self, fn: Callable[[], T], tokens: int = 0, retries: int = MAX_RATE_LIMIT_RETRIES) -> T:
+        """Run `fn` under this limiter, backing off on HTTP 429 and retrying up to `retries` times"""
+        for attempt in range(retries + 1):
+            self.acquire(tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                headers = getattr(getattr(e, 'response', None), 'headers', None) or {}
+                fallback = 60.0 / self.limit.rpm if self.limit.rpm else 2.0 ** attempt
+                self.observe(headers, default=fallback)
+                if attempt == retries:
+                    raise
+                logger.warning("%s returned 429, retrying (%d/%d)",
+                               self.provider, attempt + 1, retries)
+
+class RateLimiterRegistry:
+    """One ProviderRateLimiter per provider, created on first use"""
+
+    def __init__(self, limits: Dict[str, RateLimit] = None):
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        self.limits.update(limits or {})
+        self.limiters: Dict[str, ProviderRateLimiter] = {}
+        self.lock = threading.Lock()
+
+    def configure(self, provider: str, limit: RateLimit):
+        """Replace the budget for a provider"""
+        with self.lock:
+            self.limits[provider] = limit
+            self.limiters.pop(provider, None)
+
+    def get(self, provider: str) -> ProviderRateLimiter:
+        with self.lock:
+            if provider not in self.limiters:
+                self.limiters[provider] = ProviderRateLimiter(provider, self.limits.get(provider, RateLimit()))
+            return self.limiters[provider]
+
+def parse_rate_limit(value: str) -> Tuple[str, RateLimit]:
+    """Parse a PROVIDER=RPM[:TPM] option, e.g. 'moonshot=6' or 'openai=500:30000'"""
+    provider, _, spec = value.partition('=')
+    rpm, _, tpm = spec.partition(':')
+    try:
+        return provider, RateLimit(rpm=float(rpm) if rpm else None, tpm=float(tpm) if tpm else None)
+    except ValueError:
+        raise ValueError(f"Expected PROVIDER=RPM[:TPM], got {value!r}")
@@ -0,0 +1,251 @@
+"""
+Reasoning (thinking) budgets for the Status LLMs research runner.
+
+A model's `reasoning_budget` in sweep.json caps the tokens it may spend thinking
+before it answers. Each provider exposes this differently:
+- google: `thinking_budget` (-1 lets the model decide; 0 turns thinking off,
+  which Pro models don't allow, their minimum is 128);
+- anthropic: extended thinking with `budget_tokens` (0 keeps it off, otherwise at
+  least 1024). Thinking only runs at temperature 1, so such a model's
+  temperatures must be [1.0];
+- deepseek: the API has no budget, only the choice between the reasoning and
+  the non-reasoning endpoint of the same model, so 0 sends deepseek-reasoner
+  calls to deepseek-chat and any other value is rejected.
+For all three, max_tokens covers the reasoning and the answer together, so a
+budget must leave room for the answer. Without a budget every model keeps its
+provider default (Gemini Flash with thinking off, Pro with dynamic thinking).
+
+`--reasoning-budgets 0,1024,4096` adds a variant of every reasoning model per
+budget it accepts, named e.g. `gemini-2.5-pro@think-1024`, which is saved and
+indexed like any other model. `compare_budgets()` then sets each variant
+against its base model: latency and reasoning tokens from the call metrics,
+and how far its ratings moved from the results database.
+"""
+
+import os
+import json
+import math
+import sqlite3
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from research.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+REASONING_PROVIDERS = {"google", "anthropic", "deepseek"}
+
+# Non-reasoning endpoint serving the same model, used for a DeepSeek budget of 0
+DEEPSEEK_NON_THINKING = {"deepseek-reasoner": "deepseek-chat"}
+
+GEMINI_PRO_MIN_BUDGET = 128
+ANTHROPIC_MIN_BUDGET = 1024
+# Anthropic only accepts this temperature with extended thinking
+ANTHROPIC_THINKING_TEMPERATURE = 1.0
+
+VARIANT_SEPARATOR = '@think-'
+
+def budget_problem(config: Any, max_tokens: int, temperatures: List[float]) -> Optional[str]:
+    """Why `config.reasoning_budget` can't be used for this model at these temperatures, or None if it can"""
+    budget, provider = config.reasoning_budget, config.provider
+    if budget is None:
+        return None
+    if provider not in REASONING_PROVIDERS:
+        return f"{provider} models have no reasoning budget"
+    if any(route.backend != "native" for route in config.routes or []):
+        return "reasoning budgets are only sent through the native backend"
+    if provider == "google":
+        if budget < -1:
+            return "the Gemini thinking budget must be -1 (dynamic) or at least 0"
+        if "pro" in config.api_name.lower() and 0 <= budget < GEMINI_PRO_MIN_BUDGET:
+            return f"Gemini Pro models can't turn thinking off (minimum budget {GEMINI_PRO_MIN_BUDGET})"
+    elif provider == "anthropic":
+        if budget and budget < ANTHROPIC_MIN_BUDGET:
+            return f"Anthropic extended thinking needs a budget of at least {ANTHROPIC_MIN_BUDGET} (or 0 for none)"
+        if budget and temperatures != [ANTHROPIC_THINKING_TEMPERATURE]:
+            return (f"Anthropic extended thinking only runs at temperature {ANTHROPIC_THINKING_TEMPERATURE}; "
+                    f"set the model's temperatures to [{ANTHROPIC_THINKING_TEMPERATURE}]")
+    elif provider == "deepseek":
+        if budget != 0:
+            return "DeepSeek's API can only turn reasoning off (budget 0)"
+        if config.api_name not in DEEPSEEK_NON_THINKING:
+            return f"no non-reasoning endpoint is known for {config.api_name}"
+    if budget >= max_tokens:
+        return f"a budget of {budget} leaves no room for the answer within max_tokens={max_tokens}"
+    return None
+
+def effective_api_name(config: Any, api_name: Optional[str] = None) -> str:
+    """The model id a call is really sent to (and billed as): `api_name` (default the config's),
+    switched to the non-reasoning endpoint for a DeepSeek budget of 0"""
+    api_name = api_name or config.api_name
+    if config.provider == "deepseek" and config.reasoning_budget == 0:
+        return DEEPSEEK_NON_THINKING.get(api_name, api_name)
+    return api_name
+
+def variant_name(name: str, budget: int) -> str:
+    return f"{name}{VARIANT_SEPARATOR}{'auto' if budget == -1 else budget}"
+
+def split_variant(name: str) -> Tuple[str, Optional[int]]:
+    """'gemini-2.5-pro@think-1024' -> ('gemini-2.5-pro', 1024); other names -> (name, None)"""
+    base, separator, budget = name.rpartition(VARIANT_SEPARATOR)
+    if not separator:
+        return name, None
+    if budget == 'auto':
+        return base, -1
+    try:
+        return base, int(budget)
+    except ValueError:
+        return name, None
+
+def parse_budgets(value: str) -> List[int]:
+    """'0,1024,auto' -> [0, 1024, -1]"""
+    budgets = []
+    for part in value.split(','):
+        part = part.strip()
+        if part:
+            budgets.append(-1 if part == 'auto' else int(part))
+    return budgets
+
+@dataclass
+class BudgetComparison:
+    model: str                         # base model
+    budget: int
+    calls: int = 0                     # fresh (uncached) successful calls of the variant
+    p50_latency: Optional[float] = None
+    base_p50_latency: Optional[float] = None
+    reasoning_tokens: Optional[float] = None      # mean per call
+    base_reasoning_tokens: Optional[float] = None
+    cost: Optional[float] = None                  # mean USD per call
+    base_cost: Optional[float] = None
+    shared_items: int = 0              # items both rated, at the variant's temperatures
+    item_overlap: Optional[float] = None          # shared / all items either rated
+    rating_shift: Optional[float] = None          # mean (variant - base) over shared items
+    rating_mad: Optional[float] = None            # mean |variant - base|
+    spearman: Optional[float] = None
+
+    @property
+    def latency_saved(self) -> Optional[float]:
+        """Fraction of the base model's median latency the budget saves (negative: slower)"""
+        if self.p50_latency is None or not self.base_p50_latency:
+            return None
+        return 1 - self.p50_latency / self.base_p50_latency
+
+def _mean(values: Sequence[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+def _ranks(values: Sequence[float]) -> List[float]:
+    """Ranks with ties averaged"""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for i in order[start:end + 1]:
+            ranks[i] = (start + end) / 2
+        start = end + 1
+    return ranks
+
+def spearman(x: Sequence[float], y: Sequence[float]) -> Optional[float]:
+    if len(x) < 3:
+        return None
+    rx, ry = _ranks(x), _ranks(y)
+    mx, my = _mean(rx), _mean(ry)
+    cov = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    var = math.sqrt(sum((a - mx) ** 2 for a in rx) * sum((b - my) ** 2 for b in ry))
+    return cov / var if var else None
+
+def call_stats(metrics_path: str) -> Dict[str, Dict[str, List[float]]]:
+    """Latency, reasoning tokens and cost of every successful call per model, from the metrics JSONL"""
+    stats: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    try:
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("error") is not None or record.get("latency") is None:
+                    continue
+                model = stats[record["model"]]
+                model["latency"].append(record["latency"])
+                if record.get("reasoning_tokens") is not None:
+                    model["reasoning_tokens"].append(record["reasoning_tokens"])
+                if record.get("cost") is not None:
+                    model["cost"].append(record["cost"])
+    except FileNotFoundError:
+        pass
+    return stats
+
+def item_means(conn: sqlite3.Connection, model: str, temperatures: Optional[Sequence[float]] = None,
+               prompt_id: str = 'default') -> Dict[str, float]:
+    """Mean rating per normalized item name for one model (optionally only at some temperatures)"""
+    query = ("SELECT i.normalized, AVG(i.rating) FROM items i JOIN runs r ON r.id = i.run_id "
+             "WHERE r.prompt_id = ? AND r.model = ? AND i.rating IS NOT NULL")
+    params: List[Any] = [prompt_id, model]
+    if temperatures is not None:
+        query += f" AND r.temperature IN ({','.join('?' * len(temperatures))})"
+        params += list(temperatures)
+    return dict(conn.execute(query + " GROUP BY i.normalized", params).fetchall())
+
+def compare_budgets(db_path: str, metrics_path: str, prompt_id: str = 'default') -> List[BudgetComparison]:
+    """Every budget variant in the results database, set against its base model"""
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        models = [row[0] for row in conn.execute("SELECT DISTINCT model FROM runs WHERE prompt_id = ?", (prompt_id,))]
+        stats = call_stats(metrics_path)
+        comparisons = []
+        for name in sorted(models):
+            base, budget = split_variant(name)
+            if budget is None:
+                continue
+            comparison = BudgetComparison(base, budget)
+            variant_stats, base_stats = stats.get(name, {}), stats.get(base, {})
+            comparison.calls = len(variant_stats.get("latency", []))
+            comparison.p50_latency = percentile(variant_stats.get("latency", []), 50)
+            comparison.base_p50_latency = percentile(base_stats.get("latency", []), 50)
+            comparison.reasoning_tokens = _mean(variant_stats.get("reasoning_tokens", []))
+            comparison.base_reasoning_tokens = _mean(base_stats.get("reasoning_tokens", []))
+            comparison.cost = _mean(variant_stats.get("cost", []))
+            comparison.base_cost = _mean(base_stats.get("cost", []))
+
+            # Compare like with like: the base model's ratings at the temperatures the variant ran
+            temperatures = [row[0] for row in conn.execute(
+                "SELECT DISTINCT temperature FROM runs WHERE prompt_id = ? AND model = ?", (prompt_id, name))]
+            variant_items = item_means(conn, name, prompt_id=prompt_id)
+            base_items = item_means(conn, base, temperatures, prompt_id)
+            shared = sorted(set(variant_items) & set(base_items))
+            comparison.shared_items = len(shared)
+            union = set(variant_items) | set(base_items)
+            if base_items and union:
+                comparison.item_overlap = len(shared) / len(union)
+            if shared:
+                x = [base_items[item] for item in shared]
+                y = [variant_items[item] for item in shared]
+                comparison.rating_shift = _mean([b - a for a, b in zip(x, y)])
+                comparison.rating_mad = _mean([abs(b - a) for a, b in zip(x, y)])
+                comparison.spearman = spearman(x, y)
+            comparisons.append(comparison)
+        return comparisons
+    finally:
+        conn.close()
+
+def log_comparison(comparisons: List[BudgetComparison]):
+    """Log latency saved against rating change for each budget, by model"""
+    if not comparisons:
+        logger.info("🧠 No reasoning-budget variants have results yet")
+        return
+    fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+    logger.info("🧠 %-18s %6s %5s %8s %8s %7s %9s %9s %7s %6s %6s %6s", "model", "budget", "calls", "p50 s",
+                "base s", "saved", "reason t", "base t", "shared", "shift", "|diff|", "rho")
+    for c in comparisons:
+        logger.info("🧠 %-18s %6s %5d %8s %8s %7s %9s %9s %7d %6s %6s %6s", c.model,
+                    "auto" if c.budget == -1 else c.budget, c.calls, fmt(c.p50_latency, ".1f"),
+                    fmt(c.base_p50_latency, ".1f"), fmt(c.latency_saved, ".0%"), fmt(c.reasoning_tokens, ".0f"),
+                    fmt(c.base_reasoning_tokens, ".0f"), c.shared_items, fmt(c.rating_shift, "+.1f"),
+                    fmt(c.rating_mad, ".1f"), fmt(c.spearman, ".2f"))
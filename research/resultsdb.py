@@ -0,0 +1,257 @@
+"""
+SQLite results database for the Status LLMs research project.
+
+data/results.db holds every parsed result in indexed tables, so the dashboard can
+answer filtered queries without re-reading data/:
+- runs: one row per (model, temperature, replicate, prompt) result;
+- items: one row per rated item, with the normalized name used to match items
+  across models.
+It also keeps materialized aggregates:
+- model_stats: mean rating and item count per model and temperature;
+- item_consensus: each item's mean rating across models (every model weighs the
+  same, however many replicates it has), ranked by how many models rated it, then
+  by that mean;
+- temperature_deltas: each model's mean rating per item and temperature, and the
+  change from the lowest temperature at which the model rated that item.
+
+The runner adds each result as it is saved. Aggregates are refreshed only for
+the (prompt, model) pairs that changed, at the end of a run or on `refresh()`.
+The database uses WAL mode, so the dashboard can read while a sweep writes.
+`python -m research db --rebuild` recreates it from data/.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from research.export import infer_provider, normalize_name, parse_result_filename
+from research.ledger import content_hash
+from research.store import read_records
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = 'results.db'
+DEFAULT_DB_PATH = os.path.join('data', DB_NAME)
+
+# AUTOINCREMENT: a replaced result gets an id above every earlier one (even the one
+# it replaces), so readers following `id > last seen` (research.watch) see it
+RUNS_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    provider TEXT,
+    temperature REAL NOT NULL,
+    replicate INTEGER NOT NULL DEFAULT 0,
+    prompt_id TEXT NOT NULL DEFAULT 'default',
+    prompt_hash TEXT,
+    source TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    UNIQUE (model, temperature, replicate, prompt_id)
+);
+"""
+
+SCHEMA = RUNS_TABLE.format(name='runs') + """
+CREATE INDEX IF NOT EXISTS runs_by_prompt ON runs (prompt_id, model, temperature);
+
+CREATE TABLE IF NOT EXISTS items (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    type TEXT,
+    rating REAL,
+    PRIMARY KEY (run_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_by_name ON items (normalized);
+
+CREATE TABLE IF NOT EXISTS model_stats (
+    prompt_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    temperature REAL NOT NULL,
+    runs INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    mean_rating REAL,
+    PRIMARY KEY (prompt_id, model, temperature)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS item_consensus (
+    prompt_id TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT,
+    models INTEGER NOT NULL,
+    mentions INTEGER NOT NULL,
+    mean_rating REAL,
+    rank INTEGER,
+    PRIMARY KEY (prompt_id, normalized)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS consensus_by_rank ON item_consensus (prompt_id, rank);
+
+CREATE TABLE IF NOT EXISTS temperature_deltas (
+    prompt_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    temperature REAL NOT NULL,
+    mean_rating REAL,
+    delta REAL,
+    PRIMARY KEY (prompt_id, model, normalized, temperature)
+) WITHOUT ROWID;
+"""
+
+# Mean rating of each item per model, the building block of the consensus
+_MODEL_ITEM_MEANS = """
+    SELECT r.model, i.normalized, MIN(i.name) AS name, MIN(i.type) AS type,
+           COUNT(*) AS mentions, AVG(i.rating) AS mean_rating
+    FROM items i JOIN runs r ON r.id = i.run_id
+    WHERE r.prompt_id = ?
+    GROUP BY r.model, i.normalized
+"""
+
+class ResultsDB:
+    """Incrementally maintained SQLite index of every saved result"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self.dirty: Set[Tuple[str, str]] = set()  # (prompt_id, model) pairs with stale aggregates
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Rebuild a `runs` table created before ids were AUTOINCREMENT, keeping its ids"""
+        sql = self.conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'runs'").fetchone()[0]
+        if 'AUTOINCREMENT' in sql.upper():
+            return
+        # Dropping the old table must not cascade to its items
+        self.conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            self.conn.execute("BEGIN")
+            self.conn.execute(RUNS_TABLE.format(name='runs_migrated'))
+            self.conn.execute("INSERT INTO runs_migrated SELECT * FROM runs")
+            self.conn.execute("DROP TABLE runs")
+            self.conn.execute("ALTER TABLE runs_migrated RENAME TO runs")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS runs_by_prompt ON runs (prompt_id, model, temperature)")
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.execute("PRAGMA foreign_keys=ON")
+        logger.info("🗃️ Migrated %s: run ids are now never reused", self.path)
+
+    @property
+    def empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None
+
+    def add(self, model: str, temperature: float, data: Dict[str, Any], replicate: int = 0,
+            prompt_id: str = 'default', provider: Optional[str] = None, source: str = 'file',
+            commit: bool = True):
+        """Insert or replace one result and its items; unchanged content is left alone"""
+        digest = content_hash({"items": data.get("items")})
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, content_hash FROM runs WHERE model = ? AND temperature = ? AND replicate = ? "
+                "AND prompt_id = ?", (model, temperature, replicate, prompt_id)).fetchone()
+            if row is not None and row[1] == digest:
+                return
+            if row is not None:
+                self.conn.execute("DELETE FROM runs WHERE id = ?", (row[0],))
+            run_id = self.conn.execute(
+                "INSERT INTO runs (model, provider, temperature, replicate, prompt_id, prompt_hash, source, "
+                "content_hash, saved_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (model, provider or infer_provider(model), temperature, replicate, prompt_id,
+                 data.get("prompt_hash"), source, digest, round(time.time(), 3))).lastrowid
+            items = []
+            for position, item in enumerate(data.get("items") or []):
+                name = str(item.get("name") or "")
+                rating = item.get("rating")
+                items.append((run_id, position, name, normalize_name(name), item.get("type"),
+                              float(rating) if isinstance(rating, (int, float)) else None))
+            self.conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?)", items)
+            self.dirty.add((prompt_id, model))
+            if commit:
+                self.conn.commit()
+
+    def refresh(self):
+        """Recompute the aggregates of every (prompt, model) pair that changed since the last refresh"""
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            if not dirty:
+                return
+            started = time.perf_counter()
+            for prompt_id, model in dirty:
+                self.conn.execute("DELETE FROM model_stats WHERE prompt_id = ? AND model = ?", (prompt_id, model))
+                self.conn.execute("""
+                    INSERT INTO model_stats
+                    SELECT r.prompt_id, r.model, r.temperature, COUNT(DISTINCT r.id), COUNT(i.run_id), AVG(i.rating)
+                    FROM runs r LEFT JOIN items i ON i.run_id = r.id
+                    WHERE r.prompt_id = ? AND r.model = ?
+                    GROUP BY r.temperature""", (prompt_id, model))
+                self.conn.execute("DELETE FROM temperature_deltas WHERE prompt_id = ? AND model = ?",
+                                  (prompt_id, model))
+                self.conn.execute("""
+                    INSERT INTO temperature_deltas
+                    SELECT prompt_id, model, normalized, temperature, mean_rating,
+                           mean_rating - FIRST_VALUE(mean_rating) OVER (
+                               PARTITION BY normalized ORDER BY temperature)
+                    FROM (SELECT r.prompt_id, r.model, i.normalized, r.temperature, AVG(i.rating) AS mean_rating
+                          FROM items i JOIN runs r ON r.id = i.run_id
+                          WHERE r.prompt_id = ? AND r.model = ?
+                          GROUP BY i.normalized, r.temperature)""", (prompt_id, model))
+            # Consensus ranks depend on every model, so each touched prompt is ranked again as a whole
+            for prompt_id in {prompt_id for prompt_id, _ in dirty}:
+                self.conn.execute("DELETE FROM item_consensus WHERE prompt_id = ?", (prompt_id,))
+                self.conn.execute(f"""
+                    INSERT INTO item_consensus
+                    SELECT ?, normalized, MIN(name), MIN(type), COUNT(*), SUM(mentions), AVG(mean_rating),
+                           RANK() OVER (ORDER BY COUNT(*) DESC, AVG(mean_rating) DESC)
+                    FROM ({_MODEL_ITEM_MEANS})
+                    GROUP BY normalized""", (prompt_id, prompt_id))
+            self.conn.commit()
+            logger.info("🗃️ Refreshed results database aggregates for %d model(s) in %.0f ms",
+                        len(dirty), (time.perf_counter() - started) * 1000)
+
+    def index(self, data_dirs: Dict[str, str], providers: Optional[Dict[str, str]] = None):
+        """Add every result already on disk; `data_dirs` maps prompt id -> its data directory"""
+        providers = providers or {}
+        added = 0
+        for prompt_id, data_dir in data_dirs.items():
+            if not os.path.isdir(data_dir):
+                continue
+            for filename in sorted(os.listdir(data_dir)):
+                model, temperature = parse_result_filename(filename) if filename.endswith('.json') else (None, None)
+                if not model:
+                    continue
+                try:
+                    with open(os.path.join(data_dir, filename), 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning("Skipping unreadable result %s: %s", filename, e)
+                    continue
+                if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+                    continue
+                self.add(model, temperature, data, 0, prompt_id, providers.get(model), 'file', commit=False)
+                added += 1
+            for record in read_records(os.path.join(data_dir, 'replicates')):
+                self.add(record["model"], record["temperature"], record, record["replicate"], prompt_id,
+                         record.get("provider") or providers.get(record["model"]), 'replicates', commit=False)
+                added += 1
+        with self.lock:
+            self.conn.commit()
+        logger.info("🗃️ Indexed %d results into %s", added, self.path)
+        self.refresh()
+
+    def close(self):
+        self.refresh()
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,194 @@
+"""
+Retry policy and per-provider circuit breaker for the Status LLMs research runner.
+
+Transient failures (429, 5xx, timeouts, dropped connections) are retried with
+exponential backoff and full jitter up to a fixed attempt budget. Each provider
+has its own circuit breaker: after repeated transient failures it opens and
+fails calls immediately for a cool-down period, so one struggling provider
+stops burning 3-minute timeouts while the others carry on.
+"""
+
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# Exception class names (anywhere in the MRO) that mean "try again later", covering
+# requests, httpx, the OpenAI/Anthropic SDKs and google-genai without importing them.
+RETRYABLE_EXCEPTION_NAMES = {
+    "Timeout", "ConnectionError", "ChunkedEncodingError",          # requests
+    "TimeoutException", "TransportError",                          # httpx
+    "APITimeoutError", "APIConnectionError", "InternalServerError", "RateLimitError",  # openai / anthropic
+    "ServerError",                                                 # google-genai
+}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+
+def status_code_of(exc: Exception) -> Optional[int]:
+    """HTTP status carried by an SDK or requests exception, if any"""
+    for candidate in (getattr(exc, 'status_code', None),
+                      getattr(getattr(exc, 'response', None), 'status_code', None),
+                      getattr(exc, 'code', None)):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+def is_retryable(exc: Exception) -> bool:
+    """Classify an exception as transient (worth retrying) or permanent"""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    status = status_code_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_EXCEPTION_NAMES for cls in type(exc).__mro__)
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+    parse_retries: int = 1  # fresh calls after a response that can't be parsed (or repaired)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+@dataclass
+class ProviderRetryStats:
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    successes: int = 0
+    failures: int = 0
+    gave_up: int = 0
+    breaker_opened: int = 0
+    short_circuited: int = 0
+    # Calls run on pool threads; unguarded += would lose updates
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **counts: int):
+        with self.lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive transient failures -> half-open after `reset_timeout`"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 120.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go through right now"""
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def release(self):
+        """End a call that says nothing about provider health; a half-open breaker lets the next one probe"""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a transient failure; returns True if this opened the breaker"""
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+class RetryManager:
+    """Applies one RetryPolicy and a circuit breaker per provider"""
+
+    def __init__(self, policy: RetryPolicy = None, failure_threshold: int = 5, reset_timeout: float = 120.0):
+        self.policy = policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats: Dict[str, ProviderRetryStats] = {}
+        self.lock = threading.Lock()
+
+    def _provider(self, provider: str):
+        with self.lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.stats[provider] = ProviderRetryStats()
+            return self.breakers[provider], self.stats[provider]
+
+    def call(self, provider: str, fn: Callable[[], T]) -> T:
+        """Run `fn`, retrying transient failures with backoff while the provider's breaker allows"""
+        breaker, stats = self._provider(provider)
+        stats.add(calls=1)
+
+        for attempt in range(1, self.policy.max_attempts + 1):
+            if not breaker.allow():
+                stats.add(short_circuited=1, failures=1)
+                raise CircuitOpenError(f"{provider} circuit breaker is open after repeated failures")
+
+            stats.add(attempts=1)
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    # Permanent errors (bad request, auth, parse) say nothing about provider health:
+                    # they neither close the breaker nor break a run of transient failures
+                    breaker.release()
+                    stats.add(failures=1)
+                    raise
+                if breaker.record_failure():
+                    stats.add(breaker_opened=1)
+                    logger.warning("🔌 %s circuit breaker opened for %.0fs", provider, self.reset_timeout)
+                if attempt == self.policy.max_attempts:
+                    stats.add(gave_up=1, failures=1)
+                    raise
+                delay = self.policy.backoff(attempt)
+                stats.add(retries=1)
+                logger.warning("%s transient error (%s), retry %d/%d in %.1fs",
+                               provider, type(e).__name__, attempt, self.policy.max_attempts - 1, delay)
+                time.sleep(delay)
+                continue
+
+            breaker.record_success()
+            stats.add(successes=1)
+            return result
+
+    def log_summary(self):
+        """Log retry counters and breaker state per provider"""
+        for provider in sorted(self.stats):
+            stats = self.stats[provider]
+            logger.info("🔁 %s: %d calls, %d attempts, %d retries, %d gave up, "
+                        "breaker %s (opened %d times, %d calls short-circuited)",
+                        provider, stats.calls, stats.attempts, stats.retries, stats.gave_up,
+                        self.breakers[provider].state, stats.breaker_opened, stats.short_circuited)
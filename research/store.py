@@ -0,0 +1,162 @@
+"""
+Append-only JSONL results store for replicate sweeps.
+
+Each parsed result is one line in data/replicates/{model}.jsonl carrying the
+model, temperature, replicate id, latency and token counts alongside the items.
+Lines are flushed immediately and fsync'd in batches. On open, a torn last line
+left by a crash is truncated away, so resume by replicate id is safe.
+`export_legacy()` still produces the per-file layout the dashboard reads.
+Result files are written with `atomic_write_json()` (temp file + rename), so a
+crash never leaves a truncated file behind.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join('data', 'replicates')
+
+ResultKey = Tuple[str, float, int]  # (model, temperature, replicate)
+
+def atomic_write_json(path: str, data: Any):
+    """Write JSON to a temp file in the same directory, fsync it and rename it over `path`"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _repair_tail(path: str):
+    """Truncate a partially written last line left behind by a crash"""
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        # Walk back to the last complete line
+        pos = size - 1
+        chunk = 4096
+        while pos > 0:
+            start = max(0, pos - chunk)
+            f.seek(start)
+            block = f.read(pos - start)
+            idx = block.rfind(b'\n')
+            if idx != -1:
+                pos = start + idx + 1
+                break
+            pos = start
+        f.truncate(pos)
+        logger.warning("Truncated torn record at end of %s (%d bytes)", path, size - pos)
+
+def read_records(directory: str = DEFAULT_STORE_DIR, model: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Iterate over the records in a store directory without opening it for writing"""
+    if not os.path.isdir(directory):
+        return
+    names = [f"{model}.jsonl"] if model else sorted(os.listdir(directory))
+    for name in names:
+        path = os.path.join(directory, name)
+        if not name.endswith('.jsonl') or not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping unreadable record in %s", path)
+
+class ResultStore:
+    """Sharded (one file per model) append-only JSONL store with batched fsync"""
+
+    def __init__(self, directory: str = DEFAULT_STORE_DIR, fsync_every: int = 32, fsync_interval: float = 2.0):
+        self.directory = directory
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.files: Dict[str, IO[str]] = {}
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.jsonl'):
+                _repair_tail(os.path.join(directory, name))
+
+    def _shard(self, model: str) -> IO[str]:
+        if model not in self.files:
+            self.files[model] = open(os.path.join(self.directory, f"{model}.jsonl"), 'a', encoding='utf-8')
+        return self.files[model]
+
+    def append(self, record: Dict[str, Any]):
+        """Write one result line; fsync every `fsync_every` records or `fsync_interval` seconds"""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self.lock:
+            f = self._shard(record["model"])
+            f.write(line)
+            f.flush()
+            self.pending += 1
+            if self.pending >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        for f in self.files.values():
+            os.fsync(f.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def flush(self):
+        """Force pending records to disk"""
+        with self.lock:
+            if self.pending:
+                self._sync()
+
+    def close(self):
+        with self.lock:
+            if self.pending:
+                self._sync()
+            for f in self.files.values():
+                f.close()
+            self.files.clear()
+
+    def records(self, model: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over stored records, optionally for a single model"""
+        return read_records(self.directory, model)
+
+    def completed(self) -> Set[ResultKey]:
+        """(model, temperature, replicate) keys that already have a stored result"""
+        return {(r["model"], r["temperature"], r["replicate"]) for r in self.records()}
+
+    def export_legacy(self, data_dir: str = 'data', overwrite: bool = False) -> List[Tuple[Dict[str, Any], str]]:
+        """Write the lowest replicate of each cell to data/{model}_{temperature}.json for the dashboard.
+
+        Returns (record, filename) for every file written.
+        """
+        chosen: Dict[Tuple[str, float], Dict[str, Any]] = {}
+        for record in self.records():
+            cell = (record["model"], record["temperature"])
+            # Later records win ties, so a --force re-run replaces the earlier sample
+            if cell not in chosen or record["replicate"] <= chosen[cell]["replicate"]:
+                chosen[cell] = record
+
+        written = []
+        for (model, temperature), record in sorted(chosen.items()):
+            filename = os.path.join(data_dir, f"{model}_{temperature}.json")
+            if os.path.exists(filename) and not overwrite:
+                continue
+            atomic_write_json(filename, {"items": record["items"]})
+            written.append((record, filename))
+        logger.info("Exported %d legacy result files from %s", len(written), self.directory)
+        return written
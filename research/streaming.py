@@ -0,0 +1,101 @@
+"""
+Streaming consumption of provider responses for the Status LLMs research runner.
+
+Every provider path yields its output as plain text chunks. An empty string
+means a token arrived that is not part of the answer, such as DeepSeek
+reasoning. `consume_stream()` drains one of these iterators. It records
+time-to-first-token and throughput, feeds the text through the incremental item
+extractor, and stops reading shortly after the answer is complete. It aborts
+early if the output clearly is not the required JSON, if an item is invalid,
+or if the output runs past the item budget. Closing the iterator closes the
+underlying HTTP stream, so the provider stops generating tokens we would throw
+away.
+"""
+
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, Optional
+
+from research.extract import ItemExtractor, ResponseParseError
+from research.metrics import current_usage, report_stream
+
+logger = logging.getLogger(__name__)
+
+# The prompt asks for 25 items; anything far beyond that is a runaway generation
+DEFAULT_MAX_ITEMS = 40
+# Characters of answer text allowed before the JSON object has to start
+DEFAULT_MAX_PREAMBLE = 2000
+
+class StreamAborted(ResponseParseError):
+    """A streamed response was cut short because it cannot produce a usable result"""
+
+@dataclass
+class StreamStats:
+    ttft: Optional[float] = None            # seconds until the first token (answer or reasoning)
+    duration: float = 0.0
+    chunks: int = 0
+    chars: int = 0
+    completion_tokens: Optional[int] = None
+    aborted: Optional[str] = None
+
+    @property
+    def tokens_per_sec(self) -> Optional[float]:
+        """Completion throughput after the first token (chars/4 when the provider gave no count)"""
+        if self.ttft is None:
+            return None
+        generating = self.duration - self.ttft
+        tokens = self.completion_tokens if self.completion_tokens is not None else self.chars / 4
+        return round(tokens / generating, 1) if generating > 0 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats["tokens_per_sec"] = self.tokens_per_sec
+        return stats
+
+def consume_stream(chunks: Iterator[str], max_items: Optional[int] = DEFAULT_MAX_ITEMS,
+                   max_preamble: int = DEFAULT_MAX_PREAMBLE, stats: Optional[StreamStats] = None,
+                   repair: bool = False) -> str:
+    """Drain a chunk iterator into the response text, aborting as soon as it can't be used.
+
+    With `repair`, items that research.extract can fix up don't abort the stream.
+    """
+    stats = stats or StreamStats()
+    extractor = ItemExtractor(max_items=max_items, repair=repair)
+    parts = []
+    trailing = 0
+    start = time.monotonic()
+    try:
+        for chunk in chunks:
+            if stats.ttft is None:
+                stats.ttft = time.monotonic() - start
+            stats.chunks += 1
+            if not chunk:
+                continue
+            stats.chars += len(chunk)
+            if extractor.done:
+                # Keep draining briefly so the final usage chunk arrives, but don't pay for an essay
+                trailing += len(chunk)
+                if trailing > max_preamble:
+                    break
+                continue
+            parts.append(chunk)
+            extractor.feed(chunk)
+            if not extractor.seen_object and stats.chars > max_preamble:
+                raise StreamAborted(f"No JSON object in the first {max_preamble} characters")
+    except ResponseParseError as e:
+        stats.aborted = str(e)
+        logger.warning("✂️ Aborted stream after %d chars: %s", stats.chars, e)
+        if isinstance(e, StreamAborted):
+            raise
+        raise StreamAborted(str(e)) from e
+    finally:
+        stats.duration = time.monotonic() - start
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+        usage = current_usage()
+        if usage is not None:
+            stats.completion_tokens = usage.completion_tokens
+            report_stream(stats.ttft, stats.tokens_per_sec)
+    return ''.join(parts)
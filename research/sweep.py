@@ -0,0 +1,271 @@
+"""
+Declarative sweep specification and job planner for the Status LLMs research runner.
+
+The sweep lives in sweep.json: models, per-provider limits (maximum
+temperature, concurrency), temperatures, prompts, replicates and max_tokens.
+`plan_sweep()` compiles it into an explicit plan:
+- out-of-range temperatures are pruned up front and never become jobs;
+- jobs that already have a saved result are dropped;
+- jobs the response cache can answer are set apart, since they need no API call;
+- duplicate jobs collapse into one.
+A model with several routes (see research.backends) has its jobs split between
+them by weight. The remaining jobs are interleaved across providers and routes in
+proportion to their concurrency, so every queue stays saturated. The plan also carries
+an ETA estimated from historical per-model latency.
+"""
+
+import os
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+from research.backends import BACKEND_CLASSES, DEFAULT_ROUTE, Route, weighted_cycle
+from research.engine import DEFAULT_PROVIDER_CONCURRENCY, Job
+from research.cache import cache_key_factory
+from research.ledger import JobKey, RunLedger
+from research.reasoning import ANTHROPIC_THINKING_TEMPERATURE, REASONING_PROVIDERS, budget_problem, variant_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPEC_PATH = 'sweep.json'
+DEFAULT_PROMPT_ID = 'default'
+DEFAULT_MAX_TOKENS = 2000
+DEFAULT_MAX_TEMPERATURE = 1.0
+# Assumed seconds per call for models with no latency history
+DEFAULT_LATENCY = 30.0
+
+@dataclass
+class ModelConfig:
+    name: str
+    api_name: str
+    provider: str
+    endpoint: str = None
+    max_tokens: int = None  # defaults to the sweep's max_tokens
+    temperatures: Optional[List[float]] = None  # overrides the sweep's temperatures
+    replicates: Optional[int] = None  # overrides the sweep's replicates
+    routes: Optional[List[Route]] = None  # backends to call the model through (default: native API)
+    reasoning_budget: Optional[int] = None  # thinking tokens (default: the provider's; see research.reasoning)
+
+@dataclass
+class SweepSpec:
+    models: List[ModelConfig]
+    temperatures: List[float]
+    replicates: int = 1
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    # prompt id -> path, or {"path": ..., "suffix": ...} for a variant sharing that file's instructions
+    prompts: Dict[str, Union[str, Dict[str, str]]] = field(default_factory=lambda: {DEFAULT_PROMPT_ID: 'prompt.md'})
+    providers: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SPEC_PATH) -> "SweepSpec":
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        fields = set(ModelConfig.__dataclass_fields__)
+        models = []
+        for entry in raw.get("models", []):
+            if not entry.get("enabled", True):
+                continue
+            unknown = set(entry) - fields - {"enabled", "note"}
+            if unknown:
+                raise ValueError(f"Unknown keys for model {entry.get('name')!r} in {path}: {sorted(unknown)}")
+            config = ModelConfig(**{k: v for k, v in entry.items() if k in fields})
+            if config.routes:
+                config.routes = [Route(**route) for route in config.routes]
+                unknown = {route.backend for route in config.routes} - set(BACKEND_CLASSES)
+                if unknown:
+                    raise ValueError(f"Unknown backend for model {config.name!r} in {path}: {sorted(unknown)}")
+            models.append(config)
+        names = [m.name for m in models]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate model names in {path}")
+        spec = cls(models=models,
+                   temperatures=raw.get("temperatures", [0.7]),
+                   replicates=raw.get("replicates", 1),
+                   max_tokens=raw.get("max_tokens", DEFAULT_MAX_TOKENS),
+                   prompts=raw.get("prompts") or {DEFAULT_PROMPT_ID: 'prompt.md'},
+                   providers=raw.get("providers", {}))
+        for config in models:
+            problem = budget_problem(config, spec.max_tokens_for(config), spec.temperatures_for(config))
+            if problem:
+                raise ValueError(f"Invalid reasoning_budget for model {config.name!r} in {path}: {problem}")
+        return spec
+
+    def max_temperature(self, provider: str) -> float:
+        return self.providers.get(provider, {}).get("max_temperature", DEFAULT_MAX_TEMPERATURE)
+
+    def concurrency(self) -> Dict[str, int]:
+        limits = dict(DEFAULT_PROVIDER_CONCURRENCY)
+        limits.update({p: c["concurrency"] for p, c in self.providers.items() if "concurrency" in c})
+        return limits
+
+    def max_tokens_for(self, config: ModelConfig) -> int:
+        return config.max_tokens or self.max_tokens
+
+    def temperatures_for(self, config: ModelConfig) -> List[float]:
+        return config.temperatures or self.temperatures
+
+    def multi_sample(self) -> bool:
+        """More than one sample per cell: results go to the replicate store instead of one file each"""
+        return max([m.replicates or self.replicates for m in self.models], default=1) > 1
+
+    def routes_for(self, config: ModelConfig) -> List[Route]:
+        return config.routes or [DEFAULT_ROUTE]
+
+    def route_all(self, backend: str):
+        """Send every model through one backend, e.g. the aimlapi aggregator"""
+        if backend not in BACKEND_CLASSES:
+            raise ValueError(f"Unknown backend {backend!r} (expected one of {sorted(BACKEND_CLASSES)})")
+        for config in self.models:
+            config.routes = [Route(backend)]
+
+    def add_reasoning_budgets(self, budgets: List[int]) -> List[ModelConfig]:
+        """Add a `{name}@think-{budget}` variant of each model for every budget it accepts.
+
+        Variants keep the model's max_tokens; Anthropic ones with extended thinking only run at temperature 1.0.
+        """
+        added = []
+        for config in list(self.models):
+            if config.reasoning_budget is not None:
+                continue
+            for budget in budgets:
+                variant = replace(config, name=variant_name(config.name, budget), reasoning_budget=budget)
+                if config.provider == "anthropic" and budget:
+                    variant.temperatures = [ANTHROPIC_THINKING_TEMPERATURE]
+                problem = budget_problem(variant, self.max_tokens_for(variant), self.temperatures_for(variant))
+                if problem:
+                    if config.provider in REASONING_PROVIDERS:
+                        logger.info("🧠 Skipping %s: %s", variant.name, problem)
+                    continue
+                self.models.append(variant)
+                added.append(variant)
+        return added
+
+def prompt_data_dir(prompt_id: str, data_dir: str = 'data') -> str:
+    """Results for the default prompt live in data/, variants under data/variants/{id}/"""
+    if prompt_id == DEFAULT_PROMPT_ID:
+        return data_dir
+    return os.path.join(data_dir, 'variants', prompt_id)
+
+def done_checker(spec: SweepSpec, prompt_ids: List[str], ledger: RunLedger) -> Callable[[Job], bool]:
+    """Whether a job already has a saved result, according to the run ledger.
+
+    A ledger that doesn't exist yet is first filled in from what is on disk.
+    """
+    if not ledger.exists:
+        ledger.index({prompt_id: prompt_data_dir(prompt_id, ledger.root) for prompt_id in prompt_ids})
+    layout = "replicates" if spec.multi_sample() else "file"
+    return lambda job: ledger.is_done(job_key(job), layout)
+
+def job_key(job: Job) -> JobKey:
+    return (job.config.name, job.temperature, job.replicate, job.prompt_id)
+
+@dataclass
+class SweepPlan:
+    jobs: List[Job] = field(default_factory=list)       # need an API call, interleaved across providers
+    cached: List[Job] = field(default_factory=list)     # answered by the response cache
+    pruned: int = 0                                     # temperature above the provider's maximum
+    done: int = 0                                       # result already saved
+    duplicates: int = 0
+
+    @property
+    def runnable(self) -> List[Job]:
+        """Everything to execute: cached jobs first (they finish instantly), then API calls"""
+        return self.cached + self.jobs
+
+    def by_provider(self) -> Dict[str, int]:
+        counts: Dict[str, int] = defaultdict(int)
+        for job in self.jobs:
+            counts[job.provider] += 1
+        return dict(counts)
+
+    def eta(self, concurrency: Dict[str, int], latencies: Dict[str, float],
+            rpm: Optional[Dict[str, Optional[float]]] = None, parallel: bool = True) -> float:
+        """Estimated seconds to run the API jobs.
+
+        Each provider drains its queue at min(concurrency / latency, rpm / 60)
+        calls per second. With `parallel`, providers run side by side and the
+        slowest one decides the total; otherwise the calls are run one after another.
+        """
+        busy: Dict[str, float] = defaultdict(float)
+        counts: Dict[str, int] = defaultdict(int)
+        for job in self.jobs:
+            busy[job.provider] += latencies.get(job.config.name, DEFAULT_LATENCY)
+            counts[job.provider] += 1
+        if not parallel:
+            return sum(busy.values())
+        estimates = []
+        for provider, seconds in busy.items():
+            estimate = seconds / max(1, concurrency.get(provider, 1))
+            limit = (rpm or {}).get(provider)
+            if limit:
+                estimate = max(estimate, counts[provider] / limit * 60)
+            estimates.append(estimate)
+        return max(estimates, default=0.0)
+
+    def describe(self) -> str:
+        queues = ', '.join(f"{p} {n}" for p, n in sorted(self.by_provider().items()))
+        return (f"{len(self.jobs)} API calls ({queues or 'none'}), {len(self.cached)} from cache, "
+                f"{self.done} already done, {self.pruned} pruned (temperature out of range)"
+                + (f", {self.duplicates} duplicates" if self.duplicates else ""))
+
+def interleave(queues: Dict[str, List[Job]], weights: Dict[str, int]) -> List[Job]:
+    """Round-robin over provider queues, taking `weight` jobs from each per round"""
+    ordered = []
+    positions = {provider: 0 for provider in queues}
+    active = [p for p in sorted(queues) if queues[p]]
+    while active:
+        still_active = []
+        for provider in active:
+            queue, start = queues[provider], positions[provider]
+            step = max(1, weights.get(provider, 1))
+            ordered.extend(queue[start:start + step])
+            positions[provider] = start + step
+            if positions[provider] < len(queue):
+                still_active.append(provider)
+        active = still_active
+    return ordered
+
+def plan_sweep(spec: SweepSpec, prompts: Dict[str, str], is_done: Callable[[Job], bool],
+               cached_keys: Optional[Set[str]] = None) -> SweepPlan:
+    """Compile the spec into a plan; `prompts` maps prompt id -> prompt text"""
+    plan = SweepPlan()
+    queues: Dict[str, List[Job]] = defaultdict(list)
+    seen = set()
+    for config in spec.models:
+        temperatures = spec.temperatures_for(config)
+        replicates = config.replicates or spec.replicates
+        limit = spec.max_temperature(config.provider)
+        allowed = [t for t in temperatures if t <= limit]
+        plan.pruned += (len(temperatures) - len(allowed)) * replicates * len(prompts)
+        routes = spec.routes_for(config)
+        # Deal the model's jobs out over its routes by weight; a single native route stays implicit
+        cycle = weighted_cycle(routes) if routes != [DEFAULT_ROUTE] else [None]
+        dealt = 0
+        for prompt_id, prompt in prompts.items():
+            key_of = None
+            if cached_keys:
+                key_of = cache_key_factory(config.provider, config.api_name, prompt, spec.max_tokens_for(config),
+                                           config.reasoning_budget)
+            for temperature in allowed:
+                for replicate in range(replicates):
+                    identity = (config.name, temperature, replicate, prompt_id)
+                    if identity in seen:
+                        plan.duplicates += 1
+                        continue
+                    seen.add(identity)
+                    job = Job(config, temperature, replicate, prompt_id, cycle[dealt % len(cycle)])
+                    if is_done(job):
+                        plan.done += 1
+                    elif key_of is not None and key_of(temperature, replicate) in cached_keys:
+                        plan.cached.append(job)
+                    else:
+                        dealt += 1
+                        queues[job.provider].append(job)
+
+    # Lower replicates first everywhere, so partial sweeps cover every cell
+    for queue in queues.values():
+        queue.sort(key=lambda job: job.replicate)
+    plan.jobs = interleave(queues, spec.concurrency())
+    return plan
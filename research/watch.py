@@ -0,0 +1,406 @@
+"""
+Live results feed for the Status LLMs dashboard.
+
+`python -m research watch` follows data/results.db, which the runner (or a
+distributed sweep's coordinator) updates as each result is saved, and serves
+what changed as Server-Sent Events:
+- GET /events: a `snapshot` event with every aggregate, then one `delta` event
+  per batch of new results carrying those results, the earlier results they
+  replaced (`retracted`) and only the aggregate rows they changed. Reconnecting with Last-Event-ID replays the missed deltas, or
+  sends a fresh snapshot when they are no longer buffered.
+- GET /snapshot: the current aggregates as JSON.
+Both take ?prompt=ID to follow one prompt.
+
+New results are found by run id (`runs.id > last seen`), so each poll reads
+only the rows added since the previous one. Run ids are never reused, so a
+replaced result comes back under a new id. The aggregates mirror the results
+database's model_stats, item_consensus (without the rank, which depends on
+every item) and temperature_deltas. They are updated incrementally, in time
+proportional to the new items. A re-run result replaces the earlier one for
+its (model, temperature, replicate, prompt). A rebuilt database is read again
+from scratch.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from research.resultsdb import DB_NAME, DEFAULT_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_INTERVAL = 0.5
+# Deltas kept for clients reconnecting with Last-Event-ID
+DEFAULT_BACKLOG = 1000
+# Seconds between SSE comments that keep idle connections (and proxies) open
+KEEPALIVE = 15.0
+# New runs read per poll; a bulk import is spread over several deltas
+POLL_LIMIT = 500
+
+RunKey = Tuple[str, str, float, int]  # (prompt_id, model, temperature, replicate)
+
+_NEW_RUNS = """
+    SELECT r.id, r.prompt_id, r.model, r.provider, r.temperature, r.replicate, i.name, i.normalized, i.type, i.rating
+    FROM runs r LEFT JOIN items i ON i.run_id = r.id
+    WHERE r.id > ? AND r.id <= ?
+    ORDER BY r.id, i.position
+"""
+
+@dataclass
+class _Mean:
+    total: float = 0.0
+    rated: int = 0   # rows with a rating
+    rows: int = 0    # rows, rated or not
+
+    def add(self, rating: Optional[float], sign: int = 1):
+        self.rows += sign
+        if rating is not None:
+            self.total += sign * rating
+            self.rated += sign
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.rated if self.rated > 0 else None
+
+@dataclass
+class _ItemInfo:
+    name: str
+    type: Optional[str]
+    models: Set[str] = field(default_factory=set)
+
+class LiveAggregates:
+    """model_stats, item_consensus and temperature_deltas, updated one result at a time"""
+
+    def __init__(self):
+        self.runs: Dict[RunKey, List[Tuple[str, str, Optional[str], Optional[float]]]] = {}
+        self.model_stats: Dict[Tuple[str, str, float], Tuple[int, _Mean]] = {}
+        self.model_items: Dict[Tuple[str, str, str], _Mean] = {}            # (prompt, model, item)
+        self.items: Dict[Tuple[str, str], _ItemInfo] = {}                    # (prompt, item)
+        self.item_temperatures: Dict[Tuple[str, str, str], Dict[float, _Mean]] = {}  # (prompt, model, item)
+
+    def apply(self, key: RunKey, items: List[Tuple[str, str, Optional[str], Optional[float]]]
+              ) -> Tuple[Set[Tuple[str, str, float]], Set[Tuple[str, str]], Set[Tuple[str, str, str]]]:
+        """Add one result (replacing any earlier one with the same key); returns the changed aggregate keys"""
+        prompt_id, model, temperature, _ = key
+        stat_keys = {(prompt_id, model, temperature)}
+        item_keys: Set[Tuple[str, str]] = set()
+        delta_keys: Set[Tuple[str, str, str]] = set()
+        previous = self.runs.pop(key, None)
+        for rows, sign in ((previous, -1), (items, 1)):
+            if rows is None:
+                continue
+            runs, stats = self.model_stats.get((prompt_id, model, temperature)) or (0, _Mean())
+            self.model_stats[(prompt_id, model, temperature)] = (runs + sign, stats)
+            for name, normalized, kind, rating in rows:
+                stats.add(rating, sign)
+                self.model_items.setdefault((prompt_id, model, normalized), _Mean()).add(rating, sign)
+                self.item_temperatures.setdefault((prompt_id, model, normalized), {}).setdefault(
+                    temperature, _Mean()).add(rating, sign)
+                info = self.items.get((prompt_id, normalized))
+                if info is None:
+                    info = self.items[(prompt_id, normalized)] = _ItemInfo(name, kind)
+                elif sign > 0:
+                    # MIN(name), MIN(type) as in the results database
+                    info.name = min(info.name, name)
+                    if kind is not None:
+                        info.type = kind if info.type is None else min(info.type, kind)
+                item_keys.add((prompt_id, normalized))
+                delta_keys.add((prompt_id, model, normalized))
+        self.runs[key] = items
+        for prompt_id, model, normalized in delta_keys:
+            info = self.items[(prompt_id, normalized)]
+            if self.model_items[(prompt_id, model, normalized)].rows > 0:
+                info.models.add(model)
+            else:
+                info.models.discard(model)
+        return stat_keys, item_keys, delta_keys
+
+    def model_stat_row(self, key: Tuple[str, str, float]) -> Dict[str, Any]:
+        prompt_id, model, temperature = key
+        runs, stats = self.model_stats[key]
+        return {"prompt_id": prompt_id, "model": model, "temperature": temperature, "runs": runs,
+                "items": stats.rows, "mean_rating": stats.mean}
+
+    def consensus_row(self, key: Tuple[str, str]) -> Dict[str, Any]:
+        prompt_id, normalized = key
+        info = self.items[key]
+        # Every model weighs the same, however many replicates it has
+        means = [self.model_items[(prompt_id, model, normalized)] for model in info.models]
+        per_model = [m.mean for m in means if m.mean is not None]
+        return {"prompt_id": prompt_id, "normalized": normalized, "name": info.name, "type": info.type,
+                "models": len(info.models), "mentions": sum(m.rows for m in means),
+                "mean_rating": sum(per_model) / len(per_model) if per_model else None}
+
+    def temperature_rows(self, key: Tuple[str, str, str]) -> List[Dict[str, Any]]:
+        """Mean rating per temperature and the change from the lowest temperature"""
+        prompt_id, model, normalized = key
+        temperatures = sorted((t, m) for t, m in self.item_temperatures.get(key, {}).items() if m.rows > 0)
+        base = temperatures[0][1].mean if temperatures else None
+        return [{"prompt_id": prompt_id, "model": model, "normalized": normalized, "temperature": t,
+                 "mean_rating": m.mean, "delta": m.mean - base if m.mean is not None and base is not None else None}
+                for t, m in temperatures]
+
+    def rows(self, stat_keys, item_keys, delta_keys, prompt_id: Optional[str] = None,
+             removed: bool = False) -> Dict[str, Any]:
+        """Aggregate rows for the given keys, optionally only one prompt's.
+
+        temperature_deltas rows come as the full set for their (model, item). With
+        `removed`, keys whose rows no longer exist (a replaced result dropped the
+        last of them) are listed under "removed".
+        """
+        keep = lambda key: prompt_id is None or key[0] == prompt_id
+        stat_keys = sorted(k for k in stat_keys if keep(k))
+        item_keys = sorted(k for k in item_keys if keep(k))
+        delta_keys = sorted(k for k in delta_keys if keep(k))
+        gone_stats = [k for k in stat_keys if self.model_stats[k][0] <= 0]
+        gone_items = [k for k in item_keys if not self.items[k].models]
+        temperature_rows = {k: self.temperature_rows(k) for k in delta_keys}
+        rows: Dict[str, Any] = {
+            "model_stats": [self.model_stat_row(k) for k in stat_keys if k not in gone_stats],
+            "item_consensus": [self.consensus_row(k) for k in item_keys if k not in gone_items],
+            "temperature_deltas": [row for k in delta_keys for row in temperature_rows[k]],
+        }
+        if removed:
+            rows["removed"] = {
+                "model_stats": [dict(zip(("prompt_id", "model", "temperature"), k)) for k in gone_stats],
+                "item_consensus": [dict(zip(("prompt_id", "normalized"), k)) for k in gone_items],
+                "temperature_deltas": [dict(zip(("prompt_id", "model", "normalized"), k))
+                                       for k in delta_keys if not temperature_rows[k]],
+            }
+        return rows
+
+    def snapshot(self, prompt_id: Optional[str] = None) -> Dict[str, List[Any]]:
+        return self.rows(self.model_stats.keys(), self.items.keys(), self.item_temperatures.keys(), prompt_id)
+
+class ResultsFeed:
+    """Polls the results database for new runs and keeps the aggregates and a buffer of deltas"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, interval: float = DEFAULT_INTERVAL,
+                 backlog: int = DEFAULT_BACKLOG):
+        self.db_path = db_path
+        self.interval = interval
+        self.aggregates = LiveAggregates()
+        self.last_id = 0
+        self.identity: Optional[Tuple[int, int]] = None   # (device, inode) of the database file
+        self.seq = 0
+        self.epoch = 0                                    # seq of the last full read; older clients need a snapshot
+        # (seq, new results, results they replaced, changed aggregate keys)
+        self.deltas: Deque[Tuple[int, List[Dict[str, Any]], List[Dict[str, Any]], Tuple[Set, Set, Set]]] = \
+            deque(maxlen=backlog)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.stopped = threading.Event()
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        try:
+            stat = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_dev, stat.st_ino)
+        if self.conn is not None and identity == self.identity:
+            return self.conn
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        if self.identity is not None:
+            logger.info("📡 %s was replaced, reading it again", self.db_path)
+            self._reset()
+        self.identity = identity
+        return self.conn
+
+    def _reset(self):
+        with self.lock:
+            self.aggregates = LiveAggregates()
+            self.last_id = 0
+            self.deltas.clear()
+
+    def poll(self) -> int:
+        """Fold runs added since the last poll into the aggregates; returns how many were read"""
+        conn = self._connect()
+        if conn is None:
+            return 0
+        try:
+            newest = conn.execute("SELECT MAX(id) FROM runs").fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            return 0   # tables not created yet
+        if newest < self.last_id:
+            logger.info("📡 %s was rebuilt, reading it again", self.db_path)
+            self._reset()
+        upto = min(newest, self.last_id + POLL_LIMIT) if self.last_id else newest
+        if upto <= self.last_id:
+            return 0
+        runs: Dict[int, Dict[str, Any]] = {}
+        items: Dict[int, List[Tuple[str, str, Optional[str], Optional[float]]]] = {}
+        for row in conn.execute(_NEW_RUNS, (self.last_id, upto)):
+            run_id, prompt_id, model, provider, temperature, replicate, name, normalized, kind, rating = row
+            if run_id not in runs:
+                runs[run_id] = {"prompt_id": prompt_id, "model": model, "provider": provider,
+                                "temperature": temperature, "replicate": replicate, "items": []}
+                items[run_id] = []
+            if name is not None:
+                runs[run_id]["items"].append({"name": name, "type": kind, "rating": rating})
+                items[run_id].append((name, normalized, kind, rating))
+
+        with self.changed:
+            stat_keys: Set = set()
+            item_keys: Set = set()
+            delta_keys: Set = set()
+            retracted: List[Dict[str, Any]] = []
+            for run_id, run in runs.items():
+                key = (run["prompt_id"], run["model"], run["temperature"], run["replicate"])
+                previous = self.aggregates.runs.get(key)
+                if previous is not None:
+                    retracted.append({**{k: v for k, v in run.items() if k != "items"},
+                                      "items": [{"name": name, "type": kind, "rating": rating}
+                                                for name, _, kind, rating in previous]})
+                changed = self.aggregates.apply(key, items[run_id])
+                stat_keys |= changed[0]
+                item_keys |= changed[1]
+                delta_keys |= changed[2]
+            first = self.last_id == 0
+            self.last_id = upto
+            self.seq += 1
+            if first:
+                # A full read is a new snapshot rather than news; clients behind it start over
+                self.epoch = self.seq
+                logger.info("📡 Loaded %d results from %s", len(runs), self.db_path)
+            else:
+                self.deltas.append((self.seq, list(runs.values()), retracted, (stat_keys, item_keys, delta_keys)))
+            self.changed.notify_all()
+        return len(runs)
+
+    def run(self):
+        """Poll until stop() is called"""
+        while not self.stopped.is_set():
+            try:
+                read = self.poll()
+            except sqlite3.Error as e:
+                logger.warning("📡 Couldn't read %s: %s", self.db_path, e)
+                read = 0
+            # Catch up on a backlog without waiting; otherwise poll at the interval
+            if read < POLL_LIMIT:
+                self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        with self.changed:
+            self.changed.notify_all()
+
+    def snapshot(self, prompt_id: Optional[str] = None) -> Dict[str, Any]:
+        with self.lock:
+            return {"seq": self.seq, **self.aggregates.snapshot(prompt_id)}
+
+    def events_after(self, seq: int, prompt_id: Optional[str] = None
+                     ) -> Optional[List[Tuple[int, Optional[Dict[str, Any]]]]]:
+        """Deltas after `seq` (None for those about other prompts), or None if the client needs a snapshot"""
+        with self.lock:
+            if seq < self.epoch or seq > self.seq or (self.deltas and seq < self.deltas[0][0] - 1):
+                return None
+            events = []
+            for delta_seq, results, retracted, keys in self.deltas:
+                if delta_seq <= seq:
+                    continue
+                results = [r for r in results if prompt_id is None or r["prompt_id"] == prompt_id]
+                if not results:
+                    events.append((delta_seq, None))
+                    continue
+                retracted = [r for r in retracted if prompt_id is None or r["prompt_id"] == prompt_id]
+                rows = self.aggregates.rows(*keys, prompt_id=prompt_id, removed=True)
+                events.append((delta_seq, {"seq": delta_seq, "results": results, "retracted": retracted, **rows}))
+            return events
+
+    def wait(self, seq: int, timeout: float) -> int:
+        """Block until there is a delta after `seq` (or `timeout` passes); returns the latest seq"""
+        with self.changed:
+            if self.seq <= seq and not self.stopped.is_set():
+                self.changed.wait(timeout)
+            return self.seq
+
+def _handler(feed: ResultsFeed):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, obj: Any, status: int = 200):
+            body = json.dumps(obj, separators=(',', ':')).encode()
+            self.send_response(status)
+            self.send_header('content-type', 'application/json')
+            self.send_header('content-length', str(len(body)))
+            self.send_header('access-control-allow-origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            prompt_id = (parse_qs(url.query).get('prompt') or [None])[0]
+            if url.path == '/snapshot':
+                return self.send_json(feed.snapshot(prompt_id))
+            if url.path == '/events':
+                return self.stream(prompt_id)
+            self.send_json({"error": "not found"}, 404)
+
+        def event(self, kind: str, seq: int, data: Dict[str, Any]):
+            payload = json.dumps(data, separators=(',', ':'))
+            self.wfile.write(f"id: {seq}\nevent: {kind}\ndata: {payload}\n\n".encode())
+
+        def stream(self, prompt_id: Optional[str]):
+            self.send_response(200)
+            self.send_header('content-type', 'text/event-stream')
+            self.send_header('cache-control', 'no-cache')
+            self.send_header('access-control-allow-origin', '*')
+            self.send_header('connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            last = self.headers.get('last-event-id')
+            seq = int(last) if last and last.isdigit() else None
+            try:
+                while not feed.stopped.is_set():
+                    events = feed.events_after(seq, prompt_id) if seq is not None else None
+                    if events is None:
+                        snapshot = feed.snapshot(prompt_id)
+                        seq = snapshot["seq"]
+                        self.event("snapshot", seq, snapshot)
+                    else:
+                        for delta_seq, data in events:
+                            if data is not None:
+                                self.event("delta", delta_seq, data)
+                            seq = delta_seq
+                        if not any(data for _, data in events):
+                            self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    feed.wait(seq, KEEPALIVE)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+def serve(data_dir: str = 'data', host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          interval: float = DEFAULT_INTERVAL):
+    """Follow data_dir's results database and serve its changes until interrupted"""
+    feed = ResultsFeed(os.path.join(data_dir, DB_NAME), interval)
+    httpd = _Server((host, port), _handler(feed))
+    poller = threading.Thread(target=feed.run, name="results-feed", daemon=True)
+    poller.start()
+    logger.info("📡 Serving live results from %s on http://%s:%d/events", feed.db_path, host, httpd.server_port)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        feed.stop()
+        httpd.server_close()
@@ -28,378 +28,320 @@ activities and objects in contemporary society across different temperature sett
 - DeepSeek: Up to 1.2
 - OpenAI (GPT): Up to 1.2
 
-⚡ The script automatically skips unsupported temperature/model combinations
+⚡ The sweep (models, temperatures, provider limits, prompts, replicates) is declared
+   in sweep.json; unsupported temperature/model combinations are pruned by the planner
 📁 Results are saved to data/ directory as JSON files
 """
 
 import os
-import json
+import sys
 import time
 import logging
-from typing import Dict, Any
-from dataclasses import dataclass
-import openai
-from anthropic import Anthropic
-from google import genai
-import requests
+import argparse
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from dataclasses import asdict, dataclass
+
+from research.backends import BACKEND_CLASSES, DEFAULT_ROUTE, BackendContext, BackendRegistry, Route
+from research.engine import Job, Progress, format_duration, result_path, run_sweep
+from research.sweep import ModelConfig, SweepPlan, SweepSpec, done_checker, job_key, plan_sweep, prompt_data_dir
+from research.ratelimit import RateLimiterRegistry, estimate_tokens, parse_rate_limit
+from research.clients import ClientRegistry
+from research.retry import RetryManager, RetryPolicy, is_retryable, status_code_of
+from research.concurrency import ConcurrencyController
+from research.cache import CACHE_MODES, ResponseCache, cache_key
+from research.metrics import (DEFAULT_METRICS_PATH, CallRecord, CallUsage, MetricsRecorder, answer_tokens,
+                              call_cost, current_usage, latency_history, track_usage)
+from research.store import ResultStore, atomic_write_json
+from research.ledger import DONE, RunLedger, content_hash
+from research.resultsdb import DEFAULT_DB_PATH, ResultsDB
+from research.reasoning import compare_budgets, effective_api_name, log_comparison, parse_budgets
+from research.batch import (AnthropicBatchBackend, BatchLedger, BatchRequest, BatchResult,
+                            OpenAIBatchBackend, make_custom_id, poll_batches)
+from research.extract import ResponseParseError, extract_items
+from research.prompts import PromptVariant, load_variant
+from research.streaming import StreamAborted, consume_stream
+from research.jobqueue import DEFAULT_MAX_DELIVERIES, DEFAULT_QUEUE_PATH, FAILED, Finished, open_queue
+from research.distributed import DEFAULT_LEASE, Worker, coordinate, job_id, job_payload
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
-class ModelConfig:
-    name: str
-    api_name: str
-    provider: str
-    endpoint: str = None
-
-# Model configurations based on research
-MODELS = [
-    # 🤖 ANTHROPIC MODELS (Max temperature: 1.0)
-    ModelConfig("claude-sonnet-4", "claude-sonnet-4-20250514", "anthropic"),
-    ModelConfig("claude-opus-4", "claude-opus-4-20250514", "anthropic"),
-    
-    # 🌟 GOOGLE MODELS (Supports temperature: 0.2-1.2)
-    ModelConfig("gemini-2.5-pro", "gemini-2.5-pro", "google"),
-    
-    # 🚀 XAI MODELS (Supports temperature: 0.2-1.2)
-    ModelConfig("grok-4", "grok-4", "xai"),
-    
-    # 🌙 MOONSHOT AI MODELS (Max temperature: 1.0)
-    ModelConfig("kimi-k2", "kimi-k2-0711-preview", "moonshot"),
-    
-    # 🧠 DEEPSEEK MODELS (Supports temperature: 0.2-1.2)
-    ModelConfig("deepseek-r1", "deepseek-reasoner", "deepseek"),
-    
-    # 🔥 OPENAI MODELS (Supports temperature: 0.2-1.2)
-    ModelConfig("gpt-4.1", "gpt-4.1", "openai"),
-    ModelConfig("gpt-4o", "gpt-4o", "openai"),
-    
-    # ❌ UNAVAILABLE MODELS (Uncomment when you have access)
-    # ModelConfig("gpt-o3", "o3", "openai"),  # Requires OpenAI org verification
-    # 
-    # TO ENABLE GPT-O3:
-    # 1. Get your OpenAI organization verified at: https://platform.openai.com/settings/organization/general
-    # 2. Uncomment the line above
-    # 3. Ensure you have OPENAI_API_KEY in .env.local
-    # 4. Re-run the script
-]
-
-TEMPERATURES = [0.2, 0.7, 1.0, 1.2]  # Script auto-handles model temperature limits
+# Models, temperatures, provider limits and prompts come from the sweep spec
+SPEC = SweepSpec.load()
+MODELS = SPEC.models
+TEMPERATURES = SPEC.temperatures
+
+# Per-provider RPM/TPM budgets shared by every call in this process
+RATE_LIMITERS = RateLimiterRegistry()
+
+# Long-lived keep-alive clients, one per (provider, base_url)
+CLIENTS = ClientRegistry()
+
+# Backoff/jitter retries and a circuit breaker per provider around every call
+RETRIES = RetryManager()
+
+# In-flight limit per provider, raised and cut (AIMD) from observed latency and errors; the
+# current limits are published to data/metrics/concurrency.json while a sweep runs
+CONCURRENCY = ConcurrencyController()
+
+# Content-addressed raw/parsed response cache under data/.cache
+CACHE = ResponseCache()
+
+# Per-call latency/token/cost records (data/metrics/calls.jsonl) and the end-of-run report
+METRICS = MetricsRecorder()
+
+# Job states, attempts and output locations (data/runs.jsonl), opened when a sweep is prepared
+LEDGER: Optional[RunLedger] = None
+
+# Indexed SQLite copy of every result with per-model/per-item aggregates (data/results.db) for the dashboard
+RESULTS_DB: Optional[ResultsDB] = None
+
+# Provider backends (native SDKs, OpenAI-compatible HTTP, AI/ML API), imported on first use.
+# By default responses stream (TTFT, early abort) and shared prompt prefixes are marked for caching.
+BACKENDS = BackendRegistry(BackendContext(RATE_LIMITERS, CLIENTS))
+
+def use_spec(path: str):
+    """Switch to a different sweep spec file"""
+    global SPEC, MODELS, TEMPERATURES
+    SPEC = SweepSpec.load(path)
+    MODELS = SPEC.models
+    TEMPERATURES = SPEC.temperatures
 
 def get_max_temperature(provider: str) -> float:
     """Get the maximum supported temperature for each model provider"""
-    provider_temp_limits = {
-        "anthropic": 1.0,    # Claude models max at 1.0
-        "moonshot": 1.0,     # Kimi models max at 1.0
-        "google": 1.2,       # Gemini supports up to 1.2
-        "xai": 1.2,          # Grok supports up to 1.2
-        "deepseek": 1.2,     # DeepSeek supports up to 1.2
-        "openai": 1.2,       # GPT models support up to 1.2
-    }
-    return provider_temp_limits.get(provider, 1.0)
-
-def should_skip_temperature(provider: str, temperature: float) -> bool:
-    """Check if we should skip this temperature for this provider"""
-    max_temp = get_max_temperature(provider)
-    return temperature > max_temp
-
-def load_prompt() -> str:
-    """Load the research prompt from file"""
-    try:
-        with open('prompt.md', 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Extract the prompt after "Begin your response:"
-            start_marker = "Begin your response:"
-            if start_marker in content:
-                return content.split(start_marker)[0] + start_marker
-            return content
-    except FileNotFoundError:
-        logger.error("prompt.md file not found")
-        raise
+    return SPEC.max_temperature(provider)
+
+def load_prompts() -> Dict[str, PromptVariant]:
+    """Every prompt variant in the sweep spec, by prompt id"""
+    prompts = {prompt_id: load_variant(prompt_id, entry) for prompt_id, entry in SPEC.prompts.items()}
+    for prompt in prompts.values():
+        logger.info("📝 Prompt %s (%s): %d chars, %d-char shared prefix %s", prompt.id, prompt.hash,
+                    len(prompt.text), len(prompt.prefix), prompt.prefix_hash)
+    return prompts
 
 def ensure_data_directory():
     """Create data directory if it doesn't exist"""
     os.makedirs('data', exist_ok=True)
 
-def call_openai_model(model_name: str, prompt: str, temperature: float) -> str:
-    """Call OpenAI models"""
-    client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-        max_tokens=2000
-    )
-    return response.choices[0].message.content
-
-def call_anthropic_model(model_name: str, prompt: str, temperature: float) -> str:
-    """Call Anthropic models"""
-    client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-    
-    # Clamp temperature to Anthropic's maximum of 1.0
-    clamped_temp = min(temperature, 1.0)
-    
-    response = client.messages.create(
-        model=model_name,
-        max_tokens=2000,
-        temperature=clamped_temp,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.content[0].text
-
-def call_google_model(model_name: str, prompt: str, temperature: float) -> str:
-    """Call Google models using new google-genai library"""
-    from google.genai import types
-    
-    # Create client (it automatically picks up GEMINI_API_KEY from environment)
-    client = genai.Client()
-    
-    logger.info(f"Calling Google model {model_name} with temp {temperature}")
-    
-    # Configure generation settings 
-    # Note: Gemini 2.5 Pro requires thinking mode, Flash can have it disabled
-    if "pro" in model_name.lower():
-        # Pro models require thinking mode
-        config = types.GenerateContentConfig(
-            temperature=temperature,
-            max_output_tokens=4000  # Increased for thinking + response
-            # No thinking_config for Pro models - they require thinking mode
-        )
-        logger.info("Using thinking mode for Pro model")
-    else:
-        # Flash models can disable thinking for speed
-        config = types.GenerateContentConfig(
-            temperature=temperature,
-            max_output_tokens=2000,
-            thinking_config=types.ThinkingConfig(thinking_budget=0)
-        )
-        logger.info("Disabled thinking mode for Flash model")
-    
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt,
-        config=config
-    )
-    
-    response_text = response.text
-    logger.info(f"Raw Google response length: {len(response_text)}")
-    logger.info(f"Raw Google response preview: {response_text[:200]}...")
-    
-    # Handle markdown-wrapped JSON from Gemini
-    original_text = response_text
-    if '```json' in response_text:
-        # Extract JSON from markdown code blocks
-        import re
-        json_match = re.search(r'```json\s*({.*?})\s*```', response_text, re.DOTALL)
-        if json_match:
-            response_text = json_match.group(1)
-            logger.info("Extracted JSON from ```json``` blocks")
-    elif '```' in response_text:
-        # Handle plain code blocks
-        import re
-        json_match = re.search(r'```\s*({.*?})\s*```', response_text, re.DOTALL)
-        if json_match:
-            response_text = json_match.group(1)
-            logger.info("Extracted JSON from ``` blocks")
-    
-    logger.info(f"Final response for parsing: {response_text[:200]}...")
-    return response_text
-
-def call_xai_model(model_name: str, prompt: str, temperature: float) -> str:
-    """Call xAI models using OpenAI client"""
-    from openai import OpenAI
-    
-    client = OpenAI(
-        api_key=os.getenv('GROK_API_KEY'),
-        base_url="https://api.x.ai/v1",
-    )
-    
-    # Add delay to handle rate limiting
-    time.sleep(3)
-    
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-        max_tokens=2000
-    )
-    return response.choices[0].message.content
-
-def call_moonshot_model(model_name: str, prompt: str, temperature: float) -> str:
-    """Call Moonshot AI models - Free tier: 6 RPM limit"""
-    headers = {
-        "Authorization": f"Bearer {os.getenv('MOONSHOT_API_KEY')}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": model_name,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": temperature,
-        "max_tokens": 2000
-    }
-    
-    logger.info(f"Calling Moonshot API with model: {model_name}")
-    logger.info(f"Free tier rate limit: 6 RPM (waiting 12 seconds between requests)")
-    
-    # Free tier limit: 6 RPM = 1 request every 10 seconds minimum
-    # Using 12 seconds to be safe
-    time.sleep(12)
-    
-    try:
-        response = requests.post("https://api.moonshot.ai/v1/chat/completions",
-                               headers=headers, json=data, timeout=90)
-        
-        logger.info(f"Moonshot response status: {response.status_code}")
-        
-        if response.status_code == 403:
-            logger.error("Moonshot 403 Forbidden - possible API key issue or model access")
-            logger.error(f"Response: {response.text}")
-        elif response.status_code == 429:
-            logger.error("Moonshot rate limit exceeded - need longer delays")
-            logger.error(f"Response: {response.text}")
-            
-        response.raise_for_status()
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Moonshot API request failed: {e}")
-        raise
+def get_max_tokens(config: ModelConfig) -> int:
+    """Completion token budget for a model"""
+    return SPEC.max_tokens_for(config)
 
-def call_deepseek_model(model_name: str, prompt: str, temperature: float) -> str:
-    """Call DeepSeek models"""
-    headers = {
-        "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": model_name,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": temperature,
-        "max_tokens": 6000  # Further increased for reasoning model at higher temperature
-    }
-    
-    logger.info(f"Calling DeepSeek API with model: {model_name}")
-    logger.info(f"Request data: {data}")
-    
-    try:
-        response = requests.post("https://api.deepseek.com/v1/chat/completions",
-                               headers=headers, json=data, timeout=180)  # 3 minutes for reasoning model
-        
-        logger.info(f"DeepSeek response status: {response.status_code}")
-        logger.info(f"DeepSeek response headers: {dict(response.headers)}")
-        
-        if response.status_code != 200:
-            logger.error(f"DeepSeek API error response: {response.text}")
-            
-        response.raise_for_status()
-        result = response.json()
-        logger.info(f"DeepSeek response: {result}")
-        
-        # DeepSeek reasoning model puts JSON in content, reasoning in reasoning_content
-        message = result["choices"][0]["message"]
-        logger.info("Using content field from DeepSeek response (JSON is there, not in reasoning_content)")
-        return message["content"]
-        
-    except requests.exceptions.Timeout:
-        logger.error("DeepSeek API request timed out after 180 seconds (reasoning model takes longer)")
-        raise
-    except requests.exceptions.RequestException as e:
-        logger.error(f"DeepSeek API request failed: {e}")
-        raise
+def call_provider(config: ModelConfig, prompt: PromptVariant, temperature: float,
+                  route: Route = DEFAULT_ROUTE) -> str:
+    """Call the model through the route's backend and consume the streamed response"""
+    backend = BACKENDS.get(route.backend)
+    return consume_stream(backend.chunks(config, route, prompt, temperature, get_max_tokens(config)),
+                          repair=BACKENDS.context.structured)
 
-def call_model(config: ModelConfig, prompt: str, temperature: float) -> str:
-    """Route to the appropriate API based on provider"""
-    logger.info("Calling %s (temp: %s)", config.name, temperature)
-    
+def call_model(config: ModelConfig, prompt: PromptVariant, temperature: float, replicate: int = 0,
+               route: Optional[Route] = None, parse: Optional[Callable[[str], Dict[str, Any]]] = None
+               ) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Call a model under its route's rate limiter, retrying transient failures.
+
+    Returns the response and, when a `parse` function is given, its parsed form; the
+    parse outcome is recorded with the call's metrics.
+    """
+    route = route or DEFAULT_ROUTE
+    key = route.key(config.provider)
+    logger.info("Calling %s (temp: %s)%s", config.name, temperature, f" via {key}" if key != config.provider else "")
+    limiter = RATE_LIMITERS.get(key)
+    tokens = estimate_tokens(prompt.text, get_max_tokens(config))
+    started, start = time.time(), time.monotonic()
+    attempts = []
+    
+    def attempt() -> str:
+        attempts.append(time.monotonic())
+        # Calls our own rate limiter held back say nothing about spare provider capacity
+        throttled = limiter.last_wait() > 0
+        try:
+            response = call_provider(config, prompt, temperature, route)
+        except Exception as e:
+            if is_retryable(e):
+                CONCURRENCY.record_failure(key, str(status_code_of(e) or type(e).__name__), attempts[-1])
+            raise
+        CONCURRENCY.record_success(key, config.name, time.monotonic() - attempts[-1], attempts[-1], throttled)
+        return response
+    
+    status, error, outcome = 200, None, None
     try:
-        if config.provider == "openai":
-            return call_openai_model(config.api_name, prompt, temperature)
-        elif config.provider == "anthropic":
-            return call_anthropic_model(config.api_name, prompt, temperature)
-        elif config.provider == "google":
-            return call_google_model(config.api_name, prompt, temperature)
-        elif config.provider == "xai":
-            return call_xai_model(config.api_name, prompt, temperature)
-        elif config.provider == "moonshot":
-            return call_moonshot_model(config.api_name, prompt, temperature)
-        elif config.provider == "deepseek":
-            return call_deepseek_model(config.api_name, prompt, temperature)
-        else:
-            raise ValueError(f"Unknown provider: {config.provider}")
+        # The limiter only applies 429 backoff here; RETRIES owns the retry loop
+        response = RETRIES.call(key, lambda: limiter.call(attempt, tokens=tokens, retries=0))
+        parsed = parse(response) if parse is not None else None
+        if parsed is not None:
+            outcome = "repaired" if parsed.get("repairs") else "ok"
+        return response, parsed
     except Exception as e:
+        status, error = status_code_of(e), type(e).__name__
+        if isinstance(e, ResponseParseError):
+            status, outcome = 200, "aborted" if isinstance(e, StreamAborted) else "failed"
         logger.error("Error calling %s: %s", config.name, e)
         raise
+    finally:
+        usage = current_usage() or CallUsage()
+        # A DeepSeek budget of 0 goes to deepseek-chat and is billed at its prices
+        api_name = effective_api_name(config)
+        METRICS.record(CallRecord(
+            run_id=METRICS.run_id, model=config.name, provider=key, api_name=api_name,
+            temperature=temperature, replicate=replicate, prompt_id=prompt.id, started=round(started, 3),
+            latency=round(time.monotonic() - start, 3),
+            queue_wait=round((attempts[0] if attempts else time.monotonic()) - start, 3),
+            attempts=len(attempts), status=status, error=error,
+            prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens,
+            reasoning_tokens=usage.reasoning_tokens,
+            # Anthropic counts extended thinking as output without breaking it out, so the answer share is unknown
+            answer_tokens=None if config.provider == "anthropic" and config.reasoning_budget
+            else answer_tokens(config.provider, usage.completion_tokens, usage.reasoning_tokens),
+            cached_tokens=usage.cached_tokens,
+            cache_write_tokens=usage.cache_write_tokens, ttft=usage.ttft, tokens_per_sec=usage.tokens_per_sec,
+            cost=call_cost(config.provider, api_name, usage.prompt_tokens, usage.completion_tokens,
+                           usage.reasoning_tokens, usage.cached_tokens, usage.cache_write_tokens),
+            parse=outcome))
 
-def parse_response(response: str) -> Dict[str, Any]:
-    """Parse the model response and extract JSON"""
+def parse_response(response: str, repair: bool = False) -> Dict[str, Any]:
+    """Parse the model response and extract JSON (fixing up near-valid JSON with `repair`)"""
     try:
-        # Try to find JSON in the response
-        start = response.find('{')
-        end = response.rfind('}') + 1
-        
-        if start == -1 or end == 0:
-            raise ValueError("No JSON found in response")
-        
-        json_str = response[start:end]
-        data = json.loads(json_str)
-        
-        # Validate the structure
-        if "items" not in data:
-            raise ValueError("Missing 'items' key in response")
-        
-        for item in data["items"]:
-            if not all(key in item for key in ["name", "type", "rating"]):
-                raise ValueError("Item missing required keys")
-            
-            if item["type"] not in ["activity", "object"]:
-                raise ValueError(f"Invalid type: {item['type']}")
-            
-            if not isinstance(item["rating"], (int, float)) or not 1 <= item["rating"] <= 100:
-                raise ValueError(f"Invalid rating: {item['rating']}")
-        
-        return data
-    except (json.JSONDecodeError, ValueError) as e:
+        return extract_items(response, repair)
+    except ValueError as e:
         logger.error("Failed to parse response: %s", e)
         logger.error("Response: %s...", response[:500])
         raise
 
-def save_results(config: ModelConfig, temperature: float, data: Dict[str, Any]):
-    """Save results to JSON file"""
-    filename = f"data/{config.name}_{temperature}.json"
+@dataclass
+class CallResult:
+    data: Dict[str, Any]
+    usage: Dict[str, Any]
+    latency: float
+    cached: bool
+
+def fetch_results(config: ModelConfig, prompt: PromptVariant, temperature: float, replicate: int = 0,
+                  route: Optional[Route] = None) -> CallResult:
+    """Parsed results for one call, served from the response cache when possible"""
+    max_tokens = get_max_tokens(config)
+    key = cache_key(config.provider, config.api_name, prompt.text, temperature, max_tokens, replicate,
+                    config.reasoning_budget)
+    meta = {"model": config.name, "provider": config.provider, "api_name": config.api_name,
+            "temperature": temperature, "max_tokens": max_tokens, "replicate": replicate,
+            "reasoning_budget": config.reasoning_budget, **prompt.tags()}
+    repair = BACKENDS.context.structured
+    fresh: Dict[str, Any] = {}
+    
+    def call() -> str:
+        # Parsed as part of the call, so an unusable response is never cached
+        start = time.monotonic()
+        with track_usage() as usage:
+            response, fresh["parsed"] = call_model(config, prompt, temperature, replicate, route,
+                                                   lambda raw: parse_response(raw, repair))
+        meta["latency"] = round(time.monotonic() - start, 3)
+        meta["usage"] = usage.to_dict()
+        return response
+    
+    retries = RETRIES.policy.parse_retries
+    for attempt in range(retries + 1):
+        fresh.clear()
+        try:
+            entry = CACHE.fetch(key, call, meta)
+            data = entry["parsed"] or fresh.get("parsed") or parse_response(entry["raw"], repair)
+            break
+        except ResponseParseError:
+            if attempt == retries or CACHE.mode == "read-only":
+                raise
+            # A cached response that doesn't parse would only fail again
+            CACHE.discard(key)
+            logger.warning("🧩 Unusable response from %s @ %s, calling again (%d/%d)",
+                           config.name, temperature, attempt + 1, retries)
+    cached = "latency" not in meta
+    entry_meta = entry["meta"]
+    if entry["parsed"] is None:
+        CACHE.put_parsed(key, data)
+    return CallResult(data, entry_meta.get("usage") or {}, 0.0 if cached else entry_meta.get("latency", 0.0), cached)
+
+def save_results(config: ModelConfig, temperature: float, data: Dict[str, Any], data_dir: str = 'data'):
+    """Save results to JSON file (atomically, so a crash never leaves a truncated file)"""
+    filename = result_path(config.name, temperature, data_dir)
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    atomic_write_json(filename, data)
     
     logger.info("Saved results to %s", filename)
 
+def required_api_keys() -> List[str]:
+    """API key variables needed by the routes of the models in the sweep"""
+    keys = set()
+    for config in MODELS:
+        for route in SPEC.routes_for(config):
+            keys.add(BACKENDS.get(route.backend).api_key_env(config, route))
+    return sorted(keys)
+
 def check_api_keys():
     """Check that all required API keys are available"""
-    required_keys = [
-        'OPENAI_API_KEY',
-        'ANTHROPIC_API_KEY',
-        'GEMINI_API_KEY',
-        'GROK_API_KEY',
-        'MOONSHOT_API_KEY',
-        'DEEPSEEK_API_KEY'
-    ]
+    required_keys = required_api_keys()
     
     missing_keys = [key for key in required_keys if not os.getenv(key)]
     
     if missing_keys:
         logger.error("Missing API keys: %s", missing_keys)
         logger.error("Please add them to your .env.local file")
+        if 'AIMLAPI_KEY' in missing_keys:
+            logger.error("Get your AI/ML API key from: https://aimlapi.com/")
         return False
     
     logger.info("All API keys found")
     return True
 
-def main():
+def prepare_sweep(replicates: Optional[int] = None, force: bool = False):
+    """Load prompts, open result stores and compile the sweep plan.
+    
+    Returns (prompts, stores, plan); stores maps prompt id -> ResultStore, or None
+    when the sweep takes a single sample per cell and results go to one file each.
+    """
+    global LEDGER, RESULTS_DB
+    if replicates:
+        SPEC.replicates = replicates
+    prompts = load_prompts()
+    multi_sample = SPEC.multi_sample()
+    
+    # Replicate sweeps stream into the JSONL store; single samples keep one file per cell
+    stores: Dict[str, Optional[ResultStore]] = {}
+    for prompt_id in prompts:
+        data_dir = prompt_data_dir(prompt_id)
+        os.makedirs(data_dir, exist_ok=True)
+        stores[prompt_id] = ResultStore(os.path.join(data_dir, 'replicates')) if multi_sample else None
+    LEDGER = RunLedger()
+    RESULTS_DB = ResultsDB()
+    if RESULTS_DB.empty:
+        RESULTS_DB.index({prompt_id: prompt_data_dir(prompt_id) for prompt_id in prompts},
+                         {config.name: config.provider for config in MODELS})
+    is_done = (lambda job: False) if force else done_checker(SPEC, list(prompts), LEDGER)
+    
+    started = time.perf_counter()
+    texts = {prompt_id: prompt.text for prompt_id, prompt in prompts.items()}
+    plan = plan_sweep(SPEC, texts, is_done, CACHE.keys() if CACHE.mode in ("read-through", "read-only") else None)
+    logger.info("📋 Planned in %.0f ms: %s", (time.perf_counter() - started) * 1000, plan.describe())
+    return prompts, stores, plan
+
+def estimate_eta(plan: SweepPlan, parallel: bool = True, concurrency: Optional[Dict[str, int]] = None) -> float:
+    """Plan ETA from historical latencies, provider concurrency and RPM limits"""
+    limits = SPEC.concurrency()
+    limits.update(concurrency or {})
+    rpm = {provider: RATE_LIMITERS.get(provider).limit.rpm for provider in plan.by_provider()}
+    return plan.eta(limits, latency_history(METRICS.path or 'data/metrics/calls.jsonl'), rpm, parallel)
+
+def close_stores(stores: Dict[str, Optional[ResultStore]], export_legacy: bool = False):
+    for prompt_id, store in stores.items():
+        if store is None:
+            continue
+        store.close()
+        if export_legacy:
+            for record, filename in store.export_legacy(prompt_data_dir(prompt_id)):
+                LEDGER.finish((record["model"], record["temperature"], 0, prompt_id), filename,
+                              {"items": record["items"]})
+    if LEDGER is not None:
+        LEDGER.close()
+    if RESULTS_DB is not None:
+        RESULTS_DB.close()
+
+def main(force: bool = False, replicates: Optional[int] = None):
     """Main execution function"""
     logger.info("Starting Status LLMs Research")
     
@@ -408,68 +350,521 @@ def main():
         return
     
     ensure_data_directory()
-    prompt = load_prompt()
-    
-    total_calls = len(MODELS) * len(TEMPERATURES)
-    completed = 0
+    prompts, stores, plan = prepare_sweep(replicates, force)
+    jobs = plan.runnable
+    progress = Progress(jobs, parallel=False)
+    succeeded = 0
     
-    logger.info("Will make %d API calls total", total_calls)
+    logger.info("Will make %d API calls, ETA %s", len(plan.jobs), format_duration(estimate_eta(plan, parallel=False)))
     
-    for config in MODELS:
-        for temperature in TEMPERATURES:
-            # Check if this model supports this temperature
-            if should_skip_temperature(config.provider, temperature):
-                logger.info("⚠️ Skipping %s at temp %s - exceeds max temp %s", 
-                           config.name, temperature, get_max_temperature(config.provider))
-                completed += 1
-                continue
-            
-            # Check if we already have this result
-            filename = f"data/{config.name}_{temperature}.json"
-            if os.path.exists(filename):
-                logger.info("✅ Skipping %s at temp %s - already exists", config.name, temperature)
-                completed += 1
-                continue
-                
+    try:
+        for job in jobs:
             try:
-                logger.info("🔄 Progress: %d/%d - Calling %s (%s) at temp %s", 
-                           completed, total_calls, config.name, config.api_name, temperature)
-                
-                # Call the model
-                response = call_model(config, prompt, temperature)
-                
-                # Parse and validate response
-                data = parse_response(response)
+                logger.info("🔄 Progress: %d/%d - Calling %s (%s) at temp %s",
+                           sum(progress.finished.values()) + 1, progress.total, job.describe(),
+                           job.config.api_name, job.temperature)
                 
-                # Save results
-                save_results(config, temperature, data)
+                # Call the model (or reuse a cached response), parse and validate it, then save it
+                run_job(job, prompts[job.prompt_id], stores[job.prompt_id])
                 
-                completed += 1
-                logger.info("✅ Successfully processed %s at temp %s", config.name, temperature)
-                
-                # Rate limiting - longer wait for problematic providers
-                if config.provider == "moonshot":
-                    # Already waited 12 seconds in call_moonshot_model
-                    delay = 0
-                elif config.provider in ["xai", "deepseek"]:
-                    delay = 5
-                else:
-                    delay = 2
-                time.sleep(delay)
+                succeeded += 1
+                logger.info("✅ Successfully processed %s (%s)", job.describe(), progress.update(job))
                 
             except Exception as e:
-                logger.error("❌ Failed to process %s at temp %s: %s", config.name, temperature, e)
+                logger.error("❌ Failed to process %s (%s): %s", job.describe(), progress.update(job), e)
                 logger.error("Error type: %s", type(e).__name__)
                 if hasattr(e, 'response') and hasattr(e.response, 'status_code'):
                     logger.error("HTTP Status: %s", e.response.status_code)
                 continue
+    finally:
+        close_stores(stores)
     
-    logger.info("Research completed! Processed %d/%d successfully", completed, total_calls)
+    logger.info("Research completed! Processed %d/%d successfully (%d already done, %d pruned)",
+                succeeded, len(jobs), plan.done, plan.pruned)
+    finish_run()
+
+def finish_run():
+    """End-of-run housekeeping and summaries shared by every mode"""
+    CACHE.log_summary()
+    CACHE.evict()
+    RETRIES.log_summary()
+    CONCURRENCY.log_summary()
+    CLIENTS.log_summary()
+    METRICS.log_summary()
+    METRICS.write_prometheus()
+    METRICS.close()
     logger.info("Results saved in the 'data' directory")
 
-if __name__ == "__main__":
+def output_path(job: Job, store: Optional[ResultStore] = None) -> str:
+    """Where a job's result goes: its legacy file, or its model's replicate store shard"""
+    if store is None:
+        return result_path(job.config.name, job.temperature, prompt_data_dir(job.prompt_id))
+    return os.path.join(store.directory, f"{job.config.name}.jsonl")
+
+def record_result(job: Job, prompt: PromptVariant, result: CallResult, store: Optional[ResultStore] = None):
+    """Save a parsed result as a legacy file, or append it to the replicate store, and mark it done"""
+    if store is None:
+        data = {**result.data, **prompt.tags()}
+        save_results(job.config, job.temperature, data, prompt_data_dir(job.prompt_id))
+        LEDGER.finish(job_key(job), output_path(job), data)
+        RESULTS_DB.add(job.config.name, job.temperature, data, job.replicate, job.prompt_id, job.config.provider)
+        return
+    
+    store.append({
+        "model": job.config.name,
+        "provider": job.config.provider,
+        "api_name": job.config.api_name,
+        "temperature": job.temperature,
+        "replicate": job.replicate,
+        **prompt.tags(),
+        "latency": result.latency,
+        "cached": result.cached,
+        **result.usage,
+        "timestamp": round(time.time(), 3),
+        "items": result.data["items"],
+    })
+    LEDGER.finish(job_key(job), output_path(job, store), {"items": result.data["items"]})
+    RESULTS_DB.add(job.config.name, job.temperature, {**result.data, **prompt.tags()}, job.replicate, job.prompt_id,
+                   job.config.provider, 'replicates')
+
+def run_job(job: Job, prompt: PromptVariant, store: Optional[ResultStore] = None):
+    """Call, parse and save a single (model, temperature, replicate) job"""
+    LEDGER.start(job_key(job), output_path(job, store))
+    try:
+        result = fetch_results(job.config, prompt, job.temperature, job.replicate, job.route)
+    except Exception as e:
+        LEDGER.fail(job_key(job), output_path(job, store), f"{type(e).__name__}: {e}")
+        raise
+    record_result(job, prompt, result, store)
+
+def main_async(concurrency: Dict[str, int] = None, replicates: Optional[int] = None, force: bool = False,
+               export_legacy: bool = False):
+    """Concurrent execution: fan jobs out across providers with per-provider limits"""
+    logger.info("Starting Status LLMs Research (async mode)")
+    
+    if not check_api_keys():
+        return
+    
+    ensure_data_directory()
+    prompts, stores, plan = prepare_sweep(replicates, force)
+    limits = SPEC.concurrency()
+    limits.update(concurrency or {})
+    CONCURRENCY.configure({p: limits.get(p, 2) for p in {job.provider for job in plan.runnable}}, SPEC.providers)
+    logger.info("Will make %d API calls, ETA %s", len(plan.jobs), format_duration(estimate_eta(plan, True, limits)))
+    
+    import asyncio
+    try:
+        summary = asyncio.run(run_sweep(
+            plan.runnable, lambda job: run_job(job, prompts[job.prompt_id], stores[job.prompt_id]),
+            controller=CONCURRENCY))
+    finally:
+        close_stores(stores, export_legacy)
+    
+    logger.info("Research completed in %.1fs! %d succeeded, %d failed (%d already done, %d pruned)",
+                summary.elapsed, summary.succeeded, summary.failed, plan.done, plan.pruned)
+    for job, error in summary.failures:
+        logger.info("  failed: %s - %s", job.describe(), error)
+    finish_run()
+
+def already_recorded(job: Job, prompt: PromptVariant, result: CallResult, store: Optional[ResultStore]) -> bool:
+    """Whether this exact result is already saved (the coordinator stopped between saving and committing it)"""
+    entry = LEDGER.entry(job_key(job), "file" if store is None else "replicates")
+    if entry is None or entry["state"] != DONE:
+        return False
+    saved = {**result.data, **prompt.tags()} if store is None else {"items": result.data["items"]}
+    return entry.get("hash") == content_hash(saved)
+
+def commit_finished(job: Job, finished: Finished, prompts: Dict[str, PromptVariant],
+                    stores: Dict[str, Optional[ResultStore]]):
+    """Save a result returned through the job queue, or record its failure"""
+    if job.prompt_id not in prompts:
+        logger.warning("Queued result for %s is no longer in the sweep", job.describe())
+        return
+    prompt, store = prompts[job.prompt_id], stores[job.prompt_id]
+    if finished.state == FAILED:
+        LEDGER.fail(job_key(job), output_path(job, store), finished.error or "failed")
+        return
+    result = CallResult(**finished.result)
+    if not already_recorded(job, prompt, result, store):
+        record_result(job, prompt, result, store)
+
+def spawn_local_workers(count: int, queue_url: str, worker_args: List[str]) -> List[Any]:
+    """Start worker processes on this host that exit once the queue is drained"""
+    import subprocess
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--queue', queue_url, '--idle-timeout', '0',
+               *worker_args]
+    return [subprocess.Popen(command) for _ in range(count)]
+
+def main_coordinator(queue_url: str = DEFAULT_QUEUE_PATH, replicates: Optional[int] = None, force: bool = False,
+                     export_legacy: bool = False, local_workers: int = 0, worker_args: Optional[List[str]] = None,
+                     max_deliveries: int = DEFAULT_MAX_DELIVERIES):
+    """Distributed execution: queue the sweep for --worker processes and save what they return"""
+    logger.info("Starting Status LLMs Research (coordinator)")
+    if local_workers and queue_url.startswith('memory://'):
+        raise ValueError("A memory:// queue only lives in this process; use a SQLite path or redis:// for "
+                         "--local-workers")
+    
+    ensure_data_directory()
+    prompts, stores, plan = prepare_sweep(replicates, force)
+    queue = open_queue(queue_url, max_deliveries)
+    jobs = plan.runnable
+    queued = [(job_id(job), job.provider, job_payload(job, get_max_tokens(job.config), prompts[job.prompt_id].hash))
+              for job in jobs]
+    dropped = queue.drop_pending({queued_id for queued_id, _, _ in queued})
+    added = queue.enqueue(queued)
+    logger.info("🛰️ Queued %d jobs in %s (%d already queued or in flight%s)", added, queue_url, len(queued) - added,
+                f", dropped {dropped} left over from an earlier sweep" if dropped else "")
+    
+    processes = []
+    if local_workers and not queue.drained():
+        processes = spawn_local_workers(local_workers, queue_url, worker_args or [])
+    try:
+        summary = coordinate(queue, jobs, lambda job, finished: commit_finished(job, finished, prompts, stores),
+                             processes=processes)
+    finally:
+        close_stores(stores, export_legacy)
+        for process in processes:
+            process.wait()
+        queue.close()
+    
+    logger.info("Research completed in %.1fs! %d succeeded, %d failed (%d already done, %d pruned)",
+                summary.elapsed, summary.succeeded, summary.failed, plan.done, plan.pruned)
+    for job, error in summary.failures:
+        logger.info("  failed: %s - %s", job.describe(), error)
+    finish_run()
+
+def main_worker(queue_url: str = DEFAULT_QUEUE_PATH, concurrency: Dict[str, int] = None,
+                lease: float = DEFAULT_LEASE, idle_timeout: float = 30.0, providers: Optional[List[str]] = None,
+                max_deliveries: int = DEFAULT_MAX_DELIVERIES):
+    """Claim jobs from a coordinator's queue, call the models and hand the parsed results back"""
+    logger.info("Starting Status LLMs Research (worker)")
+    
+    # Keys are only needed for the providers this worker actually claims; a missing one fails those jobs
+    missing = [key for key in required_api_keys() if not os.getenv(key)]
+    if missing:
+        logger.warning("Missing API keys: %s (restrict this worker with --providers)", missing)
+    
+    prompts = load_prompts()
+    queue = open_queue(queue_url, max_deliveries)
+    limits = SPEC.concurrency()
+    limits.update(concurrency or {})
+    # Several workers may share this host's data/; only the coordinator's limits go to the status file
+    CONCURRENCY.status_path = None
+    CONCURRENCY.configure({p: limits.get(p, 2) for p in set(SPEC.concurrency()) | set(queue.claimable())},
+                          SPEC.providers)
+    
+    def execute(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = prompts.get(job.prompt_id)
+        if prompt is None or prompt.hash != payload["prompt_hash"]:
+            raise ValueError(f"Prompt {job.prompt_id!r} here doesn't match the coordinator's")
+        return asdict(fetch_results(job.config, prompt, job.temperature, job.replicate, job.route))
+    
+    worker = Worker(queue, execute, CONCURRENCY, lease=lease, idle_timeout=idle_timeout,
+                    providers=set(providers) if providers else None)
+    try:
+        summary = worker.run(pool_size=sum(CONCURRENCY.maximum(p) for p in CONCURRENCY.providers))
+    finally:
+        queue.close()
+    
+    logger.info("Worker %s finished in %.1fs: %d claimed, %d succeeded, %d failed, %d lost to other workers",
+                worker.name, summary.elapsed, summary.claimed, summary.succeeded, summary.failed, summary.lost)
+    finish_run()
+
+def batch_backends() -> Dict[str, Any]:
+    """Batch-API backends for the providers that offer one, using the pooled SDK clients"""
+    backends = {}
+    for config in MODELS:
+        if config.provider in backends or all(r.backend != "native" for r in SPEC.routes_for(config)):
+            continue
+        native = BACKENDS.get("native")
+        if config.provider == "openai":
+            backends["openai"] = OpenAIBatchBackend(
+                native.openai_client("openai", 'OPENAI_API_KEY', native.base_url(config, DEFAULT_ROUTE)))
+        elif config.provider == "anthropic":
+            backends["anthropic"] = AnthropicBatchBackend(
+                native.anthropic_client(native.base_url(config, DEFAULT_ROUTE)))
+    return backends
+
+def main_batch(concurrency: Dict[str, int] = None, replicates: Optional[int] = None, force: bool = False,
+               export_legacy: bool = False, poll_interval: float = 30.0):
+    """Batch-API execution: OpenAI/Anthropic jobs go out as provider batches, the rest run concurrently"""
+    logger.info("Starting Status LLMs Research (batch mode)")
+    
+    if not check_api_keys():
+        return
+    
+    ensure_data_directory()
+    prompts, stores, plan = prepare_sweep(replicates, force)
+    ledger = BatchLedger()
+    backends = batch_backends()
+    configs = {config.name: config for config in MODELS}
+    
+    # Cached jobs and non-batch providers run directly, the rest become batch requests
+    direct, in_flight = list(plan.cached), 0
+    pending: Dict[str, Dict[str, Any]] = {provider: {} for provider in backends}
+    for job in plan.jobs:
+        if job.provider not in backends or CACHE.mode == "read-only":
+            direct.append(job)
+            continue
+        custom_id = make_custom_id(job.config.name, job.temperature, job.replicate, job.prompt_id)
+        if ledger.in_flight(custom_id):
+            in_flight += 1
+            continue
+        temperature = min(job.temperature, 1.0) if job.provider == "anthropic" else job.temperature
+        prompt = prompts[job.prompt_id]
+        pending[job.provider][custom_id] = (job, BatchRequest(
+            custom_id, job.config.api_name, prompt.text, temperature, get_max_tokens(job.config),
+            prompt.prefix if BACKENDS.context.prompt_caching else None, job.config.reasoning_budget))
+    logger.info("Will submit %d batch requests and make %d direct calls (%d already in open batches)",
+                sum(len(p) for p in pending.values()), len(direct), in_flight)
+    
+    counts = {"succeeded": 0, "failed": 0}
+    
+    def entry_job(entry: Dict[str, Any]) -> Optional[Job]:
+        config = configs.get(entry["model"])
+        prompt_id = entry.get("prompt_id", "default")
+        if config is None or prompt_id not in prompts:
+            logger.warning("Batch result for %s [%s] is no longer in the sweep", entry["model"], prompt_id)
+            return None
+        return Job(config, entry["temperature"], entry["replicate"], prompt_id)
+    
+    def fail(entry: Dict[str, Any], error: str):
+        job = entry_job(entry)
+        if job is None:
+            return
+        counts["failed"] += 1
+        LEDGER.fail(job_key(job), output_path(job, stores[job.prompt_id]), error)
+    
+    def handle(entry: Dict[str, Any], result: BatchResult):
+        job = entry_job(entry)
+        if job is None:
+            return
+        prompt_id = job.prompt_id
+        config = job.config
+        if result.error:
+            counts["failed"] += 1
+            logger.error("❌ Batch request failed: %s - %s", job.describe(), result.error)
+            LEDGER.fail(job_key(job), output_path(job, stores[prompt_id]), str(result.error))
+            return
+        max_tokens = get_max_tokens(config)
+        prompt = prompts[prompt_id]
+        key = cache_key(config.provider, config.api_name, prompt.text, job.temperature, max_tokens, job.replicate,
+                        config.reasoning_budget)
+        CACHE.put(key, result.text, {"model": config.name, "provider": config.provider, "api_name": config.api_name,
+                                     "temperature": job.temperature, "max_tokens": max_tokens,
+                                     "reasoning_budget": config.reasoning_budget,
+                                     "replicate": job.replicate, **prompt.tags(), "batch": True,
+                                     "usage": result.usage})
+        try:
+            data = parse_response(result.text, BACKENDS.context.structured)
+        except ValueError as e:
+            counts["failed"] += 1
+            LEDGER.fail(job_key(job), output_path(job, stores[prompt_id]), f"ValueError: {e}")
+            return
+        CACHE.put_parsed(key, data)
+        record_result(job, prompt, CallResult(data, result.usage, 0.0, False), stores[prompt_id])
+        counts["succeeded"] += 1
+    
+    import asyncio
+    try:
+        # Inside the try: if a submission fails, earlier batches are already ledgered and the stores still close
+        for provider, requests_by_id in pending.items():
+            backend = backends[provider]
+            entries = list(requests_by_id.items())
+            for start in range(0, len(entries), backend.max_requests):
+                chunk = entries[start:start + backend.max_requests]
+                batch_id = RETRIES.call(provider, lambda: backend.submit([request for _, (_, request) in chunk]))
+                ledger.add(batch_id, provider, {custom_id: {"model": job.config.name, "temperature": job.temperature,
+                                                            "replicate": job.replicate, "prompt_id": job.prompt_id}
+                                                for custom_id, (job, _) in chunk})
+                logger.info("📮 Submitted %s batch %s with %d requests", provider, batch_id, len(chunk))
+                for _, (job, _) in chunk:
+                    LEDGER.start(job_key(job), output_path(job, stores[job.prompt_id]))
+        if direct:
+            limits = SPEC.concurrency()
+            limits.update(concurrency or {})
+            CONCURRENCY.configure({p: limits.get(p, 2) for p in {job.provider for job in direct}}, SPEC.providers)
+            summary = asyncio.run(run_sweep(
+                direct, lambda job: run_job(job, prompts[job.prompt_id], stores[job.prompt_id]),
+                controller=CONCURRENCY))
+            logger.info("Direct calls: %d succeeded, %d failed", summary.succeeded, summary.failed)
+        if ledger.open_batches():
+            poll_batches(backends, ledger, handle, interval=poll_interval, fail=fail)
+    finally:
+        close_stores(stores, export_legacy)
+    
+    logger.info("Batches completed! %d succeeded, %d failed", counts["succeeded"], counts["failed"])
+    finish_run()
+
+def show_plan(replicates: Optional[int] = None, force: bool = False, concurrency: Dict[str, int] = None):
+    """Print the compiled sweep plan and its ETA without calling anything"""
+    prompts, stores, plan = prepare_sweep(replicates, force)
+    close_stores(stores)
+    limits = SPEC.concurrency()
+    limits.update(concurrency or {})
+    print(plan.describe())
+    print(f"ETA: {format_duration(estimate_eta(plan, True, limits))} concurrent (--async), "
+          f"{format_duration(estimate_eta(plan, False))} serial")
+    for provider, count in sorted(plan.by_provider().items()):
+        print(f"  {provider:<10} {count:>6} calls, concurrency {limits.get(provider, 2)}")
+
+def parse_concurrency(values) -> Dict[str, int]:
+    """Parse repeated --concurrency PROVIDER=N options"""
+    limits = {}
+    for value in values or []:
+        provider, _, count = value.partition('=')
+        if not count.isdigit():
+            raise argparse.ArgumentTypeError(f"Expected PROVIDER=N, got {value!r}")
+        limits[provider] = int(count)
+    return limits
+
+def local_worker_args(args: argparse.Namespace) -> List[str]:
+    """Options a coordinator passes on to the worker processes it starts"""
+    argv = ['--spec', args.spec, '--cache', args.cache, '--lease', str(args.lease),
+            '--max-deliveries', str(args.max_deliveries)]
+    flags = {'--structured': args.structured, '--no-stream': args.no_stream, '--no-prompt-cache': args.no_prompt_cache,
+             '--fixed-concurrency': args.fixed_concurrency}
+    argv += [flag for flag, enabled in flags.items() if enabled]
+    options = {'--max-attempts': args.max_attempts, '--parse-retries': args.parse_retries,
+               '--pool-size': args.pool_size, '--metrics': args.metrics}
+    for option, value in options.items():
+        if value is not None:
+            argv += [option, str(value)]
+    for option, values in (('--concurrency', args.concurrency), ('--rate-limit', args.rate_limit)):
+        for value in values or []:
+            argv += [option, value]
+    return argv
+
+def cli(argv: Optional[List[str]] = None):
+    """Command-line entry point"""
     # Load environment variables
     from dotenv import load_dotenv
     load_dotenv('.env.local')
     
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Status LLMs research runner")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="run jobs concurrently with per-provider limits")
+    parser.add_argument('--concurrency', action='append', metavar='PROVIDER=N',
+                        help="starting in-flight limit for a provider in --async mode (repeatable)")
+    parser.add_argument('--fixed-concurrency', action='store_true',
+                        help="keep in-flight limits at their starting values instead of adapting them (AIMD)")
+    parser.add_argument('--coordinator', action='store_true',
+                        help="queue the sweep for --worker processes (here or on other hosts) and save their results")
+    parser.add_argument('--worker', action='store_true',
+                        help="claim jobs from a coordinator's queue and call the models with this host's keys")
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH, metavar='URL',
+                        help="shared job queue: a SQLite path, redis://host:port/db[#prefix] or memory://name "
+                             f"(default: {DEFAULT_QUEUE_PATH})")
+    parser.add_argument('--local-workers', type=int, default=0,
+                        help="with --coordinator, also start this many worker processes on this host")
+    parser.add_argument('--providers', default=None,
+                        help="with --worker, only claim jobs for these comma-separated providers")
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help="seconds a claimed job stays with a worker without a heartbeat before it is re-queued")
+    parser.add_argument('--idle-timeout', type=float, default=30.0,
+                        help="seconds a worker waits on an empty queue before exiting ('inf' to keep serving)")
+    parser.add_argument('--max-deliveries', type=int, default=DEFAULT_MAX_DELIVERIES,
+                        help="claims of a queued job (failed attempts or dead workers) before it counts as failed")
+    parser.add_argument('--spec', default='sweep.json',
+                        help="sweep spec with models, temperatures, provider limits and prompts (default: sweep.json)")
+    parser.add_argument('--plan', action='store_true',
+                        help="print the compiled sweep plan and ETA, then exit without calling anything")
+    parser.add_argument('--replicates', type=int, default=None,
+                        help="samples per (model, temperature) cell, overriding the spec; above 1, results stream to data/replicates/*.jsonl")
+    parser.add_argument('--export-legacy', action='store_true',
+                        help="after a replicate sweep, write data/{model}_{temp}.json files for the dashboard")
+    parser.add_argument('--batch', action='store_true',
+                        help="submit OpenAI/Anthropic jobs through their batch APIs (resumable; other providers run concurrently)")
+    parser.add_argument('--batch-poll-interval', type=float, default=30.0,
+                        help="initial seconds between batch status polls (backs off up to 5 minutes)")
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help="keep-alive connections per provider client")
+    parser.add_argument('--max-attempts', type=int, default=None,
+                        help="attempts per call before giving up on transient errors")
+    parser.add_argument('--force', action='store_true',
+                        help="re-run cells whose result files already exist (unchanged calls come from the cache)")
+    parser.add_argument('--cache', choices=CACHE_MODES, default='read-through',
+                        help="response cache mode (default: read-through)")
+    parser.add_argument('--cache-max-mb', type=float, default=None,
+                        help="evict least recently used cached responses beyond this size")
+    parser.add_argument('--cache-max-age-days', type=float, default=None,
+                        help="evict cached responses older than this")
+    parser.add_argument('--export-columnar', metavar='PATH', nargs='?', const='data/ratings.parquet',
+                        help="after the run, export all ratings to a Parquet/Arrow table (default: data/ratings.parquet)")
+    parser.add_argument('--metrics', metavar='PATH', default='data/metrics/calls.jsonl',
+                        help="append per-call metrics to this JSONL file ('' to disable)")
+    parser.add_argument('--metrics-prom', metavar='PATH', default=None,
+                        help="also write run metrics in Prometheus textfile format")
+    parser.add_argument('--no-stream', action='store_true',
+                        help="make blocking (non-streaming) provider calls")
+    parser.add_argument('--structured', action='store_true',
+                        help="constrain output to the items schema (json_schema, tool use, response_schema or "
+                             "JSON mode per provider) and repair near-valid JSON locally")
+    parser.add_argument('--parse-retries', type=int, default=None,
+                        help="fresh calls after a response that can't be parsed or repaired (default 1)")
+    parser.add_argument('--no-prompt-cache', action='store_true',
+                        help="don't mark the shared prompt prefix for provider-side prompt caching")
+    parser.add_argument('--rate-limit', action='append', metavar='PROVIDER=RPM[:TPM]',
+                        help="override a provider's requests/tokens per minute budget (repeatable)")
+    parser.add_argument('--reasoning-budgets', type=parse_budgets, default=None, metavar='N,N,...',
+                        help="also run each Gemini/Claude/DeepSeek model at these reasoning budgets (tokens, 'auto' "
+                             "for dynamic) as {model}@think-N variants, then compare latency and ratings with the base model")
+    parser.add_argument('--backend', choices=sorted(BACKEND_CLASSES), default=None,
+                        help="send every model through this backend instead of its routes in the spec (e.g. aimlapi)")
+    args = parser.parse_args(argv)
+    
+    for value in args.rate_limit or []:
+        RATE_LIMITERS.configure(*parse_rate_limit(value))
+    if args.pool_size:
+        CLIENTS.configure(args.pool_size)
+    if args.max_attempts:
+        RETRIES.policy = RetryPolicy(max_attempts=args.max_attempts)
+    CONCURRENCY.adaptive = not args.fixed_concurrency
+    if args.parse_retries is not None:
+        RETRIES.policy.parse_retries = args.parse_retries
+    CACHE.mode = args.cache
+    BACKENDS.context.stream = not args.no_stream
+    BACKENDS.context.prompt_caching = not args.no_prompt_cache
+    BACKENDS.context.structured = args.structured
+    METRICS.path = args.metrics or None
+    METRICS.prometheus_path = args.metrics_prom
+    if args.cache_max_mb is not None:
+        CACHE.max_bytes = int(args.cache_max_mb * 1024 * 1024)
+    if args.cache_max_age_days is not None:
+        CACHE.max_age = args.cache_max_age_days * 86400
+    
+    if args.spec != 'sweep.json':
+        use_spec(args.spec)
+    if args.backend:
+        SPEC.route_all(args.backend)
+    if args.reasoning_budgets:
+        variants = SPEC.add_reasoning_budgets(args.reasoning_budgets)
+        logger.info("🧠 Comparing reasoning budgets with %d model variants: %s", len(variants),
+                    ", ".join(v.name for v in variants) or "none")
+    
+    if args.plan:
+        show_plan(args.replicates, args.force, parse_concurrency(args.concurrency))
+    elif args.worker:
+        main_worker(args.queue, parse_concurrency(args.concurrency), args.lease, args.idle_timeout,
+                    args.providers.split(',') if args.providers else None, args.max_deliveries)
+    elif args.coordinator:
+        main_coordinator(args.queue, args.replicates, args.force, args.export_legacy, args.local_workers,
+                         local_worker_args(args), args.max_deliveries)
+    elif args.batch:
+        main_batch(parse_concurrency(args.concurrency), args.replicates, args.force, args.export_legacy,
+                   args.batch_poll_interval)
+    elif args.use_async or (args.replicates or SPEC.replicates) > 1:
+        main_async(parse_concurrency(args.concurrency), args.replicates, args.force, args.export_legacy)
+    else:
+        main(args.force, args.replicates)
+    
+    if args.export_columnar:
+        from research.export import ColumnarExporter
+        ColumnarExporter(providers={m.name: m.provider for m in MODELS},
+                         data_dirs={prompt_id: prompt_data_dir(prompt_id) for prompt_id in SPEC.prompts}
+                         ).write(args.export_columnar)
+    if args.reasoning_budgets and not (args.plan or args.worker) and os.path.exists(DEFAULT_DB_PATH):
+        log_comparison(compare_budgets(DEFAULT_DB_PATH, args.metrics or DEFAULT_METRICS_PATH))
+
+if __name__ == "__main__":
+    cli()
@@ -1,9 +1,16 @@
 import { NextResponse } from 'next/server'
 import { loadLLMData } from '@/lib/server-data'
 
-export async function GET() {
+// Optional filters: ?model=gpt-4o&temperature=0.7&prompt=default
+export async function GET(request: Request) {
   try {
-    const data = await loadLLMData()
+    const params = new URL(request.url).searchParams
+    const temperature = params.get('temperature')
+    const data = await loadLLMData({
+      model: params.get('model') ?? undefined,
+      temperature: temperature !== null ? parseFloat(temperature) : undefined,
+      promptId: params.get('prompt') ?? undefined
+    })
     return NextResponse.json(data)
   } catch (error) {
     console.error('Error loading data:', error)
@@ -12,4 +19,4 @@ export async function GET() {
       { status: 500 }
     )
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,34 @@
+import { NextResponse } from 'next/server'
+import { loadItemConsensus, loadModelStats, loadTemperatureDeltas } from '@/lib/server-data'
+
+// Aggregates from data/results.db:
+//   /api/stats?kind=models                   mean rating per model and temperature
+//   /api/stats?kind=consensus&limit=50       items ranked across models
+//   /api/stats?kind=temperature&model=grok-4 per-item rating change across temperatures
+export async function GET(request: Request) {
+  const params = new URL(request.url).searchParams
+  const promptId = params.get('prompt') ?? 'default'
+  try {
+    switch (params.get('kind') ?? 'models') {
+      case 'models':
+        return NextResponse.json(await loadModelStats(promptId))
+      case 'consensus':
+        return NextResponse.json(await loadItemConsensus(promptId, parseInt(params.get('limit') ?? '100', 10)))
+      case 'temperature': {
+        const model = params.get('model')
+        if (!model) {
+          return NextResponse.json({ error: 'model is required' }, { status: 400 })
+        }
+        return NextResponse.json(await loadTemperatureDeltas(model, promptId))
+      }
+      default:
+        return NextResponse.json({ error: 'Unknown kind' }, { status: 400 })
+    }
+  } catch (error) {
+    console.error('Error loading stats:', error)
+    return NextResponse.json(
+      { error: 'Failed to load stats' },
+      { status: 500 }
+    )
+  }
+}
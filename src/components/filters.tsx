@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Slider } from '@/components/ui/slider'
 
 interface FiltersProps {
@@ -34,6 +34,21 @@ export function Filters({ availableModels, availableTemperatures, onFiltersChang
   const [selectedTemperatures, setSelectedTemperatures] = useState<number[]>(availableTemperatures)
   const [ratingRange, setRatingRange] = useState<[number, number]>([0, 100])
   const [itemType, setItemType] = useState<'activity' | 'object' | 'all'>('all')
+  const seenModels = useRef(availableModels)
+  const seenTemperatures = useRef(availableTemperatures)
+
+  // Models and temperatures that show up live are selected, like those present on load
+  useEffect(() => {
+    const added = availableModels.filter(m => !seenModels.current.includes(m))
+    seenModels.current = availableModels
+    if (added.length) setSelectedModels(prev => [...prev, ...added])
+  }, [availableModels])
+
+  useEffect(() => {
+    const added = availableTemperatures.filter(t => !seenTemperatures.current.includes(t))
+    seenTemperatures.current = availableTemperatures
+    if (added.length) setSelectedTemperatures(prev => [...prev, ...added])
+  }, [availableTemperatures])
 
   useEffect(() => {
     onFiltersChange({
@@ -4,6 +4,7 @@ import { useState, useMemo } from 'react'
 import { Filters } from '@/components/filters'
 import { DataDisplay } from '@/components/data-display'
 import { LLMResponse } from '@/lib/types'
+import { useLiveResponses } from '@/lib/live'
 
 interface MainDisplayProps {
   initialData: LLMResponse[]
@@ -17,8 +18,9 @@ interface FilterState {
 }
 
 export function MainDisplay({ initialData }: MainDisplayProps) {
-  const availableModels = useMemo(() => [...new Set(initialData.map(res => res.model))].sort(), [initialData])
-  const availableTemperatures = useMemo(() => [...new Set(initialData.map(res => res.temperature))].sort((a, b) => a - b), [initialData])
+  const responses = useLiveResponses(initialData)
+  const availableModels = useMemo(() => [...new Set(responses.map(res => res.model))].sort(), [responses])
+  const availableTemperatures = useMemo(() => [...new Set(responses.map(res => res.temperature))].sort((a, b) => a - b), [responses])
 
   const [filters, setFilters] = useState<FilterState>({
     models: availableModels,
@@ -28,7 +30,7 @@ export function MainDisplay({ initialData }: MainDisplayProps) {
   })
 
   const filteredData = useMemo(() => {
-    let data = [...initialData]
+    let data = [...responses]
 
     // Filter responses by model and temperature
     data = data.filter(res => filters.models.includes(res.model))
@@ -47,7 +49,7 @@ export function MainDisplay({ initialData }: MainDisplayProps) {
       return { ...res, items }
     }).filter(res => res.items.length > 0) // Remove responses that have no items left
 
-  }, [initialData, filters])
+  }, [responses, filters])
 
   return (
     <div className="grid grid-cols-1 lg:grid-cols-4 gap-8">
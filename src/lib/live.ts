@@ -0,0 +1,65 @@
+'use client'
+
+import { useEffect, useState } from 'react'
+import { LLMResponse, StatusItem } from './types'
+
+// Set to the feed of `python -m research watch`, e.g. http://127.0.0.1:8765/events
+const LIVE_URL = process.env.NEXT_PUBLIC_LIVE_URL
+
+interface LiveResult {
+  prompt_id: string
+  model: string
+  temperature: number
+  replicate: number
+  items: StatusItem[]
+}
+
+interface LiveDelta {
+  seq: number
+  results: LiveResult[]
+}
+
+// Folds results from the live feed into the server-rendered responses.
+// Like loadLLMData, only replicate 0 of the default prompt is shown, one response per (model, temperature).
+export function useLiveResponses(initialData: LLMResponse[], promptId = 'default'): LLMResponse[] {
+  const [responses, setResponses] = useState(initialData)
+
+  useEffect(() => setResponses(initialData), [initialData])
+
+  useEffect(() => {
+    if (!LIVE_URL) return
+    const url = new URL(LIVE_URL)
+    url.searchParams.set('prompt', promptId)
+    const source = new EventSource(url.toString())
+    let snapshots = 0
+
+    // The first snapshot matches what the page was rendered from; a later one means
+    // the feed restarted or we fell behind, so reload everything
+    source.addEventListener('snapshot', () => {
+      if (snapshots++ === 0) return
+      fetch(`/api/data?prompt=${encodeURIComponent(promptId)}`)
+        .then(res => (res.ok ? res.json() : Promise.reject(res.statusText)))
+        .then((data: LLMResponse[]) => setResponses(data))
+        .catch(error => console.error('Error reloading data:', error))
+    })
+
+    source.addEventListener('delta', event => {
+      const delta: LiveDelta = JSON.parse((event as MessageEvent).data)
+      const updates = delta.results.filter(r => r.replicate === 0)
+      if (!updates.length) return
+      setResponses(prev => {
+        const next = [...prev]
+        for (const { model, temperature, items } of updates) {
+          const index = next.findIndex(r => r.model === model && r.temperature === temperature)
+          if (index >= 0) next[index] = { model, temperature, items }
+          else next.push({ model, temperature, items })
+        }
+        return next
+      })
+    })
+
+    return () => source.close()
+  }, [promptId])
+
+  return responses
+}
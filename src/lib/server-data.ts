@@ -1,38 +1,184 @@
-import { LLMResponse } from './types'
+import { DataFilters, ItemConsensus, LLMResponse, ModelStat, StatusItem, TemperatureDelta } from './types'
 import { promises as fs } from 'fs'
 import path from 'path'
+import type { DatabaseSync } from 'node:sqlite'
 
-export async function loadLLMData(): Promise<LLMResponse[]> {
-  const dataDir = path.join(process.cwd(), 'data')
-  const responses: LLMResponse[] = []
+const dataDir = path.join(process.cwd(), 'data')
 
+// data/results.db, maintained by run_status_research.py (python -m research db builds it from data/).
+// node:sqlite ships with Node 22.13+; without it, or without the database, data/ is read directly.
+let resultsDb: DatabaseSync | null = null
+
+async function openResultsDb(): Promise<DatabaseSync | null> {
+  if (resultsDb) return resultsDb
   try {
-    const files = await fs.readdir(dataDir)
-    
-    for (const file of files) {
-      if (file.endsWith('.json')) {
-        try {
-          const filePath = path.join(dataDir, file)
-          const content = await fs.readFile(filePath, 'utf-8')
-          const data = JSON.parse(content)
-          
-          // Extract model and temperature from filename
-          const [modelName, tempStr] = file.replace('.json', '').split('_')
-          const temperature = parseFloat(tempStr)
-          
-          responses.push({
-            model: modelName,
-            temperature,
-            items: data.items || []
-          })
-        } catch (error) {
-          console.warn(`Failed to load ${file}:`, error)
-        }
-      }
+    const dbPath = path.join(dataDir, 'results.db')
+    await fs.access(dbPath)
+    const { DatabaseSync } = await import(/* webpackIgnore: true */ 'node:sqlite')
+    resultsDb = new DatabaseSync(dbPath, { readOnly: true })
+  } catch {
+    return null
+  }
+  return resultsDb
+}
+
+interface ItemRow {
+  model: string
+  temperature: number
+  name: string
+  type: StatusItem['type']
+  rating: number
+}
+
+// One response per (model, temperature): its lowest replicate, like the legacy files
+function queryResponses(db: DatabaseSync, filters: DataFilters): LLMResponse[] {
+  const conditions = ['r.prompt_id = ?']
+  const params: (string | number)[] = [filters.promptId ?? 'default']
+  if (filters.model !== undefined) {
+    conditions.push('r.model = ?')
+    params.push(filters.model)
+  }
+  if (filters.temperature !== undefined) {
+    conditions.push('r.temperature = ?')
+    params.push(filters.temperature)
+  }
+  const rows = db.prepare(`
+    SELECT r.model, r.temperature, i.name, i.type, i.rating
+    FROM runs r JOIN items i ON i.run_id = r.id
+    WHERE ${conditions.join(' AND ')}
+      AND r.replicate = (SELECT MIN(replicate) FROM runs f
+                         WHERE f.model = r.model AND f.temperature = r.temperature AND f.prompt_id = r.prompt_id)
+    ORDER BY r.model, r.temperature, i.position`).all(...params) as unknown as ItemRow[]
+
+  const responses = new Map<string, LLMResponse>()
+  for (const row of rows) {
+    const key = `${row.model}\u0000${row.temperature}`
+    let response = responses.get(key)
+    if (!response) {
+      response = { model: row.model, temperature: row.temperature, items: [] }
+      responses.set(key, response)
+    }
+    response.items.push({ name: row.name, type: row.type, rating: row.rating })
+  }
+  return Array.from(responses.values())
+}
+
+// One line of data/runs.jsonl, the run ledger written by run_status_research.py
+interface LedgerEntry {
+  model: string
+  temperature: number
+  replicate: number
+  prompt_id: string
+  state: 'running' | 'done' | 'failed'
+  path: string
+}
+
+// Result files of the default prompt, latest finished one per (model, temperature).
+// Returns null when there is no ledger yet.
+async function readLedger(dataDir: string): Promise<LedgerEntry[] | null> {
+  let content: string
+  try {
+    content = await fs.readFile(path.join(dataDir, 'runs.jsonl'), 'utf-8')
+  } catch {
+    return null
+  }
+
+  const cells = new Map<string, LedgerEntry>()
+  for (const line of content.split('\n')) {
+    if (!line) continue
+    let entry: LedgerEntry
+    try {
+      entry = JSON.parse(line)
+    } catch {
+      continue // torn last line from an interrupted run
     }
+    // Replicate store records (.jsonl) reach the dashboard through --export-legacy files
+    if (entry.state !== 'done' || entry.prompt_id !== 'default' || !entry.path.endsWith('.json')) continue
+    cells.set(`${entry.model}\u0000${entry.temperature}`, entry)
+  }
+  return Array.from(cells.values())
+}
+
+// Without a ledger: every data/{model}_{temp}.json file (model names may contain '_')
+async function listResultFiles(dataDir: string): Promise<LedgerEntry[]> {
+  const files = await fs.readdir(dataDir)
+  const entries: LedgerEntry[] = []
+  for (const file of files) {
+    if (!file.endsWith('.json') || file.startsWith('.')) continue
+    const stem = file.slice(0, -'.json'.length)
+    const split = stem.lastIndexOf('_')
+    const temperature = parseFloat(stem.slice(split + 1))
+    if (split <= 0 || isNaN(temperature)) continue
+    entries.push({
+      model: stem.slice(0, split),
+      temperature,
+      replicate: 0,
+      prompt_id: 'default',
+      state: 'done',
+      path: file
+    })
+  }
+  return entries
+}
+
+export async function loadLLMData(filters: DataFilters = {}): Promise<LLMResponse[]> {
+  const db = await openResultsDb()
+  if (db) return queryResponses(db, filters)
+
+  let entries: LedgerEntry[]
+
+  try {
+    entries = (await readLedger(dataDir)) ?? (await listResultFiles(dataDir))
   } catch (error) {
     console.warn('Data directory not found or empty')
+    return []
   }
 
-  return responses
-}
\ No newline at end of file
+  entries = entries.filter(entry =>
+    (filters.model === undefined || entry.model === filters.model) &&
+    (filters.temperature === undefined || entry.temperature === filters.temperature) &&
+    (filters.promptId === undefined || filters.promptId === 'default'))
+
+  const responses = await Promise.all(entries.map(async (entry): Promise<LLMResponse | null> => {
+    try {
+      const content = await fs.readFile(path.join(dataDir, entry.path), 'utf-8')
+      const data = JSON.parse(content)
+      return {
+        model: entry.model,
+        temperature: entry.temperature,
+        items: data.items || []
+      }
+    } catch (error) {
+      console.warn(`Failed to load ${entry.path}:`, error)
+      return null
+    }
+  }))
+
+  return responses.filter((response): response is LLMResponse => response !== null)
+}
+
+// Aggregates are only available from the results database; without it these return []
+
+export async function loadModelStats(promptId = 'default'): Promise<ModelStat[]> {
+  const db = await openResultsDb()
+  if (!db) return []
+  return db.prepare(`
+    SELECT model, temperature, runs, items, mean_rating FROM model_stats
+    WHERE prompt_id = ? ORDER BY model, temperature`).all(promptId) as unknown as ModelStat[]
+}
+
+export async function loadItemConsensus(promptId = 'default', limit = 100): Promise<ItemConsensus[]> {
+  const db = await openResultsDb()
+  if (!db) return []
+  return db.prepare(`
+    SELECT normalized, name, type, models, mentions, mean_rating, rank FROM item_consensus
+    WHERE prompt_id = ? ORDER BY rank LIMIT ?`).all(promptId, limit) as unknown as ItemConsensus[]
+}
+
+export async function loadTemperatureDeltas(model: string, promptId = 'default'): Promise<TemperatureDelta[]> {
+  const db = await openResultsDb()
+  if (!db) return []
+  return db.prepare(`
+    SELECT model, normalized, temperature, mean_rating, delta FROM temperature_deltas
+    WHERE prompt_id = ? AND model = ? ORDER BY normalized, temperature`).all(promptId, model) as unknown as TemperatureDelta[]
+}
@@ -25,4 +25,37 @@ export const MODELS = [
 export const TEMPERATURES = [0.2, 0.7, 1.0, 1.2] as const
 
 export type Model = typeof MODELS[number]
-export type Temperature = typeof TEMPERATURES[number]
\ No newline at end of file
+export type Temperature = typeof TEMPERATURES[number]
+
+export interface DataFilters {
+  model?: string
+  temperature?: number
+  promptId?: string
+}
+
+// Materialized aggregates from data/results.db
+export interface ModelStat {
+  model: string
+  temperature: number
+  runs: number
+  items: number
+  mean_rating: number | null
+}
+
+export interface ItemConsensus {
+  normalized: string
+  name: string
+  type: string | null
+  models: number
+  mentions: number
+  mean_rating: number | null
+  rank: number
+}
+
+export interface TemperatureDelta {
+  model: string
+  normalized: string
+  temperature: number
+  mean_rating: number | null
+  delta: number | null
+}